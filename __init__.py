@@ -14,7 +14,26 @@ Usage:
     restored = decompress(compressed)
 """
 
-from .phi_engine_master import compress, decompress, PRESETS
+from .phi_engine_master import (
+    compress, decompress, decompress_range, PRESETS,
+    PhiCompressor, PhiDecompressor,
+    PhiDictionary, train_dictionary,
+    PhiChunkStore,
+    read_jsonl_column,
+    SYMBOLIC_LEVELS, benchmark_levels,
+    ENTROPY_BACKENDS, register_entropy_backend,
+    PhiModel, PQSearcher, search, append, read_embedding_segments,
+)
 
 __version__ = "3.1.5"
-__all__ = ["compress", "decompress", "PRESETS", "__version__"]
+__all__ = [
+    "compress", "decompress", "decompress_range", "PRESETS",
+    "PhiCompressor", "PhiDecompressor",
+    "PhiDictionary", "train_dictionary",
+    "PhiChunkStore",
+    "read_jsonl_column",
+    "SYMBOLIC_LEVELS", "benchmark_levels",
+    "ENTROPY_BACKENDS", "register_entropy_backend",
+    "PhiModel", "PQSearcher", "search", "append", "read_embedding_segments",
+    "__version__",
+]
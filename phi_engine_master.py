@@ -313,15 +313,24 @@ import numpy as np
 import struct
 import time
 import zlib
+import lzma
+import bz2
 import binascii
 import json
 import base64
+import hashlib
 from typing import Tuple, Dict, List, Optional, Any, Union
 from dataclasses import dataclass
+from functools import partial
+import os
 import warnings
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-# Suppress numpy warnings for cleaner output
-warnings.filterwarnings('ignore', category=RuntimeWarning)
+try:
+    from threadpoolctl import threadpool_limits  # Optional: caps BLAS threads per PQ worker
+except ImportError:
+    threadpool_limits = None
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONSTANTS & VERSION INFORMATION
@@ -336,11 +345,39 @@ PHI = 1.618033988749895  # Golden ratio φ = (1 + √5) / 2
 MODE_EMBEDDINGS = 0      # Numeric embeddings/vectors
 MODE_TS_DOD_RLE = 3      # Timeseries with delta-of-delta + RLE
 MODE_SYMBOLIC = 4        # Text/symbolic data
+MODE_SYMBOLIC_STREAM = 5 # Framed text stream (PhiCompressor)
+MODE_SYMBOLIC_BLOCKS = 6 # Independent text blocks with offset table
+MODE_SYMBOLIC_DICT = 7   # Small text record against a trained dictionary
+MODE_DEDUP_MANIFEST = 8  # Chunk digest list for a PhiChunkStore
+MODE_TOKENS = 9          # Lossless integer token-ID streams
+MODE_JSONL = 10          # Columnar JSON-lines
+MODE_BINARY = 11         # Shuffled/stored non-text bytes
+MODE_EMBEDDINGS_MODEL = 12 # Embedding codes against a saved PhiModel
 
 # Feature flags
 FLAG_ENTROPY_FSE = 0x08  # Final entropy coding applied
 FLAG_HAS_PQ = 0x10       # Block Product Quantization used
 FLAG_HAS_RESIDUAL = 0x20 # Residual pass included
+FLAG_SPLIT_STREAMS = 0x40 # Symbolic opcodes stored as split typed streams
+FLAG_BACKEND_MASK = 0x07 # Entropy backend ID of the payload frame (0 = zlib)
+
+LONG_RANGE_WINDOW = 1 << 23  # 8 MB long-range match window
+
+# Symbolic-path speed levels: 1 = greedy/shallow hot ingest, 9 = exhaustive archival.
+# insert_limit links only the first N positions of each match (None links all);
+# entropy_level is the zlib level of the entropy stage. Level 6 is the historic default.
+SYMBOLIC_LEVELS = {
+    1: {'window_size': 8192,  'max_chain': 1,    'min_match': 4, 'insert_limit': 4,    'entropy_level': 1},
+    2: {'window_size': 16384, 'max_chain': 2,    'min_match': 4, 'insert_limit': 8,    'entropy_level': 3},
+    3: {'window_size': 32768, 'max_chain': 4,    'min_match': 4, 'insert_limit': 16,   'entropy_level': 5},
+    4: {'window_size': 32768, 'max_chain': 8,    'min_match': 4, 'insert_limit': 32,   'entropy_level': 6},
+    5: {'window_size': 32768, 'max_chain': 16,   'min_match': 4, 'insert_limit': None, 'entropy_level': 9},
+    6: {'window_size': 32768, 'max_chain': 64,   'min_match': 3, 'insert_limit': None, 'entropy_level': 9},
+    7: {'window_size': 32768, 'max_chain': 256,  'min_match': 3, 'insert_limit': None, 'entropy_level': 9},
+    8: {'window_size': 32768, 'max_chain': 1024, 'min_match': 3, 'insert_limit': None, 'entropy_level': 9},
+    9: {'window_size': 32768, 'max_chain': None, 'min_match': 3, 'insert_limit': None, 'entropy_level': 9},
+}
+DEFAULT_LEVEL = 6
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -385,17 +422,42 @@ def read_blob(data: bytes, offset: int) -> Tuple[bytes, int]:
 # ENTROPY CODING (Final Stage Compression)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def fse_compress(data: bytes) -> bytes:
-    """Apply final entropy coding using zlib (maximum compression)."""
+# Entropy backend IDs. Non-zlib frames carry the ID as a tag byte after the
+# '<I' raw length; zlib streams always start with 0x78, so zlib frames (and
+# every legacy frame) need no tag.
+ENTROPY_TAG_ZLIB = 0x78
+ENTROPY_ZLIB = 0
+ENTROPY_STORE = 1
+ENTROPY_SECTIONS = 2  # Sections with a backend and model per byte plane
+ENTROPY_ANS = 3
+ENTROPY_LZMA = 4
+ENTROPY_BZ2 = 5
+ENTROPY_CHUNKED = 6  # Independent frames with a chunk-size table
+ENTROPY_CHUNK_SIZE = 1 << 22  # 4 MB per thread-pool chunk
+
+
+def fse_compress(data: bytes, level: int = 9, backend: str = 'zlib') -> bytes:
+    """
+    Apply final entropy coding (zlib at maximum compression by default).
+    
+    backend names a registered backend (see ENTROPY_BACKENDS), or 'auto' /
+    'archival' to pick one from a quick estimate on a sample of data.
+    """
     if len(data) == 0:
         return struct.pack('<I', 0)
     
-    compressed = zlib.compress(data, level=9)
-    return struct.pack('<I', len(data)) + compressed
+    if backend in ('auto', 'archival'):
+        backend = choose_entropy_backend(data, archival=backend == 'archival')
+    backend_id, encode, _ = ENTROPY_BACKENDS[backend]
+    
+    compressed = encode(data, level)
+    if backend_id == ENTROPY_ZLIB:
+        return struct.pack('<I', len(data)) + compressed
+    return struct.pack('<IB', len(data), backend_id) + compressed
 
 
-def fse_decompress(data: bytes) -> bytes:
-    """Decompress entropy-coded data."""
+def fse_decompress(data: bytes, workers: Optional[int] = None) -> bytes:
+    """Decompress entropy-coded data (chunked frames on up to `workers` threads)."""
     if len(data) < 4:
         return b''
     
@@ -403,7 +465,324 @@ def fse_decompress(data: bytes) -> bytes:
     if original_len == 0:
         return b''
     
-    return zlib.decompress(data[4:])
+    tag = data[4]
+    if tag == ENTROPY_TAG_ZLIB:
+        return zlib.decompress(data[4:])
+    if tag == ENTROPY_SECTIONS:
+        return _decode_sections(data[4:], workers)
+    if tag == ENTROPY_CHUNKED:
+        return _decode_chunked(data[4:], workers)
+    return _backend_by_id(tag)[2](data[5:])
+
+
+def entropy_backend_id(frame: bytes) -> int:
+    """Backend ID of an fse_compress() frame (as recorded in FLAG_BACKEND_MASK)."""
+    if len(frame) < 5 or frame[4] == ENTROPY_TAG_ZLIB:
+        return ENTROPY_ZLIB
+    return frame[4]
+
+ANS_PROB_BITS = 12               # Frequencies normalized to 4096
+ANS_STATE_LOW = 1 << 16          # rANS state interval [2^16, 2^32), 16-bit renormalization
+ANS_MAX_LANES = 16384            # Interleaved states decoded per NumPy step
+ANS_SYMBOLS_PER_LANE = 1024
+
+
+def _ans_normalize(counts: np.ndarray) -> np.ndarray:
+    """Scale symbol counts to frequencies summing to 2^ANS_PROB_BITS (present symbols >= 1)."""
+    total = 1 << ANS_PROB_BITS
+    freq = np.zeros(256, dtype=np.int64)
+    present = counts > 0
+    freq[present] = np.maximum(1, np.round(counts[present] * total / counts.sum()))
+    
+    # Fix rounding drift on the largest frequencies
+    while freq.sum() != total:
+        i = int(np.argmax(freq))
+        freq[i] += max(total - freq.sum(), 1 - freq[i])
+    return freq
+
+
+def ans_encode(data: bytes) -> bytes:
+    """
+    Order-0 rANS with interleaved states, vectorized over lanes.
+    
+    Symbol i goes to lane i % lanes, so each NumPy step encodes (or decodes)
+    one symbol for every lane. A state emits at most one 16-bit word per
+    symbol, which keeps renormalization a single masked gather/scatter.
+    
+    Layout:
+        '<II'      n_symbols, lanes
+        varints    256 normalized frequencies
+        '<u4'      final lane states
+        '<I' '<u2' renormalization word count and words (decode order)
+    """
+    n = len(data)
+    if n == 0:
+        return struct.pack('<II', 0, 0)
+    
+    symbols = np.frombuffer(data, dtype=np.uint8)
+    freq = _ans_normalize(np.bincount(symbols, minlength=256))
+    cum = np.concatenate([[0], np.cumsum(freq)[:-1]])
+    
+    lanes = int(np.clip(n // ANS_SYMBOLS_PER_LANE, 1, ANS_MAX_LANES))
+    steps = -(-n // lanes)
+    grid = np.full(steps * lanes, np.argmax(freq), dtype=np.uint8)
+    grid[:n] = symbols
+    grid = grid.reshape(steps, lanes)
+    
+    # States fit in uint32; x_max saturates for a single-symbol alphabet
+    freq_u = freq.astype(np.uint32)
+    cum_u = cum.astype(np.uint32)
+    x_max = np.minimum((ANS_STATE_LOW >> ANS_PROB_BITS << 16) * freq, 0xFFFFFFFF).astype(np.uint32)
+    
+    x = np.full(lanes, ANS_STATE_LOW, dtype=np.uint32)
+    words = []
+    for t in range(steps - 1, -1, -1):
+        s = grid[t]
+        f = freq_u[s]
+        emit = x >= x_max[s]
+        if emit.any():
+            words.append(x[emit].astype(np.uint16))
+            x[emit] >>= 16
+        q, r = np.divmod(x, f)
+        x = (q << ANS_PROB_BITS) + r + cum_u[s]
+    
+    stream = np.concatenate(words[::-1]) if words else np.zeros(0, dtype=np.uint16)
+    return (
+        struct.pack('<II', n, lanes) + _varint_encode(freq)
+        + x.astype('<u4').tobytes()
+        + struct.pack('<I', len(stream)) + stream.astype('<u2').tobytes()
+    )
+
+
+def ans_decode(data: bytes) -> bytes:
+    """Inverse of ans_encode()."""
+    n, lanes = struct.unpack('<II', data[:8])
+    if n == 0:
+        return b''
+    
+    freq, offset = _varint_decode(data, 256, 8)
+    freq = freq.astype(np.uint32)
+    cum = np.concatenate([[0], np.cumsum(freq)[:-1]]).astype(np.uint32)
+    slot_to_symbol = np.repeat(np.arange(256, dtype=np.uint8), freq)
+    
+    # Per-slot tables: one gather per step instead of three
+    slot_freq = freq[slot_to_symbol]
+    slot_bias = (np.arange(1 << ANS_PROB_BITS, dtype=np.uint32) - cum[slot_to_symbol])
+    
+    x = np.frombuffer(data, dtype='<u4', count=lanes, offset=offset).astype(np.uint32)
+    offset += 4 * lanes
+    n_words, = struct.unpack('<I', data[offset:offset + 4])
+    words = np.frombuffer(data, dtype='<u2', count=n_words, offset=offset + 4).astype(np.uint32)
+    
+    steps = -(-n // lanes)
+    out = np.empty((steps, lanes), dtype=np.uint8)
+    mask = (1 << ANS_PROB_BITS) - 1
+    ptr = 0
+    for t in range(steps):
+        slot = x & mask
+        out[t] = slot_to_symbol[slot]
+        x = slot_freq[slot] * (x >> ANS_PROB_BITS) + slot_bias[slot]
+        refill = x < ANS_STATE_LOW
+        k = int(np.count_nonzero(refill))
+        if k:
+            x[refill] = (x[refill] << 16) | words[ptr:ptr + k]
+            ptr += k
+    
+    return out.reshape(-1)[:n].tobytes()
+
+
+# Registered entropy backends: name -> (id, encode(data, level), decode(data))
+ENTROPY_BACKENDS = {
+    'zlib': (ENTROPY_ZLIB, lambda data, level: zlib.compress(data, level), zlib.decompress),
+    'store': (ENTROPY_STORE, lambda data, level: data, lambda data: data),
+    'ans': (ENTROPY_ANS, lambda data, level: ans_encode(data), ans_decode),
+    'lzma': (ENTROPY_LZMA, lambda data, level: lzma.compress(data, preset=level), lzma.decompress),
+    'bz2': (ENTROPY_BZ2, lambda data, level: bz2.compress(data, max(level, 1)), bz2.decompress),
+}
+
+ENTROPY_SAMPLE_PIECES = 16
+ENTROPY_SAMPLE_PIECE_SIZE = 4096
+ANS_MIN_SIZE = 8192  # Below this the rANS frequency table costs more than it saves
+
+
+def register_entropy_backend(name: str, backend_id: int, encode, decode):
+    """
+    Add an entropy backend usable by fse_compress(backend=name).
+    
+    encode(data, level) and decode(data) map bytes to bytes. ID 7 is
+    free; the ID is stored in frames and in the header flag bits. Names
+    and IDs are permanent: registering either a second time raises.
+    """
+    if not 0 <= backend_id <= FLAG_BACKEND_MASK or backend_id in (ENTROPY_SECTIONS, ENTROPY_CHUNKED):
+        raise ValueError(f"Backend ID must be 0-7 and not a framing ID, got {backend_id}")
+    if name in ('auto', 'archival'):
+        raise ValueError(f"'{name}' is reserved for automatic backend selection")
+    if name in ENTROPY_BACKENDS:
+        raise ValueError(f"Entropy backend '{name}' is already registered")
+    for other, (other_id, _, _) in ENTROPY_BACKENDS.items():
+        if other_id == backend_id:
+            raise ValueError(f"Backend ID {backend_id} already used by '{other}'")
+    ENTROPY_BACKENDS[name] = (backend_id, encode, decode)
+
+
+def _backend_by_id(backend_id: int) -> Tuple[int, Any, Any]:
+    """Registry entry for a backend ID."""
+    for entry in ENTROPY_BACKENDS.values():
+        if entry[0] == backend_id:
+            return entry
+    raise ValueError(f"Unknown entropy backend ID: {backend_id}")
+
+
+def _strided_sample(data: bytes, pieces: int = ENTROPY_SAMPLE_PIECES, 
+                    piece_size: int = ENTROPY_SAMPLE_PIECE_SIZE) -> bytes:
+    """Evenly spaced, 8-byte-aligned pieces of data (all of it if small)."""
+    if len(data) <= pieces * piece_size:
+        return data
+    stride = (len(data) - piece_size) // (pieces - 1) // 8 * 8
+    return b''.join(data[i * stride:i * stride + piece_size] for i in range(pieces))
+
+
+def _order0_entropy_bytes(data: bytes) -> float:
+    """Order-0 Shannon bound of data in bytes (what rANS can reach)."""
+    counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+    p = counts[counts > 0] / len(data)
+    return float(-(counts[counts > 0] * np.log2(p)).sum() / 8)
+
+
+def choose_entropy_backend(data: bytes, archival: bool = False) -> str:
+    """
+    Pick a backend from a quick estimate on a strided sample.
+    
+    Compares the order-0 entropy bound (reachable by rANS) with zlib -1 on
+    the sample: incompressible data is stored, data where zlib -1 already
+    matches the bound (so zlib -9 will beat rANS) goes to zlib, or the
+    smaller of lzma/bz2 when archival, and the rest to rANS.
+    """
+    sample = _strided_sample(data)
+    if len(sample) == 0:
+        return 'store'
+    
+    bound = _order0_entropy_bytes(sample)
+    lz = len(zlib.compress(sample, 1))
+    if min(bound, lz) > 0.97 * len(sample):
+        return 'store'
+    
+    if lz < 1.01 * bound or len(data) < ANS_MIN_SIZE:
+        if archival:
+            trials = {name: len(ENTROPY_BACKENDS[name][1](sample, 9)) for name in ('lzma', 'bz2')}
+            return min(trials, key=trials.get)
+        return 'zlib'
+    return 'ans'
+
+
+def _byte_planes(data: bytes, width: int) -> List[bytes]:
+    """Split width-byte little-endian elements into per-byte planes."""
+    if width == 1 or len(data) % width:
+        return [data]
+    body = np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+    return [body[:, b].tobytes() for b in range(width)]
+
+
+def fse_compress_chunked(
+    data: bytes, 
+    level: int = 9, 
+    backend: str = 'zlib', 
+    workers: Optional[int] = None, 
+    chunk_size: int = ENTROPY_CHUNK_SIZE
+) -> bytes:
+    """
+    fse_compress() over independent chunks on a thread pool.
+    
+    zlib, lzma and bz2 release the GIL, so chunks compress (and decompress)
+    in parallel. Each chunk is a complete fse_compress() frame and picks
+    its own backend under 'auto'. Data up to chunk_size is a plain frame.
+    
+    Layout after the '<I' raw length:
+        '<BII'  ENTROPY_CHUNKED, chunk_size, n_chunks
+        '<u4'   chunk-size table (frame bytes per chunk)
+        frames  one fse_compress() frame per chunk
+    """
+    if len(data) <= chunk_size:
+        return fse_compress(data, level, backend)
+    
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    frames = _thread_map(partial(fse_compress, level=level, backend=backend), chunks, workers)
+    sizes = np.array([len(frame) for frame in frames], dtype='<u4')
+    
+    header = struct.pack('<IBII', len(data), ENTROPY_CHUNKED, chunk_size, len(frames))
+    return header + sizes.tobytes() + b''.join(frames)
+
+
+def _decode_chunked(data: bytes, workers: Optional[int] = None) -> bytes:
+    """Inverse of fse_compress_chunked() after the raw length."""
+    _, n_chunks = struct.unpack('<II', data[1:9])
+    sizes = np.frombuffer(data, dtype='<u4', count=n_chunks, offset=9)
+    ends = (9 + 4 * n_chunks + np.cumsum(sizes, dtype=np.int64)).tolist()
+    starts = [9 + 4 * n_chunks] + ends[:-1]
+    
+    view = memoryview(data)
+    frames = [view[a:b] for a, b in zip(starts, ends)]
+    return b''.join(_thread_map(fse_decompress, frames, workers))
+
+
+def _thread_map(func, items: List[Any], workers: Optional[int] = None) -> List[Any]:
+    """map() on a thread pool (serial for one worker or item)."""
+    if workers == 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(func, items))
+
+
+def fse_compress_sections(
+    sections: List[Tuple[bytes, int]], 
+    level: int = 9, 
+    backend: str = 'auto',
+    workers: Optional[int] = None
+) -> bytes:
+    """
+    Entropy-code payload sections with separate models.
+    
+    Each (data, width) section is split into `width` byte planes (e.g. the
+    low and high bytes of uint16 quantized coefficients) and every plane
+    is its own (chunked) frame that picks its backend (see 
+    choose_entropy_backend) and, for rANS, its own frequency table, so PQ
+    codes, quantized coefficients and DoD residuals are never modeled
+    together. A backend name other than 'auto'/'archival' forces it for
+    every plane. fse_decompress() returns the concatenated sections.
+    """
+    raw_len = sum(len(data) for data, _ in sections)
+    if raw_len == 0:
+        return struct.pack('<I', 0)
+    
+    out = [struct.pack('<IBI', raw_len, ENTROPY_SECTIONS, len(sections))]
+    for data, width in sections:
+        planes = _byte_planes(data, width)
+        out.append(struct.pack('<B', len(planes)))
+        for plane in planes:
+            out.append(write_blob(fse_compress_chunked(plane, level, backend, workers)))
+    return b''.join(out)
+
+
+def _decode_sections(data: bytes, workers: Optional[int] = None, 
+                     count: Optional[int] = None) -> bytes:
+    """Inverse of fse_compress_sections() after the raw length (first count sections only if given)."""
+    n_sections, = struct.unpack('<I', data[1:5])
+    if count is not None:
+        n_sections = min(n_sections, count)
+    offset = 5
+    sections = []
+    for _ in range(n_sections):
+        n_planes, = struct.unpack('<B', data[offset:offset + 1])
+        offset += 1
+        planes = []
+        for _ in range(n_planes):
+            blob, offset = read_blob(data, offset)
+            planes.append(np.frombuffer(fse_decompress(blob, workers), dtype=np.uint8))
+        if n_planes == 1:
+            sections.append(planes[0].tobytes())
+        else:
+            sections.append(np.stack(planes, axis=1).tobytes())
+    return b''.join(sections)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -417,6 +796,344 @@ class Match:
     length: int  # Length of match
 
 
+def _match_length(data: bytes, i: int, j: int, limit: int) -> int:
+    """Length of the common prefix of data[i:] and data[j:], capped at limit."""
+    length = 0
+    
+    # Gallop over equal slices before falling back to single bytes
+    for step in (64, 16, 4):
+        while (length + step <= limit and 
+               data[i + length:i + length + step] == data[j + length:j + length + step]):
+            length += step
+    
+    while length < limit and data[i + length] == data[j + length]:
+        length += 1
+    
+    return length
+
+
+_SINGLE_BYTES = tuple(bytes((b,)) for b in range(256))
+
+
+def _copy_match(output: bytearray, offset: int, length: int):
+    """Append an LZ match to output, handling overlapping copies."""
+    start = len(output) - offset
+    if offset >= length:
+        output += output[start:start + length]
+    else:
+        # Overlapping match repeats the last `offset` bytes
+        pattern = output[start:]
+        repeats = length // offset + 1
+        output += (pattern * repeats)[:length]
+
+
+def _expand_spans(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Indices covering [start, start + length) for each span, concatenated."""
+    lengths = lengths.astype(np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    span_offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - span_offsets, lengths) + np.arange(total, dtype=np.int64)
+
+
+def _fill_matches(output: np.ndarray, starts: np.ndarray, offsets: np.ndarray, 
+                  lengths: np.ndarray):
+    """
+    Copy LZ matches into output in place (any dtype), one gather per round.
+    
+    Match k fills output[starts[k]:starts[k] + lengths[k]] from offsets[k]
+    positions back; matches are in order and do not overlap each other.
+    Every match element points at the element it copies (start - offset +
+    j % offset, so overlapping matches repeat their pattern). A run of
+    consecutive matches whose sources all end before the run's first match
+    is copied by one gather, so copies run once per round rather than once
+    per match.
+    """
+    if len(starts) == 0:
+        return
+    total = len(output)
+    starts, offsets, lengths = (np.asarray(a, dtype=np.int64) for a in (starts, offsets, lengths))
+    
+    # Element i of a match copies element i - offset; overlapping matches
+    # (offset < length) instead cycle through their last `offset` elements
+    index_dtype = np.int32 if total < 2**31 else np.int64
+    sources = np.arange(total, dtype=index_dtype)
+    sources[_expand_spans(starts, lengths)] -= np.repeat(offsets.astype(index_dtype), lengths)
+    overlapping = offsets < lengths
+    if overlapping.any():
+        spans = _expand_spans(starts[overlapping], lengths[overlapping])
+        span_starts = np.repeat(starts[overlapping], lengths[overlapping])
+        span_offsets = np.repeat(offsets[overlapping], lengths[overlapping])
+        sources[spans] = span_starts - span_offsets + (spans - span_starts) % span_offsets
+    
+    # Rounds: consecutive matches whose sources all end before the
+    # round's first match read only final elements, so one gather fills
+    # them. Sources end at or before their own match, so the round
+    # after one starting at match r starts where the running maximum
+    # of source ends first passes starts[r]
+    source_ends = starts - offsets + np.minimum(offsets, lengths)
+    next_round = np.searchsorted(np.maximum.accumulate(source_ends), starts, side='right')
+    bounds = np.append(starts, total)
+    
+    r = 0
+    while r < len(starts):
+        following = int(next_round[r])
+        round_start, round_end = int(bounds[r]), int(bounds[following])
+        output[round_start:round_end] = output.take(sources[round_start:round_end])
+        r = following
+
+
+def _gear_table() -> np.ndarray:
+    """Gear hash table: golden-ratio multiplicative hash with a murmur3 finalizer."""
+    h = (np.arange(1, 257, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)) & np.uint64(0xFFFFFFFF)
+    h ^= h >> np.uint64(16)
+    h = (h * np.uint64(0x85EBCA6B)) & np.uint64(0xFFFFFFFF)
+    h ^= h >> np.uint64(13)
+    h = (h * np.uint64(0xC2B2AE35)) & np.uint64(0xFFFFFFFF)
+    h ^= h >> np.uint64(16)
+    table = h.astype(np.uint32)
+    table.flags.writeable = False
+    return table
+
+
+_GEAR = _gear_table()
+
+
+def _gear_hash(data: bytes) -> np.ndarray:
+    """
+    Rolling 32-byte Gear hash at every position, computed vectorized.
+    
+    h[i] = sum_k gear[data[i - k]] << k (mod 2^32) depends only on bytes
+    i-31..i, so equal content yields equal hashes wherever it appears.
+    """
+    raw = np.frombuffer(data, dtype=np.uint8)
+    n = len(raw)
+    gear = _GEAR[raw]
+    h = np.zeros(n, dtype=np.uint32)
+    for k in range(min(32, n)):
+        h[k:] += gear[:n - k] << np.uint32(k)
+    return h
+
+
+def _varint_encode(values: Any) -> bytes:
+    """LEB128-encode unsigned integers (vectorized)."""
+    values = np.asarray(values, dtype=np.uint64).reshape(-1)
+    if len(values) == 0:
+        return b''
+    
+    n_bytes = np.ones(len(values), dtype=np.int64)
+    rest = values >> np.uint64(7)
+    while rest.any():
+        n_bytes += rest > 0
+        rest >>= np.uint64(7)
+    
+    starts = np.cumsum(n_bytes) - n_bytes
+    output = np.zeros(int(n_bytes.sum()), dtype=np.uint8)
+    rest = values.copy()
+    for k in range(int(n_bytes.max())):
+        active = n_bytes > k
+        group = (rest[active] & np.uint64(0x7F)).astype(np.uint8)
+        group |= (n_bytes[active] > k + 1).astype(np.uint8) << np.uint8(7)
+        output[starts[active] + k] = group
+        rest >>= np.uint64(7)
+    
+    return output.tobytes()
+
+
+def _varint_decode(data: bytes, count: int, offset: int = 0) -> Tuple[np.ndarray, int]:
+    """Decode `count` LEB128 integers starting at offset; returns (values, end offset)."""
+    if count == 0:
+        return np.zeros(0, dtype=np.uint64), offset
+    
+    raw = np.frombuffer(data, dtype=np.uint8)[offset:]
+    ends = np.flatnonzero(raw < 0x80)[:count]
+    if len(ends) < count:
+        raise ValueError(f"Truncated varint stream: need {count}, found {len(ends)}")
+    
+    used = int(ends[-1]) + 1
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = np.arange(used) - np.repeat(starts, ends - starts + 1)
+    groups = (raw[:used] & 0x7F).astype(np.uint64) << (7 * shifts).astype(np.uint64)
+    
+    return np.add.reduceat(groups, starts), offset + used
+
+
+class HashChainMatchFinder:
+    """
+    Hash-chain match finder keyed on min_match-byte prefixes.
+    
+    Every position is linked to the previous position sharing the same
+    prefix, so candidate lookup visits only real prefix matches instead
+    of every byte in the window. Chain depth is bounded by max_chain
+    (None walks the whole chain, equivalent to an exhaustive search).
+    
+    A finder created with fork() links new positions on top of a frozen
+    parent (e.g. a primed dictionary) without copying its chains.
+    """
+    
+    def __init__(self, window_size: int = 32768, min_match: int = 3,
+                 max_chain: Optional[int] = 64, max_length: int = 255, base: int = 0):
+        self.window_size = window_size
+        self.min_match = min_match
+        self.max_chain = max_chain
+        self.max_length = max_length
+        self.base = base  # First position linked into the chains
+        self.head = {}
+        self.prev = []
+        self.parent = None
+    
+    def insert(self, data: bytes, position: int):
+        """Link position into the chain for its prefix (positions in order)."""
+        key = data[position:position + self.min_match]
+        previous = self.head.get(key)
+        if previous is None:
+            previous = self.parent.head.get(key, -1) if self.parent else -1
+        self.prev.append(previous)
+        self.head[key] = position
+    
+    def skip(self, count: int):
+        """Advance past count positions without linking them (fast levels)."""
+        self.prev.extend([-1] * count)
+    
+    @property
+    def next_position(self) -> int:
+        """First position not yet linked into the chains."""
+        return self.base + len(self.prev)
+    
+    def fork(self) -> 'HashChainMatchFinder':
+        """Child finder continuing from this one, which is left unmodified."""
+        child = HashChainMatchFinder(
+            self.window_size, self.min_match, self.max_chain, 
+            self.max_length, self.next_position
+        )
+        child.parent = self
+        return child
+    
+    def find(self, data: bytes, i: int, end: int) -> Optional[Match]:
+        """
+        Find the best match for data[i:end] among earlier positions.
+        
+        Longest match wins; equal-length candidates are broken in favour of
+        the offset nearest the golden ratio point of the window. The walk
+        stops early once a match of the longest possible length is found
+        at or beyond that point.
+        """
+        min_match = self.min_match
+        window_start = max(0, i - self.window_size)
+        target_offset = int((i - window_start) / PHI)
+        max_chain = self.max_chain
+        prev = self.prev
+        base = self.base
+        parent = self.parent
+        
+        longest = min(self.max_length, end - i)
+        best_offset = 0
+        best_length = 0
+        depth = 0
+        
+        key = data[i:i + min_match]
+        j = self.head.get(key)
+        if j is None:
+            j = parent.head.get(key, -1) if parent else -1
+        
+        while j >= window_start:
+            # Matches never run past the current position (non-overlapping)
+            limit = min(self.max_length, end - i, i - j)
+            
+            if limit >= min_match and limit >= best_length:
+                probe = best_length - 1 if best_length else 0
+                if data[i + probe] == data[j + probe]:
+                    length = _match_length(data, i, j, limit)
+                    offset = i - j
+                    
+                    if length > best_length:
+                        best_offset, best_length = offset, length
+                    elif (length == best_length and 
+                          abs(offset - target_offset) < abs(best_offset - target_offset)):
+                        # PHI tie-breaking: prefer offsets near golden ratio point
+                        best_offset = offset
+                    
+                    # Offsets only grow along the chain: past the target, no
+                    # later candidate is longer or nearer the golden ratio point
+                    if best_length >= longest and offset >= target_offset:
+                        break
+            
+            depth += 1
+            if max_chain is not None and depth >= max_chain:
+                break
+            if j >= base:
+                j = prev[j - base]
+            else:
+                j = parent.prev[j - parent.base]
+        
+        if best_length >= min_match:
+            return Match(best_offset, best_length)
+        return None
+
+
+class LongRangeMatchFinder:
+    """
+    Long-distance match finder over a multi-megabyte window.
+    
+    Content-defined anchors (positions where the 32-byte Gear hash has its
+    top bits clear, on average one per anchor_gap bytes) are indexed by
+    hash. An anchor whose content was seen at an earlier anchor is
+    verified, then extended forwards and backwards, so a repeated
+    multi-KB block becomes a single match however far back it occurred.
+    """
+    
+    def __init__(self, window_size: int = 1 << 23, anchor_gap: int = 64,
+                 min_length: int = 64, max_length: int = 1 << 24):
+        self.window_size = window_size
+        self.anchor_gap = anchor_gap
+        self.min_length = min_length
+        self.max_length = max_length
+        self.anchor_size = 32
+    
+    def find_all(self, data: bytes, start: int = 0) -> List[Tuple[int, int, int]]:
+        """Non-overlapping (position, offset, length) matches in data[start:], in order."""
+        n = len(data)
+        size = self.anchor_size
+        if n - start < self.min_length:
+            return []
+        
+        h = _gear_hash(data)
+        bits = max(1, int(round(np.log2(self.anchor_gap))))
+        mask = np.uint32(((1 << bits) - 1) << (32 - bits))
+        anchor_ends = np.flatnonzero((h[size - 1:] & mask) == 0)
+        anchors = anchor_ends.tolist()  # Anchor start positions
+        keys = h[anchor_ends + size - 1].tolist()
+        
+        table = {}
+        matches = []
+        covered = start  # Matches never start before this position
+        
+        for a, key in zip(anchors, keys):
+            b = table.get(key)
+            table[key] = a
+            
+            if b is None or a < covered or a - b > self.window_size:
+                continue
+            if data[a:a + size] != data[b:b + size]:
+                continue
+            
+            # Extend forwards, without overlapping the source
+            length = _match_length(data, a, b, min(self.max_length, n - a, a - b))
+            
+            # Extend backwards into bytes not yet covered
+            back = 0
+            while (a - back > covered and b - back > 0 and 
+                   length + back < a - b and data[a - back - 1] == data[b - back - 1]):
+                back += 1
+            
+            if length + back >= self.min_length:
+                matches.append((a - back, a - b, length + back))
+                covered = a + length
+        
+        return matches
+
+
 class FractalDictionary:
     """
     Fractal dictionary with PHI-resonant tie-breaking.
@@ -425,30 +1142,101 @@ class FractalDictionary:
     golden ratio guided tie-breaking for optimal compression.
     """
     
-    def __init__(self, window_size: int = 32768):
-        """Initialize fractal dictionary."""
+    def __init__(self, window_size: int = 32768, max_chain: Optional[int] = 64,
+                 long_window: int = 0, min_match: int = 3, 
+                 insert_limit: Optional[int] = None):
+        """
+        Initialize fractal dictionary.
+        
+        Args:
+            window_size: Sliding window size in bytes
+            max_chain: Maximum hash-chain candidates per position
+                       (None for an exhaustive search)
+            long_window: Long-range match window in bytes (0 disables);
+                         long matches have unbounded offsets and lengths
+            min_match: Shortest match worth emitting (and hash prefix length)
+            insert_limit: Link only the first N positions of each match into
+                          the hash chains (None links every position)
+        """
         self.window_size = window_size
-        self.min_match = 3
+        self.min_match = min_match
+        self.max_chain = max_chain
+        self.long_window = long_window
+        self.insert_limit = insert_limit
+    
+    def prime(self, history: bytes) -> HashChainMatchFinder:
+        """Build hash chains over history once, for reuse via encode(primed=...)."""
+        finder = HashChainMatchFinder(
+            window_size=self.window_size,
+            min_match=self.min_match,
+            max_chain=self.max_chain,
+            base=max(0, len(history) - self.window_size)
+        )
+        for position in range(finder.base, len(history) - self.min_match + 1):
+            finder.insert(history, position)
+        return finder
     
-    def encode(self, data: bytes) -> List[Tuple[int, ...]]:
+    def encode(
+        self, 
+        data: bytes, 
+        start: int = 0, 
+        primed: Optional[HashChainMatchFinder] = None
+    ) -> List[Tuple[int, ...]]:
         """
         Encode data using fractal dictionary with RLE.
         
+        Bytes before `start` are history: they prime the window and can be
+        referenced by matches but are not encoded themselves. `primed` is
+        an optional result of prime(data[:start]); it is forked, not modified.
+        
         Opcodes:
             (0, byte) - Literal byte
             (1, offset, length) - Dictionary match
             (2, byte, count) - Run-length encoding
         """
         opcodes = []
-        i = 0
+        i = start
         n = len(data)
         
+        if primed is not None:
+            finder = primed.fork()
+        else:
+            finder = HashChainMatchFinder(
+                window_size=self.window_size,
+                min_match=self.min_match,
+                max_chain=self.max_chain,
+                base=max(0, start - self.window_size)
+            )
+        inserted = finder.next_position
+        last_prefix = n - self.min_match
+        
+        # Long-range matches are found up front; short ops fill the gaps
+        long_matches = []
+        if self.long_window:
+            long_matches = LongRangeMatchFinder(self.long_window).find_all(data, start)
+        long_matches = iter(long_matches)
+        next_long = next(long_matches, None)
+        segment_end = next_long[0] if next_long else n
+        
         while i < n:
+            if i == segment_end:
+                _, offset, length = next_long
+                opcodes.append((1, offset, length))
+                i += length
+                next_long = next(long_matches, None)
+                segment_end = next_long[0] if next_long else n
+                continue
+            
+            # Link every position before i into the hash chains
+            while inserted < i and inserted <= last_prefix:
+                finder.insert(data, inserted)
+                inserted += 1
+            
             # RLE detection (3+ repeating bytes)
-            if i + 2 < n and data[i] == data[i+1] == data[i+2]:
+            if i + 2 < segment_end and data[i] == data[i+1] == data[i+2]:
                 byte = data[i]
                 count = 1
-                while i + count < n and data[i + count] == byte and count < 255:
+                while i + count < segment_end and data[i + count] == byte and count < 255:
                     count += 1
                 opcodes.append((2, byte, count))
                 i += count
@@ -456,34 +1244,22 @@ class FractalDictionary:
             
             # Dictionary matching
             best_match = None
-            best_score = 0
-            window_start = max(0, i - self.window_size)
-            
-            for j in range(window_start, i):
-                length = 0
-                while (i + length < n and j + length < i and 
-                       data[i + length] == data[j + length] and length < 255):
-                    length += 1
-                
-                if length >= self.min_match:
-                    offset = i - j
-                    score = length * 100
-                    
-                    # PHI tie-breaking: prefer offsets near golden ratio point
-                    if best_match and length == best_match.length:
-                        target_offset = int((i - window_start) / PHI)
-                        old_dist = abs(best_match.offset - target_offset)
-                        new_dist = abs(offset - target_offset)
-                        if new_dist < old_dist:
-                            score += 10
-                    
-                    if score > best_score:
-                        best_match = Match(offset, length)
-                        best_score = score
+            if i <= last_prefix:
+                best_match = finder.find(data, i, segment_end)
             
             # Use match or emit literal
             if best_match and best_match.length >= self.min_match:
                 opcodes.append((1, best_match.offset, best_match.length))
+                
+                # Fast levels: link only the head of long matches
+                if self.insert_limit is not None and best_match.length > self.insert_limit:
+                    stop = min(i + self.insert_limit, last_prefix + 1)
+                    while inserted < stop:
+                        finder.insert(data, inserted)
+                        inserted += 1
+                    finder.skip(i + best_match.length - inserted)
+                    inserted = i + best_match.length
+                
                 i += best_match.length
             else:
                 opcodes.append((0, data[i]))
@@ -491,35 +1267,123 @@ class FractalDictionary:
         
         return opcodes
     
-    def decode(self, opcodes: List[Tuple[int, ...]]) -> bytes:
-        """Decode opcodes back to original data."""
-        output = bytearray()
+    def decode(self, opcodes: List[Tuple[int, ...]], history: bytes = b'') -> bytes:
+        """Decode opcodes back to original data (matches may reach into history)."""
+        output = bytearray(history)
         
         for opcode in opcodes:
             if opcode[0] == 0:  # Literal
                 output.append(opcode[1])
             elif opcode[0] == 1:  # Match
-                offset, length = opcode[1], opcode[2]
-                start = len(output) - offset
-                for _ in range(length):
-                    output.append(output[start])
-                    start += 1
+                _copy_match(output, opcode[1], opcode[2])
             elif opcode[0] == 2:  # RLE
-                byte, count = opcode[1], opcode[2]
-                output.extend([byte] * count)
+                output += _SINGLE_BYTES[opcode[1]] * opcode[2]
         
-        return bytes(output)
+        return bytes(output[len(history):])
+    
+    def decode_streams(
+        self, 
+        kinds: np.ndarray, 
+        literal_lengths: np.ndarray, 
+        literals: bytes, 
+        match_offsets: np.ndarray, 
+        match_lengths: np.ndarray, 
+        run_bytes: np.ndarray, 
+        run_counts: np.ndarray,
+        long_offsets: np.ndarray,
+        long_lengths: np.ndarray,
+        history: bytes = b''
+    ) -> bytes:
+        """
+        Decode split-stream opcodes back to original data.
+        
+        Literal runs and RLE runs are scattered into the output in one
+        vectorized pass; matches are then filled in rounds of one gather
+        each (_fill_matches). Matches may reach back into `history`, which
+        is not returned.
+        """
+        # Output span of every op, in op order (after the history prefix)
+        op_lengths = np.zeros(len(kinds), dtype=np.int64)
+        op_lengths[kinds == 0] = literal_lengths
+        op_lengths[kinds == 1] = match_lengths
+        op_lengths[kinds == 2] = run_counts
+        op_lengths[kinds == 3] = long_lengths
+        op_ends = np.cumsum(op_lengths) + len(history)
+        op_starts = op_ends - op_lengths
+        total = int(op_ends[-1]) if len(op_ends) else len(history)
+        
+        output = np.zeros(total, dtype=np.uint8)
+        output[:len(history)] = np.frombuffer(history, dtype=np.uint8)
+        
+        # Literal runs and RLE runs have no dependencies: scatter them at once
+        literal_bytes = np.frombuffer(literals, dtype=np.uint8)
+        output[_expand_spans(op_starts[kinds == 0], literal_lengths)] = literal_bytes
+        output[_expand_spans(op_starts[kinds == 2], run_counts)] = \
+            np.repeat(run_bytes, run_counts.astype(np.int64))
+        
+        # Matches (short and long) read earlier output: filled in rounds
+        is_match = (kinds == 1) | (kinds == 3)
+        op_offsets = np.zeros(len(kinds), dtype=np.int64)
+        op_offsets[kinds == 1] = match_offsets
+        op_offsets[kinds == 3] = long_offsets
+        
+        _fill_matches(output, op_starts[is_match], op_offsets[is_match], op_lengths[is_match])
+        
+        return output[len(history):].tobytes()
 
 
 class SymbolicCodec:
-    """Text/symbolic compression codec using fractal dictionary."""
+    """
+    Text/symbolic compression codec using fractal dictionary.
     
-    def __init__(self):
-        self.dictionary = FractalDictionary()
+    With split_streams=True opcodes are serialized as separate typed
+    streams (kinds, literal runs, literals, match offsets/lengths, RLE
+    bytes/counts) that decode with np.frombuffer; otherwise the legacy
+    interleaved byte layout is used. A non-zero long_window enables
+    long-range matching; matches beyond the uint16/uint8 stream limits
+    go to separate varint streams. level (see SYMBOLIC_LEVELS) trades
+    ratio for speed on the encode side; decoding is level-independent.
+    entropy selects the fse_compress backend of the serialized streams.
+    """
+    
+    def __init__(self, split_streams: bool = True, long_window: int = 0, 
+                 level: int = DEFAULT_LEVEL, entropy: str = 'zlib'):
+        params = SYMBOLIC_LEVELS[level]
+        self.dictionary = FractalDictionary(
+            window_size=params['window_size'],
+            max_chain=params['max_chain'],
+            long_window=long_window,
+            min_match=params['min_match'],
+            insert_limit=params['insert_limit']
+        )
+        self.split_streams = split_streams
+        self.long_window = long_window
+        self.level = level
+        self.entropy_level = params['entropy_level']
+        self.entropy = entropy
     
-    def compress(self, data: bytes) -> bytes:
-        """Compress symbolic/text data."""
-        opcodes = self.dictionary.encode(data)
+    def compress(
+        self, 
+        data: bytes, 
+        history: bytes = b'', 
+        primed: Optional[HashChainMatchFinder] = None
+    ) -> bytes:
+        """
+        Compress symbolic/text data.
+        
+        Args:
+            data: Bytes to compress
+            history: Preceding bytes that prime the window (not stored);
+                     the same history must be passed to decompress
+            primed: Optional self.dictionary.prime(history) result to reuse
+        """
+        opcodes = self.dictionary.encode(history + data, start=len(history), primed=primed)
+        
+        if self.split_streams:
+            serialized, op_count = self._pack_streams(opcodes)
+            compressed = fse_compress(serialized, self.entropy_level, self.entropy)
+            header = struct.pack('<II', len(data), op_count)
+            return header + compressed
         
         # Serialize opcodes
         serialized = bytearray()
@@ -536,17 +1400,22 @@ class SymbolicCodec:
                 serialized.append(op[2])
         
         # Apply entropy coding
-        compressed = fse_compress(bytes(serialized))
+        compressed = fse_compress(bytes(serialized), self.entropy_level, self.entropy)
         
         # Add header
         header = struct.pack('<II', len(data), len(opcodes))
         return header + compressed
     
-    def decompress(self, data: bytes) -> bytes:
-        """Decompress symbolic data."""
+    def decompress(self, data: bytes, history: bytes = b'') -> bytes:
+        """Decompress symbolic data (history must match the compress call)."""
         original_size, opcode_count = struct.unpack('<II', data[:8])
         serialized = fse_decompress(data[8:])
         
+        if self.split_streams:
+            streams = self._unpack_streams(serialized, opcode_count)
+            result = self.dictionary.decode_streams(*streams, history=history)
+            return result[:original_size]
+        
         # Deserialize opcodes
         opcodes = []
         i = 0
@@ -571,270 +1440,3163 @@ class SymbolicCodec:
                     i += 2
         
         # Decode opcodes
-        result = self.dictionary.decode(opcodes)
+        result = self.dictionary.decode(opcodes, history)
         return result[:original_size]
+    
+    @staticmethod
+    def _pack_streams(opcodes: List[Tuple[int, ...]]) -> Tuple[bytes, int]:
+        """
+        Serialize opcodes as split typed streams.
+        
+        Layout (all little-endian, concatenated):
+            kinds           uint8[n_ops]     0=literal run, 1=match, 2=RLE,
+                                             3=long match
+            literal_lengths uint16[n_lit]    bytes per literal run
+            literals        uint8[sum]       literal bytes
+            match_offsets   uint16[n_match]
+            match_lengths   uint8[n_match]
+            run_bytes       uint8[n_run]
+            run_counts      uint8[n_run]
+            long_offsets    varint[n_long]   matches with offset > 65535
+            long_lengths    varint[n_long]   or length > 255
+        """
+        kinds = bytearray()
+        literal_lengths = []
+        literals = bytearray()
+        match_offsets = []
+        match_lengths = bytearray()
+        run_bytes = bytearray()
+        run_counts = bytearray()
+        long_offsets = []
+        long_lengths = []
+        
+        for op in opcodes:
+            if op[0] == 0:  # Literal, merged into the current run
+                if kinds and kinds[-1] == 0 and literal_lengths[-1] < 0xFFFF:
+                    literal_lengths[-1] += 1
+                else:
+                    kinds.append(0)
+                    literal_lengths.append(1)
+                literals.append(op[1])
+            elif op[0] == 1 and (op[1] > 0xFFFF or op[2] > 0xFF):  # Long match
+                kinds.append(3)
+                long_offsets.append(op[1])
+                long_lengths.append(op[2])
+            elif op[0] == 1:  # Match
+                kinds.append(1)
+                match_offsets.append(op[1])
+                match_lengths.append(op[2])
+            elif op[0] == 2:  # RLE
+                kinds.append(2)
+                run_bytes.append(op[1])
+                run_counts.append(op[2])
+        
+        serialized = b''.join([
+            bytes(kinds),
+            np.array(literal_lengths, dtype='<u2').tobytes(),
+            bytes(literals),
+            np.array(match_offsets, dtype='<u2').tobytes(),
+            bytes(match_lengths),
+            bytes(run_bytes),
+            bytes(run_counts),
+            _varint_encode(long_offsets),
+            _varint_encode(long_lengths),
+        ])
+        return serialized, len(kinds)
+    
+    @staticmethod
+    def _unpack_streams(serialized: bytes, op_count: int) -> Tuple[Any, ...]:
+        """Split serialized streams back into typed arrays (see _pack_streams)."""
+        kinds = np.frombuffer(serialized, dtype=np.uint8, count=op_count)
+        offset = op_count
+        
+        counts = np.bincount(kinds, minlength=4)
+        n_literal, n_match, n_run, n_long = (int(c) for c in counts[:4])
+        
+        literal_lengths = np.frombuffer(serialized, dtype='<u2', count=n_literal, offset=offset)
+        offset += 2 * n_literal
+        
+        literal_total = int(literal_lengths.sum(dtype=np.int64))
+        literals = serialized[offset:offset + literal_total]
+        offset += literal_total
+        
+        match_offsets = np.frombuffer(serialized, dtype='<u2', count=n_match, offset=offset)
+        offset += 2 * n_match
+        match_lengths = np.frombuffer(serialized, dtype=np.uint8, count=n_match, offset=offset)
+        offset += n_match
+        
+        run_bytes = np.frombuffer(serialized, dtype=np.uint8, count=n_run, offset=offset)
+        offset += n_run
+        run_counts = np.frombuffer(serialized, dtype=np.uint8, count=n_run, offset=offset)
+        offset += n_run
+        
+        long_offsets, offset = _varint_decode(serialized, n_long, offset)
+        long_lengths, offset = _varint_decode(serialized, n_long, offset)
+        
+        return (
+            kinds, literal_lengths, literals, match_offsets, match_lengths, 
+            run_bytes, run_counts, long_offsets, long_lengths
+        )
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# PHASE-2: BLOCK PRODUCT QUANTIZATION (10-20× on Embeddings)
+# STREAMING TEXT COMPRESSION (compressobj-style, persistent window)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-class BlockProductQuantizer:
+STREAM_BLOCK_SIZE = 262144  # Bytes buffered per stream frame
+
+
+class PhiCompressor:
     """
-    Block Product Quantization with PHI-guided initialization.
+    Incremental text compressor modeled on zlib.compressobj.
     
-    Splits vectors into blocks, learns codebooks per block using k-means
-    with golden ratio guided initialization, enabling 10-20× compression
-    on embeddings while maintaining 0.98+ cosine similarity.
+    Input is buffered into frames of `block_size` bytes. Each frame is a
+    split-stream SymbolicCodec payload whose matches may reach into the
+    previous `window_size` bytes, so the dictionary window carries across
+    chunks while memory stays bounded by block_size + window_size.
+    
+    Stream layout:
+        header  '<HHBBBB' MAGIC, FORMAT_VERSION, MODE_SYMBOLIC_STREAM, flags, 0, 0
+        frames  length-prefixed SymbolicCodec payloads
+        end     zero-length frame followed by '<I' CRC32 of all input
+    
+    Example:
+        >>> compressor = PhiCompressor()
+        >>> parts = [compressor.compress(chunk) for chunk in chunks]
+        >>> parts.append(compressor.flush())
     """
     
-    def __init__(self, n_blocks: int = 8, n_centroids: int = 256, max_iter: int = 20):
-        """
-        Initialize Block PQ.
-        
-        Args:
-            n_blocks: Number of blocks to split vectors into
-            n_centroids: Number of centroids per codebook (typically 256 for uint8)
-            max_iter: Maximum k-means iterations
-        """
-        self.n_blocks = n_blocks
-        self.n_centroids = n_centroids
-        self.max_iter = max_iter
-        self.codebooks = []
-        self.block_size = None
+    def __init__(self, block_size: int = STREAM_BLOCK_SIZE):
+        self.codec = SymbolicCodec(split_streams=True)
+        self.block_size = block_size
+        self.window_size = self.codec.dictionary.window_size
+        self._pending = bytearray()
+        self._history = b''
+        self._crc = 0
+        self._started = False
+        self._finished = False
     
-    def _phi_init_centroids(self, data: np.ndarray, k: int) -> np.ndarray:
-        """PHI-guided k-means++ initialization."""
+    def _header(self) -> bytes:
+        """Emit the stream header once, before the first frame."""
+        if self._started:
+            return b''
+        self._started = True
+        flags = FLAG_ENTROPY_FSE | FLAG_SPLIT_STREAMS
+        return struct.pack('<HHBBBB', MAGIC, FORMAT_VERSION, MODE_SYMBOLIC_STREAM, flags, 0, 0)
+    
+    def _frame(self, block: bytes) -> bytes:
+        """Compress one block against the carried window."""
+        payload = self.codec.compress(block, history=self._history)
+        self._history = (self._history + block)[-self.window_size:]
+        return write_blob(payload)
+    
+    def compress(self, data: Union[bytes, str]) -> bytes:
+        """Feed a chunk; returns any complete frames (possibly b'')."""
+        if self._finished:
+            raise ValueError("Compressor already flushed")
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        
+        self._crc = binascii.crc32(data, self._crc)
+        self._pending.extend(data)
+        
+        output = bytearray(self._header())
+        while len(self._pending) >= self.block_size:
+            block = bytes(self._pending[:self.block_size])
+            del self._pending[:self.block_size]
+            output.extend(self._frame(block))
+        
+        return bytes(output)
+    
+    def flush(self) -> bytes:
+        """Compress any buffered input and terminate the stream."""
+        if self._finished:
+            raise ValueError("Compressor already flushed")
+        
+        output = bytearray(self._header())
+        if self._pending:
+            output.extend(self._frame(bytes(self._pending)))
+            self._pending = bytearray()
+        
+        output.extend(write_blob(b''))
+        output.extend(struct.pack('<I', self._crc & 0xFFFFFFFF))
+        self._finished = True
+        
+        return bytes(output)
+
+
+class PhiDecompressor:
+    """
+    Incremental text decompressor modeled on zlib.decompressobj.
+    
+    Accepts arbitrary slices of a PhiCompressor stream and returns the
+    bytes of every frame that has fully arrived. After the end marker,
+    `eof` is True and any trailing input is kept in `unused_data`.
+    """
+    
+    def __init__(self):
+        self.codec = SymbolicCodec(split_streams=True)
+        self.window_size = self.codec.dictionary.window_size
+        self.eof = False
+        self.unused_data = b''
+        self._buffer = bytearray()
+        self._history = b''
+        self._crc = 0
+        self._header_read = False
+    
+    def decompress(self, data: bytes) -> bytes:
+        """Feed compressed bytes; returns newly decoded data (possibly b'')."""
+        if self.eof:
+            self.unused_data += data
+            return b''
+        
+        self._buffer.extend(data)
+        output = bytearray()
+        
+        if not self._header_read:
+            if len(self._buffer) < 8:
+                return b''
+            magic, _, mode, _, _, _ = struct.unpack('<HHBBBB', self._buffer[:8])
+            if magic != MAGIC:
+                raise ValueError(f"Invalid magic: {hex(magic)}")
+            if mode != MODE_SYMBOLIC_STREAM:
+                raise ValueError(f"Not a PHI text stream (mode {mode})")
+            del self._buffer[:8]
+            self._header_read = True
+        
+        while len(self._buffer) >= 4:
+            frame_len, = struct.unpack('<I', self._buffer[:4])
+            
+            if frame_len == 0:  # End marker + CRC32
+                if len(self._buffer) < 8:
+                    break
+                expected_crc, = struct.unpack('<I', self._buffer[4:8])
+                if (self._crc & 0xFFFFFFFF) != expected_crc:
+                    raise ValueError("CRC32 mismatch in PHI text stream")
+                self.unused_data = bytes(self._buffer[8:])
+                self._buffer = bytearray()
+                self.eof = True
+                break
+            
+            if len(self._buffer) < 4 + frame_len:
+                break
+            
+            frame = bytes(self._buffer[4:4 + frame_len])
+            del self._buffer[:4 + frame_len]
+            
+            block = self.codec.decompress(frame, history=self._history)
+            self._history = (self._history + block)[-self.window_size:]
+            self._crc = binascii.crc32(block, self._crc)
+            output.extend(block)
+        
+        return bytes(output)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PARALLEL BLOCK TEXT COMPRESSION (Independent blocks + offset table)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+PARALLEL_MIN_ITEMS = 3  # With workers unset, fewer items than this run serially
+
+
+def _parallel_map(func, items: List[Any], workers: Optional[int] = None) -> List[Any]:
+    """
+    Map func over items in a process pool owned by this call.
+    
+    Runs serially for one worker or item, and, with workers unset, for
+    fewer than PARALLEL_MIN_ITEMS items (one or two blocks never pay the
+    process start-up). The pool is shut down before returning, so no
+    worker processes outlive the call.
+    """
+    if workers is None:
+        workers = 1 if len(items) < PARALLEL_MIN_ITEMS else os.cpu_count() or 1
+    workers = min(workers, len(items))
+    
+    if workers <= 1:
+        return [func(item) for item in items]
+    
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
+
+
+def _compress_text_block(block: bytes, level: int = DEFAULT_LEVEL, entropy: str = 'zlib') -> bytes:
+    """Compress one independent text block (process pool worker)."""
+    return SymbolicCodec(split_streams=True, level=level, entropy=entropy).compress(block)
+
+
+def _decompress_text_block(payload: bytes) -> bytes:
+    """Decompress one independent text block (process pool worker)."""
+    return SymbolicCodec(split_streams=True).decompress(payload)
+
+
+def _encode_text_blocks(
+    data: bytes, 
+    block_size: int, 
+    workers: Optional[int] = None, 
+    level: int = DEFAULT_LEVEL,
+    entropy: str = 'zlib'
+) -> bytes:
+    """
+    Compress text as independent blocks with a block offset table.
+    
+    Layout:
+        '<II'  block_size, n_blocks
+        '<Q'   n_blocks + 1 offsets into the block area
+        blocks split-stream SymbolicCodec payloads
+    """
+    blocks = [data[i:i + block_size] for i in range(0, len(data), block_size)]
+    worker = partial(_compress_text_block, level=level, entropy=entropy)
+    payloads = _parallel_map(worker, blocks, workers)
+    
+    offsets = np.zeros(len(payloads) + 1, dtype='<u8')
+    offsets[1:] = np.cumsum([len(p) for p in payloads])
+    
+    header = struct.pack('<II', block_size, len(payloads))
+    return header + offsets.tobytes() + b''.join(payloads)
+
+
+def _decode_text_blocks(
+    payload: bytes, 
+    start: int = 0, 
+    stop: Optional[int] = None, 
+    workers: Optional[int] = None
+) -> bytes:
+    """Decode the blocks covering bytes [start, stop) of a block payload."""
+    block_size, n_blocks = struct.unpack('<II', payload[:8])
+    offsets = np.frombuffer(payload, dtype='<u8', count=n_blocks + 1, offset=8)
+    base = 8 + 8 * (n_blocks + 1)
+    
+    first = min(start // block_size, n_blocks)
+    last = n_blocks if stop is None else min(-(-stop // block_size), n_blocks)
+    
+    blocks = [
+        payload[base + int(offsets[b]):base + int(offsets[b + 1])]
+        for b in range(first, last)
+    ]
+    result = b''.join(_parallel_map(_decompress_text_block, blocks, workers))
+    
+    skip = start - first * block_size
+    end = None if stop is None else stop - first * block_size
+    return result[skip:end]
+
+
+def decompress_range(
+    data: bytes, 
+    start: int, 
+    stop: int, 
+    workers: Optional[int] = None
+) -> bytes:
+    """
+    Decompress only bytes [start, stop) of a text archive.
+    
+    For block-mode archives (e.g. preset "phi-global-parallel") only the
+    blocks covering the range are decoded; other archives are fully
+    decompressed and sliced.
+    
+    Example:
+        >>> compressed = compress(log_bytes, preset="phi-global-parallel")
+        >>> middle = decompress_range(compressed, 10_000_000, 10_001_000)
+    """
+    magic, _, mode, flags, ndim, _ = struct.unpack('<HHBBBB', data[:8])
+    if magic != MAGIC:
+        raise ValueError(f"Invalid magic: {hex(magic)}")
+    
+    if mode != MODE_SYMBOLIC_BLOCKS:
+        return decompress(data)[start:stop]
+    
+    offset = 8 + 4 * ndim
+    compressed_size, = struct.unpack('<I', data[offset:offset+4])
+    payload = data[offset + 4:offset + 4 + compressed_size]
+    return _decode_text_blocks(payload, start, stop, workers)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRAINED DICTIONARIES (Shared primed window for small records)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class PhiDictionary:
+    """
+    Trained shared dictionary for compressing many small text records.
+    
+    The content primes the FractalDictionary window of every record, so
+    recurring fragments become matches from the first byte. Payloads carry
+    only the 4-byte dict_id (CRC32 of the content); the dictionary itself is
+    serialized once with to_bytes() and passed to compress/decompress.
+    
+    Example:
+        >>> dictionary = train_dictionary(sample_records)
+        >>> blob = compress(record, preset="phi-global", dictionary=dictionary)
+        >>> decompress(blob, dictionary=dictionary) == record
+    """
+    
+    def __init__(self, content: bytes):
+        self.content = bytes(content)
+        self.dict_id = compute_crc32(self.content)
+        self._codec = SymbolicCodec(split_streams=True)
+        self._primed = {}  # (level, entropy) -> (codec, primed match finder)
+    
+    def compress_record(
+        self, 
+        data: bytes, 
+        level: int = DEFAULT_LEVEL, 
+        entropy: str = 'zlib'
+    ) -> bytes:
+        """Compress one record against the dictionary window at the given level/entropy."""
+        key = (level, entropy)
+        if key not in self._primed:
+            codec = SymbolicCodec(split_streams=True, level=level, entropy=entropy)
+            self._primed[key] = (codec, codec.dictionary.prime(self.content))
+        codec, primed = self._primed[key]
+        return codec.compress(data, history=self.content, primed=primed)
+    
+    def decompress_record(self, payload: bytes) -> bytes:
+        """Decompress one record produced by compress_record."""
+        return self._codec.decompress(payload, history=self.content)
+    
+    def to_bytes(self) -> bytes:
+        """Serialize as '<HHI' MAGIC, FORMAT_VERSION, dict_id + content blob."""
+        return struct.pack('<HHI', MAGIC, FORMAT_VERSION, self.dict_id) + write_blob(self.content)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PhiDictionary':
+        """Load a dictionary serialized with to_bytes()."""
+        magic, _, dict_id = struct.unpack('<HHI', data[:8])
+        if magic != MAGIC:
+            raise ValueError(f"Invalid magic: {hex(magic)}")
+        content, _ = read_blob(data, 8)
+        if not verify_crc32(content, dict_id):
+            raise ValueError("Dictionary content does not match its dict_id")
+        return cls(content)
+
+
+def train_dictionary(
+    samples: List[Union[bytes, str]], 
+    size: int = 16384, 
+    segment_size: int = 64, 
+    dmer_size: int = 8
+) -> PhiDictionary:
+    """
+    Train a shared dictionary from sample records (COVER-style).
+    
+    Every dmer_size-byte substring is scored by the number of samples that
+    contain it. The corpus is split into size // segment_size epochs; from
+    each epoch the segment with the highest total score of not-yet-covered
+    d-mers is selected. Segments are ordered so the most valuable sit at
+    the end of the window, closest to the record being compressed.
+    
+    Args:
+        samples: Representative records (bytes or str)
+        size: Dictionary size in bytes (at most the 32 KB window)
+        segment_size: Length of each selected segment
+        dmer_size: Substring length used for scoring (at most 8)
+        
+    Returns:
+        PhiDictionary ready for compress(..., dictionary=...)
+    """
+    samples = [s.encode('utf-8') if isinstance(s, str) else bytes(s) for s in samples]
+    size = min(size, FractalDictionary().window_size)
+    dmer_size = min(dmer_size, 8)
+    
+    corpus = b''.join(samples)
+    if len(corpus) <= size:
+        return PhiDictionary(corpus[-size:] if corpus else b'')
+    
+    # Exact d-mer keys packed into uint64, valid only inside a single sample
+    raw = np.frombuffer(corpus, dtype=np.uint8)
+    n_dmers = len(raw) - dmer_size + 1
+    keys = np.zeros(n_dmers, dtype=np.uint64)
+    for k in range(dmer_size):
+        keys |= raw[k:k + n_dmers].astype(np.uint64) << np.uint64(8 * k)
+    
+    lengths = np.array([len(s) for s in samples], dtype=np.int64)
+    sample_ids = np.repeat(np.arange(len(samples)), lengths)[:n_dmers]
+    sample_ends = np.cumsum(lengths)[sample_ids]
+    valid = np.arange(n_dmers) + dmer_size <= sample_ends
+    
+    # Document frequency: count each d-mer once per sample
+    dmer_ids = np.unique(keys, return_inverse=True)[1].reshape(-1)
+    pairs = np.unique(dmer_ids[valid].astype(np.int64) * len(samples) + sample_ids[valid])
+    frequency = np.bincount(pairs // len(samples), minlength=int(dmer_ids.max()) + 1)
+    frequency = frequency.astype(np.float64)
+    frequency[frequency < min(2, len(samples))] = 0  # Single-sample fragments do not generalize
+    
+    n_epochs = max(1, size // segment_size)
+    epoch_size = n_dmers // n_epochs
+    window = max(1, segment_size - dmer_size + 1)
+    selected = []
+    
+    for e in range(n_epochs):
+        lo = e * epoch_size
+        hi = min(lo + epoch_size, n_dmers)
+        if hi - lo < window:
+            continue
+        
+        scores = np.where(valid[lo:hi], frequency[dmer_ids[lo:hi]], 0.0)
+        sums = np.convolve(scores, np.ones(window), mode='valid')
+        best = int(np.argmax(sums))
+        if sums[best] <= 0:
+            continue
+        
+        start = lo + best
+        selected.append((float(sums[best]), corpus[start:start + segment_size]))
+        frequency[dmer_ids[start:start + window]] = 0  # Covered d-mers score once
+    
+    # Most valuable segments last (smallest offsets)
+    selected.sort(key=lambda item: item[0])
+    content = b''.join(segment for _, segment in selected)
+    return PhiDictionary(content[-size:])
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CORPUS DEDUPLICATION (Content-defined chunking + chunk store)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _cdc_boundaries(
+    data: bytes, 
+    avg_size: int = 16384, 
+    min_size: int = 4096, 
+    max_size: int = 65536
+) -> List[int]:
+    """
+    Content-defined chunk boundaries using a vectorized 32-byte Gear hash.
+    
+    A chunk ends after byte i when the top log2(avg_size) bits of the rolling
+    hash are zero, subject to min_size/max_size. Because the hash depends
+    only on the last 32 bytes, boundaries resynchronize after an edit and
+    identical content yields identical chunks across documents.
+    
+    Returns:
+        Chunk end offsets (the last one is len(data))
+    """
+    n = len(data)
+    if n <= min_size:
+        return [n] if n else []
+    
+    h = _gear_hash(data)
+    bits = max(1, int(round(np.log2(avg_size))))
+    mask = np.uint32(((1 << bits) - 1) << (32 - bits))
+    candidates = np.flatnonzero((h & mask) == 0) + 1
+    
+    boundaries = []
+    last = 0
+    while n - last > min_size:
+        idx = int(np.searchsorted(candidates, last + min_size))
+        cut = int(candidates[idx]) if idx < len(candidates) else n
+        cut = min(cut, last + max_size)
+        boundaries.append(cut)
+        last = cut
+    if last < n:
+        boundaries.append(n)
+    
+    return boundaries
+
+
+class PhiChunkStore:
+    """
+    Deduplicating chunk store for corpora of near-identical documents.
+    
+    Documents are split with content-defined chunking; each chunk is keyed
+    by its BLAKE2b-128 digest and compressed with SymbolicCodec only the
+    first time it is seen. put() returns a small PHI manifest listing the
+    chunk digests, and get() rebuilds the document from the store.
+    
+    Example:
+        >>> store = PhiChunkStore()
+        >>> manifests = [store.put(doc) for doc in documents]
+        >>> store.get(manifests[0]) == documents[0]
+        >>> blob = store.to_bytes()  # persist; PhiChunkStore.from_bytes(blob)
+    """
+    
+    DIGEST_SIZE = 16
+    
+    def __init__(self, avg_size: int = 16384, min_size: int = 4096, max_size: int = 65536):
+        self.avg_size = avg_size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.chunks = {}
+        self.total_bytes = 0    # Bytes passed to put()
+        self.unique_bytes = 0   # Bytes actually compressed
+        self._codec = SymbolicCodec(split_streams=True)
+    
+    def put(self, data: Union[bytes, str]) -> bytes:
+        """Store a document; returns its manifest (a PHI container)."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        
+        digests = []
+        start = 0
+        for end in _cdc_boundaries(data, self.avg_size, self.min_size, self.max_size):
+            chunk = data[start:end]
+            digest = hashlib.blake2b(chunk, digest_size=self.DIGEST_SIZE).digest()
+            if digest not in self.chunks:
+                self.chunks[digest] = self._codec.compress(chunk)
+                self.unique_bytes += len(chunk)
+            digests.append(digest)
+            start = end
+        self.total_bytes += len(data)
+        
+        payload = struct.pack('<I', len(digests)) + b''.join(digests)
+        compressed_payload = fse_compress(payload)
+        header = struct.pack(
+            '<HHBBBB', MAGIC, FORMAT_VERSION, MODE_DEDUP_MANIFEST, FLAG_ENTROPY_FSE, 1, 0
+        )
+        return header + struct.pack('<II', len(data), len(compressed_payload)) + compressed_payload
+    
+    def get(self, manifest: bytes) -> bytes:
+        """Rebuild a document from its manifest."""
+        magic, _, mode, _, _, _ = struct.unpack('<HHBBBB', manifest[:8])
+        if magic != MAGIC:
+            raise ValueError(f"Invalid magic: {hex(magic)}")
+        if mode != MODE_DEDUP_MANIFEST:
+            raise ValueError(f"Not a PHI chunk manifest (mode {mode})")
+        
+        size, compressed_size = struct.unpack('<II', manifest[8:16])
+        payload = fse_decompress(manifest[16:16 + compressed_size])
+        count, = struct.unpack('<I', payload[:4])
+        
+        parts = []
+        for c in range(count):
+            digest = payload[4 + c * self.DIGEST_SIZE:4 + (c + 1) * self.DIGEST_SIZE]
+            if digest not in self.chunks:
+                raise ValueError(f"Chunk {digest.hex()} missing from store")
+            parts.append(self._codec.decompress(self.chunks[digest]))
+        
+        result = b''.join(parts)
+        if len(result) != size:
+            raise ValueError(f"Rebuilt {len(result)} bytes, manifest expects {size}")
+        return result
+    
+    def to_bytes(self) -> bytes:
+        """Serialize the store (chunking parameters + digest/blob pairs)."""
+        output = bytearray(struct.pack(
+            '<HHIIII', MAGIC, FORMAT_VERSION, 
+            self.avg_size, self.min_size, self.max_size, len(self.chunks)
+        ))
+        for digest, blob in self.chunks.items():
+            output.extend(digest)
+            output.extend(write_blob(blob))
+        return bytes(output)
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PhiChunkStore':
+        """Load a store serialized with to_bytes()."""
+        magic, _, avg_size, min_size, max_size, count = struct.unpack('<HHIIII', data[:20])
+        if magic != MAGIC:
+            raise ValueError(f"Invalid magic: {hex(magic)}")
+        
+        store = cls(avg_size, min_size, max_size)
+        offset = 20
+        for _ in range(count):
+            digest = data[offset:offset + cls.DIGEST_SIZE]
+            blob, offset = read_blob(data, offset + cls.DIGEST_SIZE)
+            store.chunks[digest] = blob
+        return store
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TOKEN STREAM COMPRESSION (Lossless integer token IDs)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _zigzag_encode(values: np.ndarray) -> np.ndarray:
+    """Map signed int64 to unsigned (0, -1, 1, -2, ... -> 0, 1, 2, 3, ...)."""
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def _zigzag_decode(values: np.ndarray) -> np.ndarray:
+    """Inverse of _zigzag_encode."""
+    values = values.astype(np.uint64)
+    return (values >> np.uint64(1)).astype(np.int64) ^ -(values & np.uint64(1)).astype(np.int64)
+
+
+def _varint_size(values: np.ndarray) -> int:
+    """Total LEB128 bytes needed for values, without encoding them."""
+    values = np.asarray(values, dtype=np.uint64)
+    bits = np.zeros(len(values), dtype=np.int64)
+    rest = values.copy()
+    while rest.any():
+        bits += rest > 0
+        rest >>= np.uint64(7)
+    return int(np.maximum(bits, 1).sum())
+
+
+TOKEN_MAX_VOCAB = 1 << 20  # 2-D integer arrays with larger IDs are not token batches
+TOKEN_MIN_SEQ_LEN = 16  # Nor are those with shorter rows (integer tables, channels)
+
+
+def _looks_like_tokens(data: np.ndarray) -> bool:
+    """1-D integer arrays, or 2-D (sequences, length) batches of plausible token IDs."""
+    if not np.issubdtype(data.dtype, np.integer):
+        return False
+    if data.ndim == 1:
+        return True
+    if data.ndim != 2 or data.shape[1] < TOKEN_MIN_SEQ_LEN:
+        return False
+    return data.size == 0 or (int(data.min()) >= 0 and int(data.max()) < TOKEN_MAX_VOCAB)
+
+
+class TokenCodec:
+    """
+    Lossless codec for integer token-ID streams (e.g. tokenized corpora).
+    
+    Repeated token n-grams are found with a vectorized token-level LZ pass:
+    every position is keyed by a hash of its next min_match tokens, sorted
+    to find the previous occurrence, and consecutive positions continuing
+    the same source are merged into one match. Remaining literal tokens
+    are stored as zigzag varints, delta-coded when that is smaller. When
+    that is no smaller than the raw array (e.g. random IDs), the raw
+    little-endian tokens are stored instead.
+    
+    Payload layout:
+        '<QIB'  n_tokens, n_sequences, literal flags (bit 0: delta, bit 1: raw)
+        blob    dtype string (e.g. '<u2')
+        varint  literal_lengths[n_sequences]
+        varint  match_offsets[n_sequences]   (0 when no match)
+        varint  match_lengths[n_sequences]
+        varint  literals (zigzag, optionally delta-coded)
+    
+    Raw payloads (bit 1) carry n_sequences = 0 and the tokens as '<' dtype
+    bytes in place of the varint streams.
+    """
+    
+    def __init__(self, min_match: int = 4, window_size: int = 1 << 22):
+        self.min_match = min_match
+        self.window_size = window_size
+    
+    def _find_matches(self, tokens: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Non-overlapping token matches as (positions, offsets, lengths), in order."""
+        n = len(tokens)
+        m = self.min_match
+        if n < 2 * m:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        
+        # Hash of the m tokens starting at each position
+        count = n - m + 1
+        keys = np.zeros(count, dtype=np.uint64)
+        for t in range(m):
+            keys = keys * np.uint64(0x9E3779B97F4A7C15) + tokens[t:t + count].astype(np.uint64)
+        
+        # Previous position with the same key (stable sort keeps position order)
+        order = np.argsort(keys, kind='stable')
+        same = keys[order[1:]] == keys[order[:-1]]
+        prev = np.full(count, -1, dtype=np.int64)
+        prev[order[1:][same]] = order[:-1][same]
+        
+        positions = np.arange(count)
+        valid = (prev >= 0) & (positions - prev <= self.window_size)
+        for t in range(m):  # Reject hash collisions
+            valid &= tokens[t:t + count] == tokens[np.where(valid, prev, 0) + t]
+        
+        # A match continues while the next position copies the next source token
+        cont = np.zeros(count, dtype=bool)
+        cont[1:] = valid[1:] & valid[:-1] & (prev[1:] == prev[:-1] + 1)
+        starts = np.flatnonzero(valid & ~cont)
+        run_ids = np.cumsum(valid & ~cont) - 1
+        run_lengths = np.bincount(run_ids[valid], minlength=len(starts))
+        ends = starts + run_lengths + m - 1
+        offsets = starts - prev[starts]
+        
+        # Trim each run to start after every earlier run ends; this keeps
+        # the selection non-overlapping without a sequential greedy pass
+        reach = np.zeros(len(ends), dtype=np.int64)
+        reach[1:] = np.maximum.accumulate(ends)[:-1]
+        starts = np.maximum(starts, reach)
+        keep = ends - starts >= m
+        
+        return starts[keep], offsets[keep], (ends - starts)[keep]
+    
+    def compress(self, tokens: np.ndarray) -> bytes:
+        """Compress an integer array (any shape; flattened in C order)."""
+        dtype_str = np.dtype(tokens.dtype).str.encode('ascii')
+        flat = np.ascontiguousarray(tokens).reshape(-1).astype(np.int64)
+        positions, offsets, lengths = self._find_matches(flat)
+        
+        # Sequences: literal run followed by an optional match
+        match_pos = np.append(positions, len(flat))
+        match_offsets = np.append(offsets, 0)
+        match_lengths = np.append(lengths, 0)
+        seq_starts = np.concatenate(([0], match_pos[:-1] + match_lengths[:-1]))
+        literal_lengths = match_pos - seq_starts
+        
+        literals = flat[_expand_spans(seq_starts, literal_lengths)]
+        plain = _zigzag_encode(literals)
+        delta = _zigzag_encode(np.diff(literals, prepend=0))
+        use_delta = _varint_size(delta) < _varint_size(plain)
+        
+        header = struct.pack('<QIB', len(flat), len(match_pos), 1 if use_delta else 0)
+        encoded = b''.join([
+            header,
+            write_blob(dtype_str),
+            _varint_encode(literal_lengths),
+            _varint_encode(match_offsets),
+            _varint_encode(match_lengths),
+            _varint_encode(delta if use_delta else plain),
+        ])
+        
+        # Store fallback: LZ + varints did not beat the raw array
+        raw = np.ascontiguousarray(tokens).reshape(-1)
+        raw = raw.astype(raw.dtype.newbyteorder('<'), copy=False)
+        stored = struct.pack('<QIB', len(flat), 0, 2) + write_blob(dtype_str) + raw.tobytes()
+        return stored if len(stored) <= len(encoded) else encoded
+    
+    def decompress(self, data: bytes) -> np.ndarray:
+        """Decompress to a flat array of the original dtype."""
+        n_tokens, n_seq, literal_flags = struct.unpack('<QIB', data[:13])
+        dtype_str, offset = read_blob(data, 13)
+        dtype = np.dtype(dtype_str.decode('ascii'))
+        if literal_flags & 2:
+            raw = np.frombuffer(data, dtype=dtype.newbyteorder('<'), count=n_tokens, offset=offset)
+            return raw.astype(dtype)
+        
+        literal_lengths, offset = _varint_decode(data, n_seq, offset)
+        match_offsets, offset = _varint_decode(data, n_seq, offset)
+        match_lengths, offset = _varint_decode(data, n_seq, offset)
+        literal_lengths = literal_lengths.astype(np.int64)
+        match_offsets = match_offsets.astype(np.int64)
+        match_lengths = match_lengths.astype(np.int64)
+        
+        n_literals = int(literal_lengths.sum())
+        literals, offset = _varint_decode(data, n_literals, offset)
+        literals = _zigzag_decode(literals)
+        if literal_flags & 1:
+            literals = np.cumsum(literals)
+        
+        seq_ends = np.cumsum(literal_lengths + match_lengths)
+        seq_starts = seq_ends - literal_lengths - match_lengths
+        
+        output = np.zeros(n_tokens, dtype=np.int64)
+        output[_expand_spans(seq_starts, literal_lengths)] = literals
+        
+        # Matches read earlier output: filled in rounds of one gather each
+        match_starts = seq_starts + literal_lengths
+        has_match = match_lengths > 0
+        _fill_matches(output, match_starts[has_match], match_offsets[has_match], 
+                      match_lengths[has_match])
+        
+        return output.astype(dtype)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# JSON-LINES COLUMNAR COMPRESSION (Per-key columns, parallel encode)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+JSONL_MIN_RECORDS = 16  # Smaller inputs go through the plain text path
+JSONL_PARALLEL_MIN_RECORDS = 4096  # With workers unset, fewer records code columns serially
+
+_JSONL_INT, _JSONL_FLOAT, _JSONL_STR, _JSONL_JSON = 0, 1, 2, 3
+_JSONL_STYLES = (
+    ((', ', ': '), True), ((',', ':'), True),
+    ((', ', ': '), False), ((',', ':'), False),
+)
+
+
+def _looks_like_jsonl(data: Any) -> bool:
+    """Cheap check: bytes whose first two lines look like JSON objects."""
+    if not isinstance(data, bytes):
+        return False
+    head = data[:4096].lstrip()
+    first, _, rest = head.partition(b'\n')
+    return first.startswith(b'{') and first.rstrip().endswith(b'}') and rest.startswith(b'{')
+
+
+def _encode_int_column(values: np.ndarray, level: int = DEFAULT_LEVEL, entropy: str = 'zlib') -> bytes:
+    """Lossless delta-of-delta (order 0-2, smallest wins) + zigzag varints."""
+    candidates = [values, np.diff(values, prepend=0)]
+    candidates.append(np.diff(candidates[1], prepend=0))
+    encoded = [_zigzag_encode(c) for c in candidates]
+    order = int(np.argmin([_varint_size(e) for e in encoded]))
+    body = fse_compress(
+        _varint_encode(encoded[order]), SYMBOLIC_LEVELS[level]['entropy_level'], entropy
+    )
+    return struct.pack('<B', order) + body
+
+
+def _decode_int_column(data: bytes, count: int) -> np.ndarray:
+    """Inverse of _encode_int_column."""
+    order, = struct.unpack('<B', data[:1])
+    values, _ = _varint_decode(fse_decompress(data[1:]), count)
+    values = _zigzag_decode(values)
+    for _ in range(order):
+        values = np.cumsum(values)
+    return values
+
+
+def _encode_string_column(values: List[str], level: int = DEFAULT_LEVEL, entropy: str = 'zlib') -> bytes:
+    """Strings via SymbolicCodec, dictionary-encoded when low-cardinality."""
+    uniques = list(dict.fromkeys(values))
+    use_dict = len(uniques) <= max(1, len(values) // 4)
+    
+    parts = []
+    if use_dict:
+        index = {value: i for i, value in enumerate(uniques)}
+        codes = np.array([index[v] for v in values], dtype=np.int64)
+        parts.append(_encode_int_column(codes, level, entropy))
+        values = uniques
+    
+    encoded = [v.encode('utf-8') for v in values]
+    lengths = np.array([len(v) for v in encoded], dtype=np.int64)
+    parts.append(_encode_int_column(lengths, level, entropy))
+    codec = SymbolicCodec(split_streams=True, level=level, entropy=entropy)
+    parts.append(codec.compress(b''.join(encoded)))
+    
+    return struct.pack('<BI', int(use_dict), len(values)) + b''.join(write_blob(p) for p in parts)
+
+
+def _decode_string_column(data: bytes, count: int) -> List[str]:
+    """Inverse of _encode_string_column."""
+    use_dict, n_values = struct.unpack('<BI', data[:5])
+    offset = 5
+    
+    if use_dict:
+        codes_blob, offset = read_blob(data, offset)
+        codes = _decode_int_column(codes_blob, count)
+    
+    lengths_blob, offset = read_blob(data, offset)
+    text_blob, offset = read_blob(data, offset)
+    lengths = _decode_int_column(lengths_blob, n_values)
+    text = SymbolicCodec(split_streams=True).decompress(text_blob)
+    
+    ends = np.cumsum(lengths).tolist()
+    starts = [0] + ends[:-1]
+    values = [text[a:b].decode('utf-8') for a, b in zip(starts, ends)]
+    
+    if use_dict:
+        return [values[c] for c in codes.tolist()]
+    return values
+
+
+def _encode_jsonl_column(
+    item: Tuple[int, List[Any]], 
+    level: int = DEFAULT_LEVEL, 
+    entropy: str = 'zlib'
+) -> bytes:
+    """Encode one column by its value type (process pool worker)."""
+    value_type, values = item
+    if value_type == _JSONL_INT:
+        body = _encode_int_column(np.array(values, dtype=np.int64), level, entropy)
+    elif value_type == _JSONL_FLOAT:
+        raw = np.array(values, dtype='<f8').tobytes()
+        body = fse_compress(raw, SYMBOLIC_LEVELS[level]['entropy_level'], entropy)
+    elif value_type == _JSONL_STR:
+        body = _encode_string_column(values, level, entropy)
+    else:
+        dumped = [json.dumps(v, separators=(',', ':')) for v in values]
+        body = _encode_string_column(dumped, level, entropy)
+    return struct.pack('<BI', value_type, len(values)) + body
+
+
+def _decode_jsonl_column(blob: bytes) -> List[Any]:
+    """Decode one column back to Python values (process pool worker)."""
+    value_type, count = struct.unpack('<BI', blob[:5])
+    body = blob[5:]
+    if value_type == _JSONL_INT:
+        return _decode_int_column(body, count).tolist()
+    if value_type == _JSONL_FLOAT:
+        return np.frombuffer(fse_decompress(body), dtype='<f8').tolist()
+    if value_type == _JSONL_STR:
+        return _decode_string_column(body, count)
+    return [json.loads(v) for v in _decode_string_column(body, count)]
+
+
+def _column_type(values: List[Any]) -> int:
+    """Narrowest lossless column type for a list of JSON values."""
+    types = {type(v) for v in values}
+    if types == {int} and all(-2**63 <= v < 2**63 for v in values):
+        return _JSONL_INT
+    if types == {float}:
+        return _JSONL_FLOAT
+    if types == {str}:
+        return _JSONL_STR
+    return _JSONL_JSON
+
+
+class JsonLinesCodec:
+    """
+    Columnar codec for JSON-lines text (one JSON object per line).
+    
+    Records are parsed and transposed into one column per key. Integer
+    columns use lossless delta-of-delta varints, floats are stored as
+    float64, strings go through SymbolicCodec with a per-column dictionary
+    for low-cardinality values, and anything else is stored as compact
+    JSON text. Column streams are entropy-coded with the configured
+    backend and level. Columns are stored independently, so read_jsonl_column()
+    can decode a single field; from JSONL_PARALLEL_MIN_RECORDS records
+    (or with workers set) they are coded on a process pool, since the
+    string coder is pure Python and would hold the GIL on threads.
+    
+    compress() returns None when the input does not re-serialize byte-for-
+    byte (unusual formatting, duplicate keys, ...); callers then fall back
+    to the plain text codec.
+    
+    Payload layout:
+        blob   meta JSON (n_records, keys, types, schemas, style, trailing newline)
+        '<Q'   n_columns + 2 offsets into the column area
+        blobs  schema-id column, then one column per key
+    """
+    
+    def __init__(self, level: int = DEFAULT_LEVEL, entropy: str = 'zlib'):
+        self.level = level
+        self.entropy = entropy
+    
+    def compress(self, data: bytes, workers: Optional[int] = None) -> Optional[bytes]:
+        """Columnar encoding of data, or None if it is not exact JSON-lines."""
+        trailing_newline = data.endswith(b'\n')
+        lines = (data[:-1] if trailing_newline else data).split(b'\n')
+        if len(lines) < JSONL_MIN_RECORDS:
+            return None
+        
+        try:
+            records = [json.loads(line) for line in lines]
+        except (ValueError, UnicodeDecodeError):
+            return None
+        if not all(isinstance(r, dict) for r in records):
+            return None
+        
+        # Find the json.dumps style that reproduces every line exactly
+        style = None
+        for s, (separators, ensure_ascii) in enumerate(_JSONL_STYLES):
+            if json.dumps(records[0], separators=separators, 
+                          ensure_ascii=ensure_ascii).encode('utf-8') == lines[0]:
+                style = s
+                break
+        if style is None:
+            return None
+        separators, ensure_ascii = _JSONL_STYLES[style]
+        for record, line in zip(records, lines):
+            if json.dumps(record, separators=separators, 
+                          ensure_ascii=ensure_ascii).encode('utf-8') != line:
+                return None
+        
+        # Transpose into per-key columns
+        schemas = {}
+        schema_ids = []
+        columns = {}
+        for record in records:
+            schema_ids.append(schemas.setdefault(tuple(record), len(schemas)))
+            for key, value in record.items():
+                columns.setdefault(key, []).append(value)
+        
+        keys = list(columns)
+        types = [_column_type(columns[k]) for k in keys]
+        items = [(_JSONL_INT, schema_ids)] + list(zip(types, (columns[k] for k in keys)))
+        encode = partial(_encode_jsonl_column, level=self.level, entropy=self.entropy)
+        blobs = _parallel_map(encode, items, self._workers(len(records), workers))
+        
+        meta = {
+            'n_records': len(records),
+            'keys': keys,
+            'types': types,
+            'schemas': [list(s) for s in schemas],
+            'style': style,
+            'trailing_newline': trailing_newline,
+        }
+        offsets = np.zeros(len(blobs) + 1, dtype='<u8')
+        offsets[1:] = np.cumsum([len(b) for b in blobs])
+        
+        meta_json = json.dumps(meta).encode('utf-8')
+        return write_blob(fse_compress(meta_json)) + offsets.tobytes() + b''.join(blobs)
+    
+    @staticmethod
+    def _workers(n_records: int, workers: Optional[int]) -> Optional[int]:
+        """Column pool size: serial for small inputs unless workers is given."""
+        if workers is None and n_records < JSONL_PARALLEL_MIN_RECORDS:
+            return 1
+        return workers
+    
+    @staticmethod
+    def _parse(payload: bytes) -> Tuple[dict, np.ndarray, int]:
+        """Return (meta, column offsets, start of the column area)."""
+        meta_blob, offset = read_blob(payload, 0)
+        meta = json.loads(fse_decompress(meta_blob).decode('utf-8'))
+        n_blobs = len(meta['keys']) + 1
+        offsets = np.frombuffer(payload, dtype='<u8', count=n_blobs + 1, offset=offset)
+        return meta, offsets, offset + 8 * (n_blobs + 1)
+    
+    def read_column(self, payload: bytes, key: str) -> List[Any]:
+        """Decode a single key's column (values of records that have the key)."""
+        meta, offsets, base = self._parse(payload)
+        if key not in meta['keys']:
+            raise KeyError(key)
+        c = meta['keys'].index(key) + 1
+        return _decode_jsonl_column(payload[base + int(offsets[c]):base + int(offsets[c + 1])])
+    
+    def decompress(self, payload: bytes, workers: Optional[int] = None) -> bytes:
+        """Rebuild the original JSON-lines bytes."""
+        meta, offsets, base = self._parse(payload)
+        blobs = [
+            payload[base + int(offsets[c]):base + int(offsets[c + 1])]
+            for c in range(len(offsets) - 1)
+        ]
+        decoded = _parallel_map(_decode_jsonl_column, blobs, self._workers(meta['n_records'], workers))
+        
+        schemas = meta['schemas']
+        columns = {key: iter(values) for key, values in zip(meta['keys'], decoded[1:])}
+        separators, ensure_ascii = _JSONL_STYLES[meta['style']]
+        
+        lines = []
+        for schema_id in decoded[0]:
+            record = {key: next(columns[key]) for key in schemas[schema_id]}
+            lines.append(json.dumps(record, separators=separators, ensure_ascii=ensure_ascii))
+        
+        text = '\n'.join(lines) + ('\n' if meta['trailing_newline'] else '')
+        return text.encode('utf-8')
+
+
+def read_jsonl_column(data: bytes, key: str) -> List[Any]:
+    """
+    Read one field from a columnar JSON-lines archive without decoding records.
+    
+    Returns the values of `key` in record order, for records that have it.
+    
+    Example:
+        >>> compressed = compress(jsonl_bytes, filename="events.jsonl")
+        >>> levels = read_jsonl_column(compressed, "level")
+    """
+    magic, _, mode, _, ndim, _ = struct.unpack('<HHBBBB', data[:8])
+    if magic != MAGIC:
+        raise ValueError(f"Invalid magic: {hex(magic)}")
+    if mode != MODE_JSONL:
+        raise ValueError(f"Not a columnar JSON-lines archive (mode {mode})")
+    
+    offset = 8 + 4 * ndim
+    compressed_size, = struct.unpack('<I', data[offset:offset+4])
+    payload = data[offset + 4:offset + 4 + compressed_size]
+    return JsonLinesCodec().read_column(payload, key)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# BINARY FAST PATH (Width sniffing + byte/bit shuffle, lossless)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+_FILTER_STORE, _FILTER_NONE, _FILTER_BYTE_SHUFFLE, _FILTER_BIT_SHUFFLE = 0, 1, 2, 3
+
+
+def _shuffle(data: bytes, filter_id: int, width: int) -> bytes:
+    """Blosc-style shuffle: group byte (or bit) lanes of width-byte elements."""
+    if filter_id == _FILTER_NONE or width == 1:
+        return data
+    n = len(data) // width
+    body = np.frombuffer(data, dtype=np.uint8, count=n * width).reshape(n, width)
+    if filter_id == _FILTER_BIT_SHUFFLE:
+        body = np.unpackbits(body, axis=1)
+        lanes = np.packbits(body.T, axis=1)  # n bits per lane, padded to bytes
+        return lanes.tobytes() + data[n * width:]
+    return body.T.tobytes() + data[n * width:]
+
+
+def _unshuffle(data: bytes, filter_id: int, width: int, size: int) -> bytes:
+    """Inverse of _shuffle for an original buffer of `size` bytes."""
+    if filter_id == _FILTER_NONE or width == 1:
+        return data
+    n = size // width
+    if filter_id == _FILTER_BIT_SHUFFLE:
+        lane_bytes = (n + 7) // 8
+        lanes = np.frombuffer(data, dtype=np.uint8, count=8 * width * lane_bytes)
+        bits = np.unpackbits(lanes.reshape(8 * width, lane_bytes), axis=1, count=n)
+        body = np.packbits(bits.T, axis=1)
+        return body.tobytes() + data[8 * width * lane_bytes:]
+    body = np.frombuffer(data, dtype=np.uint8, count=n * width).reshape(width, n)
+    return body.T.tobytes() + data[n * width:]
+
+
+class BinaryCodec:
+    """
+    Lossless fast path for non-text bytes (raw float/int dumps, binaries).
+    
+    Sniffs the likely element width by trial-compressing a strided sample
+    under each candidate filter (none, byte shuffle, bit shuffle at widths
+    2/4/8), applies the winner to the whole buffer and entropy-codes it
+    with the configured backend, at the entropy level of SYMBOLIC_LEVELS.
+    Bit shuffle is ~40× slower than byte shuffle, so it must win clearly.
+    Input whose coded body is not smaller is stored as-is.
+    
+    Payload: '<BB' (filter, width) + filtered, entropy-coded body
+    """
+    
+    WIDTHS = (2, 4, 8)
+    BIT_SHUFFLE_MARGIN = 0.95  # Bit shuffle must be 5% smaller than the best byte filter
+    
+    def __init__(self, level: int = DEFAULT_LEVEL, entropy: str = 'zlib'):
+        self.level = level
+        self.entropy_level = SYMBOLIC_LEVELS[level]['entropy_level']
+        self.entropy = entropy
+    
+    def sniff(self, data: bytes) -> Tuple[int, int]:
+        """Pick (filter, width) with the smallest trial output on a sample."""
+        sample = _strided_sample(data)
+        best = (_FILTER_NONE, 1)
+        best_size = len(zlib.compress(sample, 1))
+        for width in self.WIDTHS:
+            size = len(zlib.compress(_shuffle(sample, _FILTER_BYTE_SHUFFLE, width), 1))
+            if size < best_size:
+                best, best_size = (_FILTER_BYTE_SHUFFLE, width), size
+        
+        for width in self.WIDTHS:
+            size = len(zlib.compress(_shuffle(sample, _FILTER_BIT_SHUFFLE, width), 1))
+            if size < best_size * self.BIT_SHUFFLE_MARGIN:
+                best, best_size = (_FILTER_BIT_SHUFFLE, width), size
+        return best
+    
+    def compress(self, data: bytes, workers: Optional[int] = None) -> bytes:
+        """Filter + entropy-code data, or store it when that does not help."""
+        filter_id, width = self.sniff(data)
+        body = fse_compress_chunked(
+            _shuffle(data, filter_id, width), self.entropy_level, self.entropy, workers
+        )
+        if len(body) >= len(data):
+            filter_id, width, body = _FILTER_STORE, 1, data
+        return struct.pack('<BB', filter_id, width) + body
+    
+    def decompress(self, data: bytes, size: int, workers: Optional[int] = None) -> bytes:
+        """Inverse of compress() for an original buffer of `size` bytes."""
+        filter_id, width = struct.unpack('<BB', data[:2])
+        if filter_id == _FILTER_STORE:
+            return data[2:]
+        return _unshuffle(fse_decompress(data[2:], workers), filter_id, width, size)
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PHASE-2: BLOCK PRODUCT QUANTIZATION (10-20× on Embeddings)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+PQ_MEMORY_BUDGET = 256 * 1024 * 1024  # Bytes of distance tiles per GEMM pass
+PQ_TILE_BYTES = 4 * 1024 * 1024  # Cache-sized distance tiles (larger ones cost ~2× per row)
+PQ_TRAIN_SIZE = 65536  # Codebooks are fit on at most this many sampled rows
+IVF_MIN_LIST_SIZE = 32  # IVF coarse lists are capped at n // this many rows
+DRIFT_SAMPLE_SIZE = 16384  # Rows scored for a model's baseline fit error
+DRIFT_HOLDOUT_SHARE = 0.1  # Fraction of fit rows held out of training to score fit error
+DRIFT_MIN_HOLDOUT = 64  # Smaller samples score fit error on their training rows
+PQ_MAX_ITER = 20  # Lloyd iterations (mini-batch epochs) per k-means fit
+PCA_CHUNK_ROWS = 4096  # Covariance chunk of a time-budgeted (sampled) PCA
+BUDGET_PCA_SHARE = 0.25  # Fraction of a fit's time budget the PCA may use
+BUDGET_PILOT_ROWS = 2048  # Rows timed to calibrate a budgeted fit's per-row cost
+BUDGET_MIN_TRAIN = 4  # Rows per centroid kept before k-means iterations are cut
+BUDGET_ENCODE_SLACK = 1.25  # Margin on the calibrated encode + packing estimate
+BUDGET_PACK_TILES = 8  # Pilot codes are also packed tiled this many times (fixed vs per-row cost)
+PQ_NIBBLE_CENTROIDS = 16  # Codebooks this small store two 4-bit codes per byte
+PQ_MAX_BLOCK_WORKERS = 8  # With workers unset, at most this many blocks run at once
+
+
+def _blas_limit(workers: int):
+    """
+    Share the cores between `workers` concurrent BLAS callers.
+    
+    Uses threadpoolctl when installed. Without it, BLAS keeps its own
+    thread count; set OMP_NUM_THREADS / OPENBLAS_NUM_THREADS / MKL_NUM_THREADS
+    (before numpy is imported) to avoid oversubscribing the CPU.
+    """
+    if threadpool_limits is None or workers <= 1:
+        return nullcontext()
+    return threadpool_limits(limits=max(1, (os.cpu_count() or 1) // workers), user_api='blas')
+
+
+def _nearest_centroids(
+    data: np.ndarray, 
+    centroids: np.ndarray, 
+    memory_budget: int = PQ_MEMORY_BUDGET
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Nearest centroid and squared distance for every row, in bounded memory.
+    
+    Uses ||x||² - 2x·cᵀ + ||c||² so the heavy lifting is one BLAS matrix
+    multiply per row tile; tiles are sized so the (rows, k) float32
+    distance block and its temporaries stay within memory_budget bytes,
+    and within PQ_TILE_BYTES so they stay in cache (which also keeps the
+    cost per row independent of n).
+    """
+    n = len(data)
+    k = len(centroids)
+    data = np.ascontiguousarray(data, dtype=np.float32)
+    centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+    c_norms = np.einsum('ij,ij->i', centroids, centroids)
+    
+    rows = max(1, min(memory_budget, PQ_TILE_BYTES) // (3 * 4 * max(k, 1)))
+    labels = np.empty(n, dtype=np.int64)
+    min_dist = np.empty(n, dtype=np.float32)
+    
+    for start in range(0, n, rows):
+        x = data[start:start + rows]
+        dist = x @ centroids.T
+        dist *= -2
+        dist += c_norms
+        best = np.argmin(dist, axis=1)
+        labels[start:start + rows] = best
+        x_norms = np.einsum('ij,ij->i', x, x)
+        min_dist[start:start + rows] = dist[np.arange(len(x)), best] + x_norms
+    
+    np.maximum(min_dist, 0, out=min_dist)  # Cancellation can dip below zero
+    return labels, min_dist
+
+
+def _cluster_sums(data: np.ndarray, labels: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-cluster row counts and coordinate sums (one bincount per dimension)."""
+    counts = np.bincount(labels, minlength=k)
+    sums = np.stack(
+        [np.bincount(labels, weights=data[:, j], minlength=k) for j in range(data.shape[1])], 
+        axis=1
+    )
+    return counts, sums
+
+
+def _phi_weights(distances: np.ndarray) -> np.ndarray:
+    """Sampling weights favouring points near the 1/PHI distance percentile."""
+    target_dist = np.percentile(distances, 100 / PHI)
+    dist_diff = np.abs(distances - target_dist)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        weights = distances / (dist_diff + 1e-8)
+        weights = weights / (weights.sum() + 1e-10)
+    
+    # Safety checks
+    if not np.isfinite(weights).all() or weights.sum() == 0:
+        weights = distances / (distances.sum() + 1e-10)
+    return weights
+
+
+def _pack_nibbles(codes: np.ndarray) -> np.ndarray:
+    """4-bit codes (n, blocks) as bytes (n, ceil(blocks / 2)): even block low nibble."""
+    codes = codes.astype(np.uint8)
+    if codes.shape[1] % 2:
+        codes = np.pad(codes, ((0, 0), (0, 1)), mode='constant')
+    return codes[:, 0::2] | (codes[:, 1::2] << 4)
+
+
+def _unpack_nibbles(packed: np.ndarray, n_blocks: int) -> np.ndarray:
+    """Inverse of _pack_nibbles."""
+    codes = np.empty((len(packed), 2 * packed.shape[1]), dtype=np.uint8)
+    codes[:, 0::2] = packed & 0x0F
+    codes[:, 1::2] = packed >> 4
+    return codes[:, :n_blocks]
+
+
+class BlockProductQuantizer:
+    """
+    Block Product Quantization with PHI-guided initialization.
+    
+    Splits vectors into blocks, learns codebooks per block using k-means
+    with golden ratio guided initialization, enabling 10-20× compression
+    on embeddings while maintaining 0.98+ cosine similarity.
+    """
+    
+    def __init__(self, n_blocks: int = 8, n_centroids: int = 256, max_iter: int = PQ_MAX_ITER,
+                 memory_budget: int = PQ_MEMORY_BUDGET, 
+                 train_size: Optional[int] = PQ_TRAIN_SIZE,
+                 batch_size: Optional[int] = None,
+                 workers: Optional[int] = None, pool: str = 'thread',
+                 init: str = 'kmeans++'):
+        """
+        Initialize Block PQ.
+        
+        Args:
+            n_blocks: Number of blocks to split vectors into
+            n_centroids: Number of centroids per codebook (typically 256 for uint8;
+                         PQ_NIBBLE_CENTROIDS or fewer pack as 4-bit codes in archives)
+            max_iter: Maximum k-means iterations (epochs in mini-batch mode)
+            memory_budget: Peak bytes of distance tiles in training/encoding
+            train_size: Fit codebooks on a random sample of at most this many
+                        rows (None uses every row); encode() still sees all rows
+            batch_size: Mini-batch k-means batch size (None runs full Lloyd)
+            workers: Blocks trained/encoded concurrently (None: up to
+                     PQ_MAX_BLOCK_WORKERS cores, serial for one or two
+                     blocks; 1: serial). BLAS threads are shared out
+                     between them when threadpoolctl is installed
+            pool: 'thread' (BLAS-heavy, shares memory) or 'process'
+            init: Centroid seeding, 'kmeans++' (incremental) or 'kmeans||'
+                  (oversampled rounds); both use PHI-percentile weighting
+        """
+        self.n_blocks = n_blocks
+        self.n_centroids = n_centroids
+        self.max_iter = max_iter
+        self.memory_budget = memory_budget
+        self.train_size = train_size
+        self.batch_size = batch_size
+        self.workers = workers
+        self.pool = pool
+        self.init = init
+        self.codebooks = []
+        self.block_size = None
+        self.stopped_early = False
+    
+    def _block_workers(self, n_items: int) -> int:
+        """
+        Concurrent blocks: workers if set, else up to PQ_MAX_BLOCK_WORKERS
+        cores, and serial below PARALLEL_MIN_ITEMS blocks.
+        """
+        if self.workers is not None:
+            return max(1, min(self.workers, n_items))
+        if n_items < PARALLEL_MIN_ITEMS:
+            return 1
+        return max(1, min(os.cpu_count() or 1, PQ_MAX_BLOCK_WORKERS, n_items))
+    
+    def _map_blocks(self, func, items: List[Any]) -> List[Any]:
+        """Run per-block work on the configured pool (results in block order)."""
+        workers = self._block_workers(len(items))
+        if self.pool == 'process':
+            return _parallel_map(func, items, workers)
+        with _blas_limit(workers):
+            return _thread_map(func, items, workers)
+    
+    def _phi_init_centroids(self, data: np.ndarray, k: int, 
+                            rng: np.random.Generator,
+                            sample_weight: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        PHI-guided k-means++ initialization.
+        
+        Keeps a running nearest-centroid distance per point, updated only
+        against the newest centroid, so the cost is O(n·k·d). Optional
+        sample_weight scales the sampling weights (k-means|| reduction).
+        """
         n = len(data)
         if n == 0 or k == 0:
             return np.zeros((k, data.shape[1]), dtype=np.float32)
         
-        centroids = np.zeros((k, data.shape[1]), dtype=np.float32)
-        centroids[0] = data[np.random.randint(n)]
+        centroids = np.zeros((k, data.shape[1]), dtype=np.float32)
+        centroids[0] = data[rng.integers(n)]
+        
+        # Distance to nearest centroid, ||x||² - 2x·c + ||c||² per new centroid
+        x_norms = np.einsum('ij,ij->i', data, data)
+        distances = np.maximum(x_norms - 2 * (data @ centroids[0]) + centroids[0] @ centroids[0], 0)
+        
+        for i in range(1, k):
+            weights = _phi_weights(distances)
+            if sample_weight is not None:
+                weights = weights * sample_weight
+                weights = weights / (weights.sum() + 1e-10)
+            
+            try:
+                next_idx = rng.choice(n, p=weights)
+            except:
+                next_idx = rng.choice(n)
+            
+            centroids[i] = data[next_idx]
+            new_distances = x_norms - 2 * (data @ centroids[i]) + centroids[i] @ centroids[i]
+            np.minimum(distances, np.maximum(new_distances, 0), out=distances)
+        
+        return centroids
+    
+    def _phi_init_parallel(self, data: np.ndarray, k: int, rng: np.random.Generator,
+                           rounds: int = 5, oversample: float = 2.0) -> np.ndarray:
+        """
+        PHI-guided k-means|| initialization (Bahmani et al. 2012).
+        
+        Each round samples every point independently with probability
+        oversample·k times its PHI weight, all in one vectorized pass; the
+        ~rounds·oversample·k candidates are then reduced to k by weighted
+        PHI k-means++ (weights = points nearest each candidate).
+        """
+        n = len(data)
+        candidates = data[rng.integers(n)][np.newaxis, :]
+        _, distances = _nearest_centroids(data, candidates, self.memory_budget)
+        
+        for _ in range(rounds):
+            p = np.minimum(1.0, oversample * k * _phi_weights(distances))
+            picked = data[rng.random(n) < p]
+            if len(picked) == 0:
+                continue
+            candidates = np.vstack([candidates, picked])
+            _, new_distances = _nearest_centroids(data, picked, self.memory_budget)
+            np.minimum(distances, new_distances, out=distances)
+        
+        if len(candidates) <= k:
+            return self._phi_init_centroids(data, k, rng)
+        
+        labels, _ = _nearest_centroids(data, candidates, self.memory_budget)
+        counts = np.bincount(labels, minlength=len(candidates)).astype(np.float64)
+        return self._phi_init_centroids(candidates, k, rng, sample_weight=counts)
+    
+    def _kmeans_block(self, data: np.ndarray, k: int, 
+                      rng: Optional[np.random.Generator] = None,
+                      init_centroids: Optional[np.ndarray] = None,
+                      deadline: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        K-means clustering on a single block (warm-started from init_centroids
+        if given). With a deadline (a time.perf_counter() value), iterations
+        stop before one that would end past it.
+        """
+        n, d = data.shape
+        if rng is None:
+            rng = np.random.default_rng()
+        
+        # Warm start: iterate from the given codebook, even with fewer rows than centroids
+        if init_centroids is not None:
+            centroids = np.array(init_centroids, dtype=np.float32)
+        
+        # Handle edge case: more centroids than samples
+        elif k >= n:
+            centroids = data.copy()
+            if k > n:
+                padding = np.zeros((k - n, d), dtype=np.float32)
+                centroids = np.vstack([centroids, padding])
+            labels = np.arange(n, dtype=np.uint16 if k <= 256 else np.uint32)
+            return centroids, labels
+        
+        # Initialize with PHI-guided k-means++
+        elif self.init == 'kmeans||':
+            centroids = self._phi_init_parallel(data, k, rng)
+        else:
+            centroids = self._phi_init_centroids(data, k, rng)
+        
+        if self.batch_size and self.batch_size < n:
+            return self._minibatch_kmeans(data, centroids, rng, deadline)
+        
+        # Lloyd's algorithm
+        labels = None
+        for iteration in range(self.max_iter):
+            started = time.perf_counter()
+            
+            # Assign to nearest centroid
+            labels, _ = _nearest_centroids(data, centroids, self.memory_budget)
+            
+            # Update centroids (empty clusters keep their position)
+            old_centroids = centroids.copy()
+            counts, sums = _cluster_sums(data, labels, k)
+            nonempty = counts > 0
+            centroids[nonempty] = sums[nonempty] / counts[nonempty, np.newaxis]
+            
+            # Check convergence
+            if np.allclose(centroids, old_centroids, atol=1e-6):
+                break
+            if iteration + 1 < self.max_iter and self._out_of_time(started, deadline):
+                break
+        
+        if labels is None:  # max_iter=0: assign to the seeded centroids
+            labels, _ = _nearest_centroids(data, centroids, self.memory_budget)
+        labels = labels.astype(np.uint16 if k <= 256 else np.uint32)
+        return centroids.astype(np.float32), labels
+    
+    def _minibatch_kmeans(self, data: np.ndarray, centroids: np.ndarray, 
+                          rng: np.random.Generator,
+                          deadline: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Mini-batch k-means (Sculley 2010) with per-centroid learning rates."""
+        n = len(data)
+        k = len(centroids)
+        seen = np.zeros(k, dtype=np.float64)
+        
+        for epoch in range(self.max_iter):
+            started = time.perf_counter()
+            old_centroids = centroids.copy()
+            order = rng.permutation(n)
+            
+            for start in range(0, n, self.batch_size):
+                batch = data[order[start:start + self.batch_size]]
+                labels, _ = _nearest_centroids(batch, centroids, self.memory_budget)
+                counts, sums = _cluster_sums(batch, labels, k)
+                
+                # Each centroid moves toward its batch mean at rate counts / seen
+                seen += counts
+                hit = counts > 0
+                centroids[hit] += (sums[hit] - counts[hit, np.newaxis] * centroids[hit]) \
+                    / seen[hit, np.newaxis]
+            
+            if np.allclose(centroids, old_centroids, atol=1e-6):
+                break
+            if epoch + 1 < self.max_iter and self._out_of_time(started, deadline):
+                break
+        
+        labels, _ = _nearest_centroids(data, centroids, self.memory_budget)
+        return centroids.astype(np.float32), labels.astype(np.uint16 if k <= 256 else np.uint32)
+    
+    def _out_of_time(self, started: float, deadline: Optional[float]) -> bool:
+        """Whether a pass as long as the one begun at started would overrun deadline."""
+        if deadline is None:
+            return False
+        now = time.perf_counter()
+        if now + (now - started) <= deadline:
+            return False
+        self.stopped_early = True
+        return True
+    
+    def fit(self, data: np.ndarray, rng: Union[None, int, np.random.Generator] = None,
+            warm_start: Optional[List[np.ndarray]] = None,
+            deadline: Optional[float] = None):
+        """
+        Learn codebooks from training data.
+        
+        rng (a Generator or seed; None draws fresh entropy) drives the
+        training sample and the per-block seeds. No global numpy random
+        state is touched, so concurrent fits are independent and a fixed
+        seed reproduces the codebooks. warm_start (codebooks of a previous
+        fit with the same layout) replaces PHI seeding as the k-means start.
+        deadline (a time.perf_counter() value) is split across the waves of
+        blocks the pool runs; k-means then stops early rather than overrun
+        it, and stopped_early records whether any block did.
+        """
+        rng = np.random.default_rng(rng)
+        self.stopped_early = False
+        n, d = data.shape
+        
+        # Pad dimensions if needed
+        if d % self.n_blocks != 0:
+            pad_size = self.n_blocks - (d % self.n_blocks)
+            data = np.pad(data, ((0, 0), (0, pad_size)), mode='constant')
+            d_padded = d + pad_size
+        else:
+            d_padded = d
+        
+        self.block_size = d_padded // self.n_blocks
+        self.codebooks = []
+        
+        # Codebooks converge on a sample; encode() still covers every row
+        if self.train_size and n > self.train_size:
+            data = data[np.sort(rng.choice(n, self.train_size, replace=False))]
+        
+        # Learn one codebook per block; seeds are drawn up front so pooled
+        # and serial training produce identical codebooks
+        seeds = rng.integers(2**31 - 1, size=self.n_blocks)
+        deadlines = [None] * self.n_blocks
+        if deadline is not None:
+            width = self._block_workers(self.n_blocks)
+            waves = -(-self.n_blocks // width)
+            started = time.perf_counter()
+            deadlines = [started + (deadline - started) * (b // width + 1) / waves 
+                         for b in range(self.n_blocks)]
+        blocks = [
+            (np.ascontiguousarray(data[:, b*self.block_size:(b+1)*self.block_size]), int(seed),
+             None if warm_start is None else warm_start[b], deadlines[b])
+            for b, seed in enumerate(seeds)
+        ]
+        self.codebooks = self._map_blocks(partial(_fit_pq_block, self), blocks)
+    
+    def encode(self, data: np.ndarray) -> np.ndarray:
+        """Encode data using learned codebooks."""
+        n, d = data.shape
+        d_padded = self.block_size * self.n_blocks
+        
+        # Pad if needed
+        if d < d_padded:
+            data = np.pad(data, ((0, 0), (0, d_padded - d)), mode='constant')
+        
+        # Determine code dtype
+        dtype = np.uint8 if self.n_centroids <= 256 else np.uint16
+        codes = np.zeros((n, self.n_blocks), dtype=dtype)
+        
+        # Encode each block
+        blocks = [
+            (data[:, b*self.block_size:(b+1)*self.block_size], b) 
+            for b in range(self.n_blocks)
+        ]
+        for b, block_codes in enumerate(self._map_blocks(partial(_encode_pq_block, self), blocks)):
+            codes[:, b] = block_codes
+        
+        return codes
+    
+    def decode(self, codes: np.ndarray, original_dims: int) -> np.ndarray:
+        """Decode codes back to vectors."""
+        n = len(codes)
+        d_padded = self.block_size * self.n_blocks
+        reconstructed = np.zeros((n, d_padded), dtype=np.float32)
+        
+        # Decode each block
+        for b in range(self.n_blocks):
+            block_codes = codes[:, b]
+            centroids = self.codebooks[b]
+            reconstructed[:, b*self.block_size:(b+1)*self.block_size] = \
+                centroids[block_codes]
+        
+        # Remove padding
+        return reconstructed[:, :original_dims]
+
+
+def _fit_pq_block(
+    pq: BlockProductQuantizer, 
+    item: Tuple[np.ndarray, int, Optional[np.ndarray], Optional[float]]
+) -> np.ndarray:
+    """Train one block's codebook from its own seed, warm start and deadline (pool worker)."""
+    block_data, seed, init_centroids, deadline = item
+    centroids, _ = pq._kmeans_block(
+        block_data, pq.n_centroids, np.random.default_rng(seed), init_centroids, deadline
+    )
+    return centroids
+
+
+def _encode_pq_block(pq: BlockProductQuantizer, item: Tuple[np.ndarray, int]) -> np.ndarray:
+    """Nearest-centroid codes for one block (pool worker)."""
+    block_data, b = item
+    labels, _ = _nearest_centroids(block_data, pq.codebooks[b], pq.memory_budget)
+    return labels
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# PHASE-1: PCA & QUANTIZATION (Proven Foundation)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _apply_pca_reduction(
+    data: np.ndarray, 
+    target_variance: float = 0.95
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """Variance-aware PCA dimensionality reduction."""
+    n, d = data.shape
+    
+    # Center data
+    mean = data.mean(axis=0).astype(np.float32)
+    centered = data - mean
+    
+    # Compute eigendecomposition
+    cov = (centered.T @ centered) / n
+    components, k = _pca_components(cov, target_variance)
+    
+    # Project data
+    transformed = centered @ components
+    
+    return transformed.astype(np.float32), components, mean, k
+
+
+def _pca_components(cov: np.ndarray, target_variance: float) -> Tuple[np.ndarray, int]:
+    """Leading eigenvectors of cov covering target_variance (float32, shape (d, k))."""
+    d = len(cov)
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    
+    # Sort by eigenvalue (descending)
+    idx = np.argsort(eigenvalues)[::-1]
+    eigenvalues = eigenvalues[idx]
+    eigenvectors = eigenvectors[:, idx]
+    
+    # Select k components for target variance
+    total_var = eigenvalues.sum()
+    explained_var_ratio = eigenvalues / (total_var + 1e-10)
+    cumsum_var = np.cumsum(explained_var_ratio)
+    
+    k = int(np.searchsorted(cumsum_var, target_variance) + 1)
+    k = min(max(k, 1), d)
+    
+    return eigenvectors[:, :k].astype(np.float32), k
+
+
+def _sampled_covariance(
+    data: np.ndarray, 
+    deadline: float, 
+    rng: np.random.Generator
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    Mean and covariance accumulated over random row chunks until deadline.
+    
+    Anytime PCA input for time-budgeted fits: reads at least one
+    PCA_CHUNK_ROWS chunk, stops once time.perf_counter() passes deadline,
+    and returns (mean, cov, rows used). Chunks are shifted by the first
+    chunk's mean so the float32 products do not cancel.
+    """
+    n, d = data.shape
+    order = rng.permutation(n)
+    shift = None
+    total = np.zeros(d, dtype=np.float64)
+    moment = np.zeros((d, d), dtype=np.float64)
+    rows = 0
+    
+    for start in range(0, n, PCA_CHUNK_ROWS):
+        chunk = data[np.sort(order[start:start + PCA_CHUNK_ROWS])]
+        if shift is None:
+            shift = chunk.mean(axis=0)
+        chunk = chunk - shift
+        total += chunk.sum(axis=0)
+        moment += chunk.T @ chunk
+        rows += len(chunk)
+        if time.perf_counter() > deadline:
+            break
+    
+    offset = total / rows
+    cov = moment / rows - np.outer(offset, offset)
+    return (shift + offset).astype(np.float32), cov, rows
+
+
+def _apply_quantization(
+    data: np.ndarray, 
+    quant_bits: int, 
+    per_component: bool
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Apply scalar quantization to data."""
+    n_levels = 2 ** quant_bits
+    
+    # Compute min/max
+    if per_component:
+        mins = data.min(axis=0, keepdims=True)
+        maxs = data.max(axis=0, keepdims=True)
+    else:
+        mins = np.array([[data.min()]])
+        maxs = np.array([[data.max()]])
+    
+    # Compute scale
+    ranges = maxs - mins
+    ranges = np.where(ranges < 1e-8, 1.0, ranges)
+    
+    # Quantize
+    normalized = (data - mins) / ranges
+    quantized_float = normalized * (n_levels - 1)
+    
+    # Cast to appropriate dtype
+    if quant_bits <= 8:
+        quantized = np.round(quantized_float).astype(np.uint8)
+    elif quant_bits <= 16:
+        quantized = np.round(quantized_float).astype(np.uint16)
+    else:
+        quantized = np.round(quantized_float).astype(np.uint32)
+    
+    scales = ranges / (n_levels - 1)
+    zeros = mins
+    
+    return quantized, scales.astype(np.float32), zeros.astype(np.float32)
+
+
+def _dequantize(
+    quantized: np.ndarray, 
+    scales: np.ndarray, 
+    zeros: np.ndarray
+) -> np.ndarray:
+    """Reverse quantization."""
+    return quantized.astype(np.float32) * scales + zeros
+
+
+def _reverse_pca(
+    transformed: np.ndarray, 
+    components: np.ndarray, 
+    mean: np.ndarray
+) -> np.ndarray:
+    """Reverse PCA projection."""
+    reconstructed = transformed @ components.T
+    return reconstructed + mean
+
+
+def _quant_dtype(bits: int) -> type:
+    """Smallest unsigned dtype holding bits-bit quantized values."""
+    if bits <= 8:
+        return np.uint8
+    elif bits <= 16:
+        return np.uint16
+    return np.uint32
+
+
+def _pq_code_dtype(n_centroids: int) -> type:
+    """Storage dtype of codebook indices."""
+    return np.uint8 if n_centroids <= 256 else np.uint16
+
+
+def _quantize_fixed(
+    data: np.ndarray, 
+    scales: np.ndarray, 
+    zeros: np.ndarray, 
+    quant_bits: int
+) -> np.ndarray:
+    """Scalar quantization with trained scales/zeros (out-of-range values clip)."""
+    quantized = np.round((data - zeros) / scales)
+    np.clip(quantized, 0, 2 ** quant_bits - 1, out=quantized)
+    return quantized.astype(_quant_dtype(quant_bits))
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# TRAINED EMBEDDING MODELS (Fit once, encode many batches)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+def _b64_array(array: np.ndarray) -> str:
+    """Base64 of the raw float32 bytes (embedding metadata encoding)."""
+    return base64.b64encode(np.ascontiguousarray(array, dtype=np.float32).tobytes()).decode('ascii')
+
+
+def _array_b64(text: str, *shape: int) -> np.ndarray:
+    """Inverse of _b64_array."""
+    return np.frombuffer(base64.b64decode(text), dtype=np.float32).reshape(shape)
+
+
+class _FitBudget:
+    """
+    Deadline of a time-budgeted PhiModel fit and the fallbacks it took.
+    
+    encode_rows rows (the batch compress() encodes and packs with the
+    `entropy` backend after fitting) have their time reserved; record
+    lands in meta['time_budget']. When even the cheapest plan cannot
+    finish in time, record gets deadline_met=False and estimated_seconds.
+    """
+    
+    def __init__(self, seconds: float, encode_rows: int = 0, entropy: str = 'auto'):
+        if not seconds > 0:
+            raise ValueError(f"time_budget must be positive seconds, got {seconds}")
+        self.deadline = time.perf_counter() + seconds
+        self.encode_rows = encode_rows
+        self.entropy = entropy
+        self.ivf_deadline = None  # perf_counter() deadlines set by PhiModel._plan_budget
+        self.kmeans_deadline = None
+        self.record = {'seconds': seconds, 'fallbacks': []}
+    
+    def remaining(self) -> float:
+        """Seconds left before the deadline (never negative)."""
+        return max(self.deadline - time.perf_counter(), 0.0)
+    
+    def elapsed(self) -> float:
+        """Seconds spent since the budget started."""
+        return time.perf_counter() - (self.deadline - self.record['seconds'])
+    
+    def warn_if_over(self, what: str):
+        """RuntimeWarning when `what` finished after the deadline."""
+        if time.perf_counter() > self.deadline:
+            warnings.warn(
+                f"{what} took {self.elapsed():.2f}s, over its time_budget of "
+                f"{self.record['seconds']}s", RuntimeWarning, stacklevel=3
+            )
+    
+    def share(self, fraction: float) -> float:
+        """Deadline (perf_counter value) after fraction of the time left."""
+        return time.perf_counter() + fraction * self.remaining()
+    
+    def fallback(self, name: str, **values):
+        """Note a fallback and the settings it chose."""
+        self.record['fallbacks'].append(name)
+        self.record.update(values)
+
+
+class PhiModel:
+    """
+    Trained embedding model: PCA basis plus scalar or block PQ quantizer.
+    
+    compress() on embeddings trains PCA (and k-means for PQ presets) on
+    every call and inlines the parameters as base64. A PhiModel is fit once
+    on a representative sample; encode() is then a projection and a
+    nearest-centroid lookup, and compress(..., model=model) payloads carry
+    only the 16-byte model_id (BLAKE2b-128 of the serialized parameters)
+    plus the codes. Out-of-range values clip to the trained quantizer range.
+    
+    Example:
+        >>> model = PhiModel("phi-pq-balanced").fit(sample)
+        >>> model.save("vectors.phimodel")
+        >>> blob = compress(batch, model=model)
+        >>> decompress(blob, model=PhiModel.load("vectors.phimodel"))
+    """
+    
+    DIGEST_SIZE = 16
+    
+    def __init__(self, preset: Union[str, dict] = "phi-balanced", workers: Optional[int] = None):
+        """
+        Args:
+            preset: Embedding preset name (or an already resolved preset dict)
+            workers: Threads for PQ training/encoding (default: all cores)
+        """
+        self.config = resolve_preset(preset) if isinstance(preset, str) else dict(preset)
+        self.workers = workers
+        self.meta = None
+        self.model_id = None
+    
+    def fit(self, sample: np.ndarray, 
+            rng: Union[None, int, np.random.Generator] = None,
+            time_budget: Optional[float] = None) -> 'PhiModel':
+        """
+        Learn the PCA basis and quantizer from sample rows; returns self.
+        
+        rng (a Generator or seed) makes PQ training reproducible.
+        time_budget (seconds) makes the fit anytime: the PCA covariance is
+        estimated from as many sampled rows as its share allows, and the
+        training rows and k-means iterations shrink to finish in time.
+        meta['time_budget'] lists the fallbacks taken (deadline_met=False
+        when even the cheapest plan overruns, which also warns); budgeted
+        fits depend on machine speed, so a seed alone no longer reproduces them.
+        """
+        if time_budget is None:
+            return self._fit(sample, rng)
+        budget = _FitBudget(time_budget)
+        self._fit(sample, rng, budget=budget)
+        budget.warn_if_over("PhiModel.fit()")
+        return self
+    
+    def refit(self, sample: np.ndarray, 
+              rng: Union[None, int, np.random.Generator] = None) -> 'PhiModel':
+        """
+        New model warm-started from this one (this model is unchanged).
         
-        for i in range(1, k):
-            # Distance to nearest centroid
-            distances = np.min(
-                [np.sum((data - c)**2, axis=1) for c in centroids[:i]], 
-                axis=0
+        Keeps the PCA basis and quantizer layout; scalar ranges and the
+        residual pass are re-estimated, and IVF centroids and PQ codebooks
+        are retrained by k-means starting from the current ones.
+        """
+        self._check_fitted()
+        meta = self.meta
+        config = dict(self.config, use_pq=self.has_pq, use_residual=self.has_residual)
+        if self.has_pq:
+            config.update(pq_blocks=meta['pq_blocks'], pq_centroids=meta['pq_centroids'],
+                          ivf_lists=meta.get('ivf_lists', 0))
+            if self.has_residual:
+                config['residual_bits'] = self.residual_bits
+        else:
+            config.update(quant_bits=self.quant_bits, per_component=meta['per_component'])
+        return PhiModel(config, self.workers)._fit(sample, rng, warm=self)
+    
+    def _fit(self, sample: np.ndarray, rng: Union[None, int, np.random.Generator],
+             warm: Optional['PhiModel'] = None, 
+             budget: Optional[_FitBudget] = None,
+             hold_out: bool = True) -> 'PhiModel':
+        """
+        fit()/refit() body; warm supplies the PCA basis and k-means starting
+        points, budget the deadline of a time-budgeted fit. hold_out=False
+        (compress(), which encodes every sample row) trains on all rows and
+        scores fit error on them instead of on held-out rows.
+        """
+        rng = np.random.default_rng(rng)
+        config = self.config
+        sample = np.asarray(sample, dtype=np.float32)
+        d = sample.shape[1]
+        
+        # Fit error is scored on held-out rows: training rows would bias it
+        # low and make in-distribution batches look drifted. A budgeted fit
+        # keeps the full sample for its sampled PCA and draws training rows
+        # from train_rows instead of copying it
+        holdout = None
+        train_rows = np.arange(len(sample))
+        n_holdout = min(DRIFT_SAMPLE_SIZE, int(len(sample) * DRIFT_HOLDOUT_SHARE))
+        if hold_out and n_holdout >= DRIFT_MIN_HOLDOUT:
+            held = np.zeros(len(sample), dtype=bool)
+            held[rng.choice(len(sample), n_holdout, replace=False)] = True
+            holdout, train_rows = sample[held], np.flatnonzero(~held)
+            if budget is None:
+                sample = sample[train_rows]
+        
+        # PCA reduction (anytime under a budget: covariance of sampled rows)
+        target_var = config.get('target_variance', 0.95)
+        if warm is not None:
+            transformed = warm.project(sample)
+            components, mean, k = warm.components, warm.mean, warm.k
+        elif target_var < 0.9999 and budget is not None:
+            mean, cov, pca_rows = _sampled_covariance(sample, budget.share(BUDGET_PCA_SHARE), rng)
+            components, k = _pca_components(cov, target_var)
+            transformed = None
+            if pca_rows < len(sample):
+                budget.fallback('sampled-pca', pca_rows=pca_rows)
+        elif target_var < 0.9999:
+            transformed, components, mean, k = _apply_pca_reduction(sample, target_var)
+        else:
+            transformed = sample
+            components = np.eye(d, dtype=np.float32)
+            mean = np.zeros(d, dtype=np.float32)
+            k = d
+        
+        # Time budget: train on the rows and k-means iterations it affords
+        max_iter = PQ_MAX_ITER
+        if budget is not None:
+            n_scored = min(len(train_rows), DRIFT_SAMPLE_SIZE) if holdout is None else len(holdout)
+            rows, max_iter = self._plan_budget(
+                sample, components, mean, budget, rng, len(train_rows), n_scored
             )
+            if rows < len(sample):
+                sample = sample[np.sort(rng.choice(train_rows, rows, replace=False))]
+                transformed = None
+        if transformed is None:
+            transformed = (sample - mean) @ components
+        
+        # PHASE-1: scalar quantizer ranges
+        if not config.get('use_pq', False):
+            quant_bits = config.get('quant_bits', 12)
+            per_component = config.get('per_component', True)
+            _, scales, zeros = _apply_quantization(transformed, quant_bits, per_component)
+            
+            meta = {
+                'has_pq': False,
+                'components': _b64_array(components),
+                'mean': _b64_array(mean),
+                'scales': _b64_array(scales),
+                'zeros': _b64_array(zeros),
+                'quant_bits': quant_bits,
+                'per_component': per_component,
+                'k': k,
+                'd': d
+            }
+            if budget is not None:
+                meta['time_budget'] = budget.record
+            return self._finish(meta, sample if holdout is None else holdout, rng)
+        
+        # PHASE-2: Block Product Quantization, of IVF list residuals when
+        # the preset has a coarse quantizer
+        use_residual = config.get('use_residual', False)
+        kmeans_options = dict(
+            memory_budget=config.get('pq_memory_budget', PQ_MEMORY_BUDGET),
+            train_size=config.get('pq_train_size', PQ_TRAIN_SIZE),
+            batch_size=config.get('pq_batch_size'),
+            workers=self.workers,
+            init=config.get('pq_init', 'kmeans++'),
+            max_iter=max_iter
+        )
+        
+        ivf = None
+        pq_input = transformed
+        if config.get('ivf_lists'):
+            if warm is not None:
+                n_lists = warm.ivf.n_centroids
+            else:
+                n_lists = self._ivf_lists(len(transformed))
+            ivf = BlockProductQuantizer(n_blocks=1, n_centroids=n_lists, **kmeans_options)
+            ivf.fit(transformed, rng, warm_start=None if warm is None else warm.ivf.codebooks,
+                    deadline=None if budget is None else budget.ivf_deadline)
+            pq_input = transformed - ivf.decode(ivf.encode(transformed), k)
+        
+        pq = BlockProductQuantizer(
+            n_blocks=config.get('pq_blocks', 8), 
+            n_centroids=config.get('pq_centroids', 256),
+            **kmeans_options
+        )
+        pq.fit(pq_input, rng, warm_start=None if warm is None else warm.pq.codebooks,
+               deadline=None if budget is None else budget.kmeans_deadline)
+        
+        meta = {
+            'has_pq': True,
+            'components': _b64_array(components),
+            'mean': _b64_array(mean),
+            'k': k,
+            'd': d,
+            'pq_blocks': pq.n_blocks,
+            'pq_centroids': pq.n_centroids,
+            'pq_block_size': pq.block_size,
+            'pq_codebooks': [_b64_array(cb) for cb in pq.codebooks],
+            'has_residual': use_residual
+        }
+        if pq.n_centroids <= PQ_NIBBLE_CENTROIDS:
+            meta['pq_nibbles'] = True
+        if ivf is not None:
+            meta['ivf_lists'] = ivf.n_centroids
+            meta['ivf_centroids'] = _b64_array(ivf.codebooks[0])
+        if budget is not None:
+            if pq.stopped_early or (ivf is not None and ivf.stopped_early):
+                budget.fallback('kmeans-deadline')
+            meta['time_budget'] = budget.record
+        
+        # Optional residual pass: PCA + scalar quantizer on what PQ misses
+        if use_residual:
+            residual = pq_input - pq.decode(pq.encode(pq_input), k)
             
-            # PHI-guided weighting
-            target_dist = np.percentile(distances, 100 / PHI)
-            dist_diff = np.abs(distances - target_dist)
-            weights = distances / (dist_diff + 1e-8)
-            weights = weights / (weights.sum() + 1e-10)
+            residual_var = config.get('residual_variance', 0.95)
+            residual_mean = residual.mean(axis=0).astype(np.float32)
+            residual_centered = residual - residual_mean
             
-            # Safety checks
-            if not np.isfinite(weights).all() or weights.sum() == 0:
-                weights = distances / (distances.sum() + 1e-10)
+            residual_cov = (residual_centered.T @ residual_centered) / len(residual)
+            residual_eigenvalues, residual_eigenvectors = np.linalg.eigh(residual_cov)
+            idx = np.argsort(residual_eigenvalues)[::-1]
+            residual_eigenvalues = residual_eigenvalues[idx]
+            residual_eigenvectors = residual_eigenvectors[:, idx]
             
-            try:
-                next_idx = np.random.choice(n, p=weights)
-            except:
-                next_idx = np.random.choice(n)
+            cumsum_var = np.cumsum(
+                residual_eigenvalues / (residual_eigenvalues.sum() + 1e-10)
+            )
+            residual_k = int(np.searchsorted(cumsum_var, residual_var) + 1)
+            residual_k = min(max(residual_k, 1), k)
             
-            centroids[i] = data[next_idx]
+            residual_components = residual_eigenvectors[:, :residual_k].astype(np.float32)
+            residual_transformed = residual_centered @ residual_components
+            
+            residual_bits = config.get('residual_bits', 8)
+            _, residual_scales, residual_zeros = \
+                _apply_quantization(residual_transformed, residual_bits, True)
+            
+            meta['residual_k'] = residual_k
+            meta['residual_components'] = _b64_array(residual_components)
+            meta['residual_mean'] = _b64_array(residual_mean)
+            meta['residual_scales'] = _b64_array(residual_scales)
+            meta['residual_zeros'] = _b64_array(residual_zeros)
+            meta['residual_bits'] = residual_bits
         
-        return centroids
+        return self._finish(meta, sample if holdout is None else holdout, rng)
     
-    def _kmeans_block(self, data: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
-        """K-means clustering on a single block."""
-        n, d = data.shape
+    def _ivf_lists(self, n: int) -> int:
+        """Coarse lists for n training rows (at least IVF_MIN_LIST_SIZE rows per list)."""
+        return min(self.config['ivf_lists'], max(1, n // IVF_MIN_LIST_SIZE))
+    
+    def _plan_budget(self, sample: np.ndarray, components: np.ndarray, mean: np.ndarray,
+                     budget: _FitBudget, rng: np.random.Generator, 
+                     n_train: int, n_scored: int) -> Tuple[int, int]:
+        """
+        Training rows (of n_train) and k-means iterations that fit in the time left.
         
-        # Handle edge case: more centroids than samples
-        if k >= n:
-            centroids = data.copy()
-            if k > n:
-                padding = np.zeros((k - n, d), dtype=np.float32)
-                centroids = np.vstack([centroids, padding])
-            labels = np.arange(n, dtype=np.uint16 if k <= 256 else np.uint32)
-            return centroids, labels
+        A pilot of BUDGET_PILOT_ROWS rows calibrates per-row costs. For the
+        IVF lists and one PQ block it times a seeded one-iteration k-means
+        plus one assignment pass. A probe model (the preset's layout with
+        the pilot's centroids in every block) then runs a real encode() and
+        section packing on the pilot, and both are scaled linearly. The
+        encode and packing of budget.encode_rows rows and the scoring of
+        n_scored fit-error rows are reserved first. The rest buys training
+        rows × (seeding, iterations, projection, IVF/residual passes).
+        Rows shrink before iterations, down to BUDGET_MIN_TRAIN rows per
+        centroid. Sets budget.ivf_deadline and budget.kmeans_deadline.
+        """
+        config = self.config
+        n = len(sample)
+        pilot = sample[rng.choice(n, min(n, BUDGET_PILOT_ROWS), replace=False)]
         
-        # Initialize with PHI-guided k-means++
-        centroids = self._phi_init_centroids(data, k)
+        started = time.perf_counter()
+        projected = (pilot - mean) @ components
+        project_cost = (time.perf_counter() - started) / len(pilot)
+        k = projected.shape[1]
         
-        # Lloyd's algorithm
-        for iteration in range(self.max_iter):
-            # Assign to nearest centroid
-            distances = np.sum(
-                (data[:, np.newaxis, :] - centroids[np.newaxis, :, :])**2, 
-                axis=2
-            )
-            labels = np.argmin(distances, axis=1).astype(
-                np.uint16 if k <= 256 else np.uint32
-            )
+        # Probe model: pilot-fitted parameters in the preset's layout
+        meta = {'components': _b64_array(components), 'mean': _b64_array(mean), 
+                'k': k, 'd': sample.shape[1]}
+        
+        # Per-row seconds of k-means (seeding + first iteration) and of each
+        # further iteration, per stage: IVF lists, then PQ blocks
+        fit_costs, iter_costs = [], []
+        n_centroids = 0
+        extra_passes = 0  # Full-training-set encodes besides the projection
+        if config.get('use_pq', False):
+            memory_budget = config.get('pq_memory_budget', PQ_MEMORY_BUDGET)
+            n_blocks = config.get('pq_blocks', 8)
+            n_centroids = config.get('pq_centroids', 256)
+            block_size = -(-k // n_blocks)
+            stages = [(projected[:, :block_size], n_centroids, n_blocks)]
+            if config.get('ivf_lists'):
+                train_rows = min(n_train, config.get('pq_train_size', PQ_TRAIN_SIZE) or n_train)
+                stages.insert(0, (projected, self._ivf_lists(train_rows), 1))
+                extra_passes += 1
+            extra_passes += int(config.get('use_residual', False))
             
-            # Update centroids
-            old_centroids = centroids.copy()
-            for j in range(k):
-                mask = labels == j
-                if mask.sum() > 0:
-                    centroids[j] = data[mask].mean(axis=0)
+            probe = BlockProductQuantizer(n_blocks=1, max_iter=1, memory_budget=memory_budget,
+                                          init=config.get('pq_init', 'kmeans++'))
+            stage_centroids = []
+            for data, n_stage, repeats in stages:
+                data = np.ascontiguousarray(data)
+                started = time.perf_counter()
+                centroids, _ = probe._kmeans_block(data, n_stage, rng)
+                fitted = time.perf_counter()
+                _nearest_centroids(data, centroids, memory_budget)
+                assigned = time.perf_counter()
+                fit_costs.append(repeats * (fitted - started) / len(pilot))
+                iter_costs.append(repeats * (assigned - fitted) / len(pilot))
+                stage_centroids.append(centroids)
             
-            # Check convergence
-            if np.allclose(centroids, old_centroids, atol=1e-6):
-                break
+            pq_centroids = stage_centroids[-1]
+            meta.update(has_pq=True, pq_blocks=n_blocks, pq_centroids=len(pq_centroids),
+                        pq_block_size=block_size, has_residual=False,
+                        pq_codebooks=[_b64_array(pq_centroids)] * n_blocks,
+                        pq_nibbles=len(pq_centroids) <= PQ_NIBBLE_CENTROIDS)
+            if config.get('ivf_lists'):
+                meta.update(ivf_lists=len(stage_centroids[0]), 
+                            ivf_centroids=_b64_array(stage_centroids[0]))
+            if config.get('use_residual', False):  # Upper bound: keep every component
+                meta.update(has_residual=True, residual_k=k, 
+                            residual_bits=config.get('residual_bits', 8),
+                            residual_components=_b64_array(np.eye(k, dtype=np.float32)),
+                            residual_mean=_b64_array(np.zeros(k, dtype=np.float32)),
+                            residual_scales=_b64_array(np.ones((1, k), dtype=np.float32)),
+                            residual_zeros=_b64_array(np.zeros((1, k), dtype=np.float32)))
+        else:
+            quant_bits = config.get('quant_bits', 12)
+            per_component = config.get('per_component', True)
+            _, scales, zeros = _apply_quantization(projected, quant_bits, per_component)
+            meta.update(has_pq=False, scales=_b64_array(scales), zeros=_b64_array(zeros),
+                        quant_bits=quant_bits, per_component=per_component)
         
-        return centroids.astype(np.float32), labels
-    
-    def fit(self, data: np.ndarray):
-        """Learn codebooks from training data."""
-        n, d = data.shape
+        probe_model = PhiModel(config, self.workers)
+        probe_model._load(meta)
+        started = time.perf_counter()
+        codes = probe_model.encode(pilot)
+        encode_cost = (time.perf_counter() - started) / len(pilot)
         
-        # Pad dimensions if needed
-        if d % self.n_blocks != 0:
-            pad_size = self.n_blocks - (d % self.n_blocks)
-            data = np.pad(data, ((0, 0), (0, pad_size)), mode='constant')
-            d_padded = d + pad_size
-        else:
-            d_padded = d
+        # Packing has a fixed per-section cost (backend choice, coder
+        # set-up): separate it by also packing the codes tiled
+        pack_fixed, pack_cost = 0.0, 0.0
+        if budget.encode_rows:
+            def pack_seconds(block: np.ndarray) -> float:
+                started = time.perf_counter()
+                sections = _embedding_sections(probe_model, block, False)
+                fse_compress_sections(sections, 9, budget.entropy)
+                return time.perf_counter() - started
+            
+            once = pack_seconds(codes)
+            tiles = min(BUDGET_PACK_TILES, budget.encode_rows // len(pilot))
+            if tiles >= 2:
+                tiled = pack_seconds(np.tile(codes, (tiles, 1)))
+                pack_cost = max(tiled - once, 0.0) / ((tiles - 1) * len(pilot))
+                pack_fixed = max(once - pack_cost * len(pilot), 0.0)
+            else:
+                pack_cost = once / len(pilot)
         
-        self.block_size = d_padded // self.n_blocks
-        self.codebooks = []
+        def row_cost(iterations: int) -> float:
+            return sum(fit_costs) + (iterations - 1) * sum(iter_costs) + \
+                project_cost + extra_passes * encode_cost
         
-        # Learn one codebook per block
-        for b in range(self.n_blocks):
-            block_data = data[:, b*self.block_size:(b+1)*self.block_size]
-            centroids, _ = self._kmeans_block(block_data, self.n_centroids)
-            self.codebooks.append(centroids)
+        # Reserve the batch encode + packing and the fit-error scoring, then
+        # spend the rest on training rows
+        reserved = (budget.encode_rows * (encode_cost + pack_cost) + pack_fixed 
+                    + n_scored * encode_cost) * BUDGET_ENCODE_SLACK
+        remaining = budget.remaining()
+        available = max(remaining - reserved, 0.0)
+        max_iter = PQ_MAX_ITER
+        rows = int(available / row_cost(max_iter))
+        min_rows = min(n_train, max(BUDGET_MIN_TRAIN * n_centroids, BUDGET_PILOT_ROWS))
+        if rows < min_rows:
+            rows = min_rows
+            if n_centroids:
+                spare = available / rows - row_cost(1)
+                max_iter = int(np.clip(1 + spare / max(sum(iter_costs), 1e-12), 1, PQ_MAX_ITER))
+                budget.fallback('fewer-iterations', max_iter=max_iter)
+        rows = min(rows, n_train)
+        if rows < n_train:
+            budget.fallback('fewer-train-rows', train_rows=rows)
+        
+        # The floor (min_rows, one iteration) may not fit at all: say so
+        needed = rows * row_cost(max_iter) + reserved
+        if needed > remaining:
+            estimated = budget.record['seconds'] - remaining + needed
+            budget.record.update(deadline_met=False, estimated_seconds=round(estimated, 3))
+        
+        # k-means deadlines: whatever is left after the reserved encode and
+        # the projection and IVF/residual passes, so k-means only stops
+        # early when it runs over what remains, not over its estimate. IVF
+        # gets the share its estimate has of the k-means total, and PQ the
+        # rest (including anything IVF leaves unused)
+        kmeans_seconds = [rows * (fit + (max_iter - 1) * step) for fit, step in zip(fit_costs, iter_costs)]
+        passes = rows * (project_cost + extra_passes * encode_cost) * BUDGET_ENCODE_SLACK
+        spendable = max(budget.remaining() - reserved - passes, 0.0)
+        ivf_share = kmeans_seconds[0] / max(sum(kmeans_seconds), 1e-12) if len(kmeans_seconds) > 1 else 0.0
+        now = time.perf_counter()
+        budget.ivf_deadline = now + ivf_share * spendable
+        budget.kmeans_deadline = now + spendable
+        return rows, max_iter
     
-    def encode(self, data: np.ndarray) -> np.ndarray:
-        """Encode data using learned codebooks."""
-        n, d = data.shape
-        d_padded = self.block_size * self.n_blocks
+    def _finish(self, meta: dict, sample: np.ndarray, rng: np.random.Generator) -> 'PhiModel':
+        """Load fitted metadata and record the fit error (on sample) that drift() compares against."""
+        self._load(meta)
+        if len(sample) > DRIFT_SAMPLE_SIZE:
+            sample = sample[rng.choice(len(sample), DRIFT_SAMPLE_SIZE, replace=False)]
+        meta['fit_error'] = round(self.reconstruction_error(sample), 8)
+        self._load(meta)
+        return self
+    
+    def reconstruction_error(self, batch: np.ndarray) -> float:
+        """Relative squared reconstruction error: Σ||x - x̂||² / Σ||x - mean||²."""
+        batch = np.asarray(batch, dtype=np.float32)
+        if len(batch) == 0:
+            return 0.0
+        error = batch - self.decode(self.encode(batch))
+        centered = batch - self.mean
+        return float(np.einsum('ij,ij->', error, error) / max(np.einsum('ij,ij->', centered, centered), 1e-12))
+    
+    def drift(self, batch: np.ndarray) -> Optional[float]:
+        """
+        Reconstruction error of batch relative to the model's fit error
+        (about 1.0 for in-distribution rows; None for models without one).
+        """
+        fit_error = self.meta.get('fit_error') if self.meta else None
+        if fit_error is None:
+            return None
+        return self.reconstruction_error(batch) / max(fit_error, 1e-12)
+    
+    def _load(self, meta: dict):
+        """Set the model arrays from (inline or serialized) metadata."""
+        self.meta = meta
+        self.meta_json = json.dumps(meta).encode('utf-8')
+        self.model_id = hashlib.blake2b(self.meta_json, digest_size=self.DIGEST_SIZE).digest()
         
-        # Pad if needed
-        if d < d_padded:
-            data = np.pad(data, ((0, 0), (0, d_padded - d)), mode='constant')
+        self.k = k = meta['k']
+        self.d = d = meta['d']
+        self.has_pq = meta.get('has_pq', False)
+        self.components = _array_b64(meta['components'], d, k)
+        self.mean = _array_b64(meta['mean'], d)
+        self._identity = k == d and np.array_equal(self.components, np.eye(d))
+        self.ivf = None
+        self.has_residual = False
         
-        # Determine code dtype
-        dtype = np.uint8 if self.n_centroids <= 256 else np.uint16
-        codes = np.zeros((n, self.n_blocks), dtype=dtype)
+        # Phase-1: one scale/zero per component, or one for the whole matrix
+        if not self.has_pq:
+            self.quant_bits = meta['quant_bits']
+            width = k if meta['per_component'] else 1
+            self.scales = _array_b64(meta['scales'], 1, width)
+            self.zeros = _array_b64(meta['zeros'], 1, width)
+            return
         
-        # Encode each block
-        for b in range(self.n_blocks):
-            block_data = data[:, b*self.block_size:(b+1)*self.block_size]
-            centroids = self.codebooks[b]
-            distances = np.sum(
-                (block_data[:, np.newaxis, :] - centroids[np.newaxis, :, :])**2,
-                axis=2
+        # Phase-2: codebooks, then the optional residual quantizer
+        pq_centroids = meta['pq_centroids']
+        pq_block_size = meta['pq_block_size']
+        self.pq = BlockProductQuantizer(
+            n_blocks=meta['pq_blocks'], n_centroids=pq_centroids,
+            memory_budget=self.config.get('pq_memory_budget', PQ_MEMORY_BUDGET),
+            workers=self.workers
+        )
+        self.pq.codebooks = [
+            _array_b64(cb, pq_centroids, pq_block_size) for cb in meta['pq_codebooks']
+        ]
+        self.pq.block_size = pq_block_size
+        self.pq_nibbles = meta.get('pq_nibbles', False)
+        
+        # IVF coarse quantizer: a one-block PQ whose codebook holds the list centroids
+        if meta.get('ivf_lists'):
+            self.ivf = BlockProductQuantizer(
+                n_blocks=1, n_centroids=meta['ivf_lists'],
+                memory_budget=self.pq.memory_budget, workers=self.workers
             )
-            codes[:, b] = np.argmin(distances, axis=1)
+            self.ivf.codebooks = [_array_b64(meta['ivf_centroids'], meta['ivf_lists'], k)]
+            self.ivf.block_size = k
         
-        return codes
+        self.has_residual = meta.get('has_residual', False)
+        if self.has_residual:
+            residual_k = meta['residual_k']
+            self.residual_bits = meta['residual_bits']
+            self.residual_components = _array_b64(meta['residual_components'], k, residual_k)
+            self.residual_mean = _array_b64(meta['residual_mean'], k)
+            self.residual_scales = _array_b64(meta['residual_scales'], 1, residual_k)
+            self.residual_zeros = _array_b64(meta['residual_zeros'], 1, residual_k)
     
-    def decode(self, codes: np.ndarray, original_dims: int) -> np.ndarray:
-        """Decode codes back to vectors."""
-        n = len(codes)
-        d_padded = self.block_size * self.n_blocks
-        reconstructed = np.zeros((n, d_padded), dtype=np.float32)
+    @classmethod
+    def from_meta(cls, meta: dict) -> 'PhiModel':
+        """Model from the metadata dict of an inline embeddings payload."""
+        model = cls({})
+        model._load(meta)
+        return model
+    
+    def _check_fitted(self):
+        """Raise unless fit(), load() or from_meta() has set the parameters."""
+        if self.meta is None:
+            raise ValueError("PhiModel is not fitted; call fit() or load() first")
+    
+    def project(self, batch: np.ndarray) -> np.ndarray:
+        """Rows in the model's PCA space (float32, shape (n, k))."""
+        self._check_fitted()
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.ndim != 2 or batch.shape[1] != self.d:
+            raise ValueError(f"Expected rows of {self.d} dims, got shape {batch.shape}")
+        if self._identity:
+            return batch
+        return (batch - self.mean) @ self.components
+    
+    def encode(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Codes for a batch of rows.
         
-        # Decode each block
-        for b in range(self.n_blocks):
-            block_codes = codes[:, b]
-            centroids = self.codebooks[b]
-            reconstructed[:, b*self.block_size:(b+1)*self.block_size] = \
-                centroids[block_codes]
+        Phase-1 models return the (n, k) quantized components. PQ models
+        return (n, pq_blocks) codebook indices, preceded by the IVF list ID
+        when the model has a coarse quantizer and followed by the residual
+        quantized components when it has a residual pass.
+        """
+        transformed = self.project(batch)
         
-        # Remove padding
-        return reconstructed[:, :original_dims]
+        if not self.has_pq:
+            return _quantize_fixed(transformed, self.scales, self.zeros, self.quant_bits)
+        
+        stages = []
+        if self.ivf is not None:
+            lists = self.ivf.encode(transformed)
+            transformed = transformed - self.ivf.decode(lists, self.k)
+            stages.append(lists)
+        
+        codes = self.pq.encode(transformed)
+        stages.append(codes)
+        
+        if self.has_residual:
+            residual = transformed - self.pq.decode(codes, self.k)
+            residual_transformed = (residual - self.residual_mean) @ self.residual_components
+            stages.append(_quantize_fixed(
+                residual_transformed, self.residual_scales, self.residual_zeros, self.residual_bits
+            ))
+        return self._join(stages)
+    
+    @staticmethod
+    def _join(stages: List[np.ndarray]) -> np.ndarray:
+        """Stage code arrays side by side in their common dtype."""
+        if len(stages) == 1:
+            return stages[0]
+        dtype = np.result_type(*stages)
+        return np.hstack([stage.astype(dtype) for stage in stages])
+    
+    def _stages(self) -> List[Tuple[type, int, bool]]:
+        """(storage dtype, columns, nibble-packed) of each code stage, in encode() order."""
+        if not self.has_pq:
+            return [(_quant_dtype(self.quant_bits), self.k, False)]
+        
+        stages = []
+        if self.ivf is not None:
+            stages.append((_pq_code_dtype(self.ivf.n_centroids), 1, False))
+        stages.append((_pq_code_dtype(self.pq.n_centroids), self.pq.n_blocks, self.pq_nibbles))
+        if self.has_residual:
+            stages.append((
+                _quant_dtype(self.residual_bits), self.residual_components.shape[1], False
+            ))
+        return stages
+    
+    def split_codes(self, codes: np.ndarray) -> Tuple[Optional[np.ndarray], np.ndarray, Optional[np.ndarray]]:
+        """PQ model codes as (IVF list IDs or None, PQ codes, residual codes or None)."""
+        start = 0 if self.ivf is None else 1
+        stop = start + self.pq.n_blocks
+        lists = codes[:, 0] if self.ivf is not None else None
+        residual = codes[:, stop:] if self.has_residual else None
+        return lists, codes[:, start:stop], residual
+    
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct float32 rows from encode() output."""
+        self._check_fitted()
+        
+        if not self.has_pq:
+            transformed = _dequantize(codes, self.scales, self.zeros)
+        else:
+            lists, pq_codes, residual_codes = self.split_codes(codes)
+            transformed = self.pq.decode(pq_codes, self.k)
+            if lists is not None:
+                transformed += self.ivf.codebooks[0][lists]
+            if residual_codes is not None:
+                residual_dequant = _dequantize(
+                    residual_codes, self.residual_scales, self.residual_zeros
+                )
+                transformed = transformed + \
+                    residual_dequant @ self.residual_components.T + self.residual_mean
+        
+        return _reverse_pca(transformed, self.components, self.mean)
+    
+    def code_sections(self, codes: np.ndarray) -> List[np.ndarray]:
+        """encode() output split into per-stage arrays in their storage dtypes."""
+        sections = []
+        column = 0
+        for dtype, width, nibbles in self._stages():
+            stage = codes[:, column:column + width]
+            if nibbles:
+                sections.append(_pack_nibbles(stage))
+            else:
+                sections.append(np.ascontiguousarray(stage, dtype=dtype))
+            column += width
+        return sections
+    
+    def read_codes(self, payload: bytes, offset: int, n: int) -> np.ndarray:
+        """Parse code_sections() bytes at payload[offset:] back into codes."""
+        stages = []
+        for dtype, width, nibbles in self._stages():
+            stored = (width + 1) // 2 if nibbles else width
+            stage = np.frombuffer(payload, dtype=dtype, count=n * stored, offset=offset)
+            offset += stage.nbytes
+            stage = stage.reshape(n, stored)
+            stages.append(_unpack_nibbles(stage, width) if nibbles else stage)
+        return self._join(stages)
+    
+    def to_bytes(self) -> bytes:
+        """Serialize as '<HH' MAGIC, FORMAT_VERSION + model_id + entropy-coded metadata blob."""
+        self._check_fitted()
+        return struct.pack('<HH', MAGIC, FORMAT_VERSION) + self.model_id + \
+            write_blob(fse_compress(self.meta_json))
+    
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'PhiModel':
+        """Load a model serialized with to_bytes()."""
+        magic, _ = struct.unpack('<HH', data[:4])
+        if magic != MAGIC:
+            raise ValueError(f"Invalid magic: {hex(magic)}")
+        model_id = data[4:4 + cls.DIGEST_SIZE]
+        meta_json, _ = read_blob(data, 4 + cls.DIGEST_SIZE)
+        model = cls.from_meta(json.loads(fse_decompress(meta_json).decode('utf-8')))
+        if model.model_id != model_id:
+            raise ValueError("Model parameters do not match its model_id")
+        return model
+    
+    def save(self, path: str):
+        """Write to_bytes() to a file."""
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+    
+    @classmethod
+    def load(cls, path: str) -> 'PhiModel':
+        """Read a model written by save()."""
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
-# PHASE-1: PCA & QUANTIZATION (Proven Foundation)
+# EMBEDDING ARCHIVE SEGMENTS (Append rows without rewriting)
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def _apply_pca_reduction(
-    data: np.ndarray, 
-    target_variance: float = 0.95
-) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
-    """Variance-aware PCA dimensionality reduction."""
-    n, d = data.shape
+APPEND_DRIFT_THRESHOLD = 1.25  # Refit when new rows reconstruct this much worse than the model's fit error
+APPEND_REFIT_HISTORY = 1.0  # Archive rows decoded into a refit sample, per new row
+
+
+def _embedding_sections(model: PhiModel, codes: np.ndarray, inline: bool) -> List[Tuple[bytes, int]]:
+    """Payload sections: '<I'-sized parameter JSON (or the model_id), then each code stage."""
+    if inline:
+        head = struct.pack('<I', len(model.meta_json)) + model.meta_json
+    else:
+        head = model.model_id
+    return [(head, 1)] + [(array.tobytes(), array.itemsize) for array in model.code_sections(codes)]
+
+
+def _embedding_containers(data: bytes) -> List[Tuple[int, int, int, bytes]]:
+    """(mode, flags, rows, compressed payload) of each container in an embeddings archive."""
+    containers = []
+    offset = 0
+    while offset < len(data):
+        magic, _, mode, flags, ndim, _ = struct.unpack('<HHBBBB', data[offset:offset + 8])
+        if magic != MAGIC:
+            raise ValueError(f"Invalid magic: {hex(magic)}")
+        if mode not in (MODE_EMBEDDINGS, MODE_EMBEDDINGS_MODEL):
+            raise ValueError(f"Not an embeddings archive (mode {mode})")
+        
+        n, = struct.unpack('<I', data[offset + 8:offset + 12])
+        offset += 8 + 4 * ndim
+        compressed_size, = struct.unpack('<I', data[offset:offset + 4])
+        containers.append((mode, flags, n, data[offset + 4:offset + 4 + compressed_size]))
+        offset += 4 + compressed_size
+    return containers
+
+
+def _segment_head(payload: bytes, flags: int, workers: Optional[int] = None) -> bytes:
+    """Leading section (parameters or model_id) of a container, decoding nothing else."""
+    if not flags & FLAG_ENTROPY_FSE:
+        return payload
+    if len(payload) > 4 and payload[4] == ENTROPY_SECTIONS:
+        return _decode_sections(payload[4:], workers, count=1)
+    return fse_decompress(payload, workers)
+
+
+def read_embedding_segments(
+    data: bytes, 
+    model: Optional[PhiModel] = None, 
+    workers: Optional[int] = None
+) -> List[Tuple[PhiModel, np.ndarray]]:
+    """
+    (model, codes) of every container of an embeddings archive, in row order.
     
-    # Center data
-    mean = data.mean(axis=0).astype(np.float32)
-    centered = data - mean
+    An archive is one compress() container optionally followed by append()
+    segments. Inline containers define a model; model-referenced ones use
+    the latest matching model seen so far, or `model`.
+    """
+    models = {} if model is None else {model.model_id: model}
+    segments = []
+    for mode, flags, n, payload in _embedding_containers(data):
+        if flags & FLAG_ENTROPY_FSE:
+            payload = fse_decompress(payload, workers)
+        
+        if mode == MODE_EMBEDDINGS_MODEL:
+            model_id = payload[:PhiModel.DIGEST_SIZE]
+            if model_id not in models:
+                if model is not None:
+                    raise ValueError(
+                        f"Model mismatch: need {model_id.hex()}, got {model.model_id.hex()}"
+                    )
+                raise ValueError(f"Data requires model {model_id.hex()}")
+            segment_model = models[model_id]
+            segments.append((segment_model, segment_model.read_codes(payload, PhiModel.DIGEST_SIZE, n)))
+        else:
+            meta_size, = struct.unpack('<I', payload[:4])
+            segment_model = PhiModel.from_meta(json.loads(payload[4:4 + meta_size].decode('utf-8')))
+            segment_model = models.setdefault(segment_model.model_id, segment_model)
+            segments.append((segment_model, segment_model.read_codes(payload, 4 + meta_size, n)))
+    return segments
+
+
+def _latest_model(data: bytes, model: Optional[PhiModel] = None, 
+                  workers: Optional[int] = None) -> PhiModel:
+    """Model of an archive's last container, decoding only segment heads."""
+    wanted = None
+    for mode, flags, _, payload in reversed(_embedding_containers(data)):
+        head = _segment_head(payload, flags, workers)
+        if mode == MODE_EMBEDDINGS_MODEL:
+            model_id = head[:PhiModel.DIGEST_SIZE]
+            if model is not None and model.model_id == model_id:
+                return model
+            wanted = wanted or model_id
+            continue
+        meta_size, = struct.unpack('<I', head[:4])
+        candidate = PhiModel.from_meta(json.loads(head[4:4 + meta_size].decode('utf-8')))
+        if wanted is None or candidate.model_id == wanted:
+            return candidate
+    raise ValueError(f"Data requires model {wanted.hex()}")
+
+
+def _refit_sample(data: bytes, rows: np.ndarray, model: Optional[PhiModel], 
+                  rng: np.random.Generator, workers: Optional[int] = None) -> np.ndarray:
+    """
+    New rows plus up to APPEND_REFIT_HISTORY × as many archive rows, drawn
+    uniformly over all segments and decoded, so a refit keeps fitting the
+    rows already stored instead of only the drifted batch.
+    """
+    segments = read_embedding_segments(data, model, workers)
+    ends = np.cumsum([len(codes) for _, codes in segments])
+    n_old = min(int(ends[-1]), int(len(rows) * APPEND_REFIT_HISTORY))
+    picks = np.sort(rng.choice(int(ends[-1]), n_old, replace=False))
+    
+    history = []
+    start = 0
+    for (segment_model, codes), end in zip(segments, ends.tolist()):
+        chosen = picks[(picks >= start) & (picks < end)] - start
+        if len(chosen):
+            history.append(segment_model.decode(codes[chosen]))
+        start = end
+    return np.vstack(history + [rows])
+
+
+def append(
+    data: bytes, 
+    rows: np.ndarray, 
+    model: Optional[PhiModel] = None, 
+    drift_threshold: float = APPEND_DRIFT_THRESHOLD,
+    seed: Union[None, int, np.random.Generator] = None,
+    workers: Optional[int] = None,
+    entropy: str = 'auto'
+) -> bytes:
+    """
+    Encode new rows as a segment to append to an embeddings archive.
+    
+    The rows are encoded with the archive's latest model (its existing PCA
+    basis and codebooks) and the returned container only references it by
+    model_id, so the cost is proportional to the new rows and the existing
+    bytes are never rewritten: data + segment is the grown archive, and
+    decompress()/search() read all segments in order.
+    
+    Drift is the rows' relative reconstruction error over the model's fit
+    error (PhiModel.drift), which is about 1.0 for in-distribution rows.
+    Above drift_threshold the model is refit warm-started from its current
+    codebooks on the new rows mixed with as many decoded archive rows, and
+    the segment carries the new parameters inline; earlier rows keep theirs
+    and later appends use the new model.
+    
+    Args:
+        data: Embeddings archive (compress() output plus earlier segments)
+        rows: New rows, same dimensionality as the archive
+        model: PhiModel of model-referenced archives (also skips parsing)
+        drift_threshold: Refit when drift exceeds this (inf: never refit)
+        seed: Seed or np.random.Generator for a refit
+        workers: Thread count for refit and entropy coding
+        entropy: Entropy backend of the segment (see compress)
+        
+    Example:
+        >>> segment = append(archive, new_rows)
+        >>> with open("vectors.phi", "ab") as f:
+        ...     f.write(segment)
+    """
+    current = _latest_model(data, model, workers)
+    rows = np.asarray(rows, dtype=np.float32)
+    
+    drift = current.drift(rows)
+    inline = drift is not None and drift > drift_threshold
+    if inline:
+        rng = np.random.default_rng(seed)
+        current = current.refit(_refit_sample(data, rows, model, rng, workers), rng)
+    
+    sections = _embedding_sections(current, current.encode(rows), inline)
+    mode = MODE_EMBEDDINGS if inline else MODE_EMBEDDINGS_MODEL
+    return _pack_container(
+        mode, rows.shape, 1, b''.join(section for section, _ in sections), sections,
+        entropy=entropy, workers=workers
+    )
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# COMPRESSED-DOMAIN SEARCH (Asymmetric distance on PQ codes)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+SEARCH_METRICS = ('l2', 'ip', 'cosine')
+IVF_NPROBE = 8  # Coarse lists scanned per query on IVF archives
+FASTSCAN_RERANK = 4  # 4-bit fast-scan shortlists this many rows per result for exact rescoring
+
+
+def read_embedding_codes(
+    data: bytes, 
+    model: Optional[PhiModel] = None, 
+    workers: Optional[int] = None
+) -> Tuple[PhiModel, np.ndarray]:
+    """
+    Model and codes of an embeddings archive, without reconstructing floats.
+    
+    Inline archives rebuild their PhiModel from the payload metadata;
+    MODE_EMBEDDINGS_MODEL archives need the model they were written with.
+    Archives whose appended segments were refit span several models: use
+    read_embedding_segments() for those.
+    """
+    groups = _group_segments(read_embedding_segments(data, model, workers))
+    if len(groups) > 1:
+        raise ValueError(
+            f"Archive spans {len(groups)} models (refit on append); use read_embedding_segments()"
+        )
+    model, codes, _ = groups[0]
+    return model, codes
+
+
+def _group_segments(
+    segments: List[Tuple[PhiModel, np.ndarray]]
+) -> List[Tuple[PhiModel, np.ndarray, np.ndarray]]:
+    """Segments merged per model: (model, codes, archive row IDs) in first-seen order."""
+    groups = {}
+    start = 0
+    for model, codes in segments:
+        rows = np.arange(start, start + len(codes), dtype=np.int64)
+        groups.setdefault(model.model_id, (model, [], []))
+        groups[model.model_id][1].append(codes)
+        groups[model.model_id][2].append(rows)
+        start += len(codes)
+    return [
+        (model, codes[0] if len(codes) == 1 else np.vstack(codes), np.concatenate(rows))
+        for model, codes, rows in groups.values()
+    ]
+
+
+class PQSearcher:
+    """
+    Top-k search over block PQ codes with asymmetric distance computation.
+    
+    Queries stay float: each is projected into the model's PCA space and a
+    (pq_blocks, pq_centroids) lookup table of per-block partial scores is
+    built against the codebooks. A row's score is then the sum of pq_blocks
+    table entries indexed by its codes, so the scan touches only the uint8
+    codes and never reconstructs vectors. Scores are exact for the PQ
+    reconstruction (residual codes, if any, are not used for ranking):
+    
+    - 'l2': squared Euclidean distance, ascending
+    - 'ip': inner product, descending
+    - 'cosine': inner product over reconstruction norms, descending
+    
+    With an IVF model (preset "phi-pq-ivf") rows are grouped into inverted
+    lists by their stored list ID; a query ranks the coarse centroids and
+    scans only the nprobe best lists, with l2 tables built per probed list
+    against the query-minus-centroid residual.
+    
+    4-bit models (preset "phi-pq-fastscan") keep codes packed two per byte
+    and scan them with quantized pair tables; see _search_fastscan.
+    
+    Example:
+        >>> searcher = PQSearcher.from_archive(compress(vectors, "phi-pq-balanced"))
+        >>> ids, scores = searcher.search(queries, top_k=10)
+    """
+    
+    def __init__(self, model: PhiModel, codes: np.ndarray, metric: str = 'l2',
+                 memory_budget: int = PQ_MEMORY_BUDGET):
+        """
+        Args:
+            model: Fitted PQ PhiModel the codes were encoded with
+            codes: encode() output of the model
+            metric: One of SEARCH_METRICS
+            memory_budget: Peak bytes of the per-tile (queries, rows) score block
+        """
+        if not model.has_pq:
+            raise ValueError("Search needs a PQ model (phi-pq-* presets)")
+        if metric not in SEARCH_METRICS:
+            raise ValueError(f"Unknown metric {metric!r}, expected one of {SEARCH_METRICS}")
+        
+        self.model = model
+        self.metric = metric
+        self.memory_budget = memory_budget
+        lists, pq_codes, _ = model.split_codes(codes)
+        self.codes = np.ascontiguousarray(pq_codes)
+        self.n = len(self.codes)
+        self.norms = None
+        self.packed = None
+        
+        # Inverted lists: row IDs grouped by list, list l at order[offsets[l]:offsets[l + 1]]
+        self.lists = lists
+        if lists is not None:
+            self.coarse = self._pad(model.ivf.codebooks[0])
+            self.order = np.argsort(lists, kind='stable')
+            self.list_offsets = np.concatenate([
+                [0], np.cumsum(np.bincount(lists, minlength=len(self.coarse)))
+            ])
+        
+        if metric == 'cosine':
+            pca_mean = self._pad(model.mean @ model.components)
+            if lists is None:
+                # ||mean + C·x'||² = ||mean||² + Σ_b (||c||² + 2 m'_b·c)
+                tables = np.stack([
+                    np.einsum('ij,ij->i', cb, cb) + 2 * (cb @ pca_mean[self._block(b)])
+                    for b, cb in enumerate(model.pq.codebooks)
+                ])
+                sq_norms = self._scan(tables[:, np.newaxis, :])[0]
+            else:
+                # List centroid and residual codes interact: reconstruct in tiles
+                n = len(self.codes)
+                sq_norms = np.empty(n, dtype=np.float32)
+                rows = max(1, memory_budget // (3 * 4 * len(pca_mean)))
+                for start in range(0, n, rows):
+                    y = self.coarse[lists[start:start + rows]] + \
+                        model.pq.decode(self.codes[start:start + rows], len(pca_mean))
+                    sq_norms[start:start + rows] = np.einsum('ij,ij->i', y, y) + 2 * (y @ pca_mean)
+            sq_norms += model.mean @ model.mean
+            self.norms = np.sqrt(np.maximum(sq_norms, 1e-12)).astype(np.float32)
+        
+        # 4-bit flat scans read two codes per byte; IVF gathers per-list rows unpacked
+        if model.pq_nibbles and lists is None:
+            self.packed = _pack_nibbles(self.codes)
+            self.codes = None
+    
+    @classmethod
+    def from_archive(cls, data: bytes, model: Optional[PhiModel] = None, 
+                     metric: str = 'l2', workers: Optional[int] = None) -> 'PQSearcher':
+        """Searcher over the codes of a PQ embeddings archive."""
+        model, codes = read_embedding_codes(data, model, workers)
+        return cls(model, codes, metric)
     
-    # Compute eigendecomposition
-    cov = (centered.T @ centered) / n
-    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    def _block(self, b: int) -> slice:
+        """Columns of PQ block b in the padded PCA space."""
+        size = self.model.pq.block_size
+        return slice(b * size, (b + 1) * size)
     
-    # Sort by eigenvalue (descending)
-    idx = np.argsort(eigenvalues)[::-1]
-    eigenvalues = eigenvalues[idx]
-    eigenvectors = eigenvectors[:, idx]
+    def _pad(self, projected: np.ndarray) -> np.ndarray:
+        """Zero-pad PCA coordinates to pq_blocks · block_size (as fit() does)."""
+        pad = self.model.pq.n_blocks * self.model.pq.block_size - projected.shape[-1]
+        if pad == 0:
+            return projected
+        widths = [(0, 0)] * (projected.ndim - 1) + [(0, pad)]
+        return np.pad(projected, widths, mode='constant')
     
-    # Select k components for target variance
-    total_var = eigenvalues.sum()
-    explained_var_ratio = eigenvalues / (total_var + 1e-10)
-    cumsum_var = np.cumsum(explained_var_ratio)
+    def lookup_tables(self, queries: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per-block score tables, shape (pq_blocks, n_queries, pq_centroids),
+        and the per-query constant added to every row's table sum.
+        """
+        model = self.model
+        queries = np.asarray(queries, dtype=np.float32)
+        
+        if self.metric == 'l2':
+            # ||q - x̂||² = ||q_perp||² + Σ_b ||q'_b - c||² with q' = (q - mean)·C
+            centered = queries - model.mean
+            projected = centered @ model.components
+            offset = np.einsum('ij,ij->i', centered, centered) - \
+                np.einsum('ij,ij->i', projected, projected)
+            projected = self._pad(projected)
+            tables = np.stack([
+                np.einsum('ij,ij->i', projected[:, self._block(b)], projected[:, self._block(b)])[:, np.newaxis]
+                - 2 * (projected[:, self._block(b)] @ cb.T)
+                + np.einsum('ij,ij->i', cb, cb)
+                for b, cb in enumerate(model.pq.codebooks)
+            ])
+            return tables.astype(np.float32), np.maximum(offset, 0).astype(np.float32)
+        
+        # q·x̂ = q·mean + Σ_b (q·C)_b · c
+        projected = self._pad(queries @ model.components)
+        tables = np.stack([
+            projected[:, self._block(b)] @ cb.T for b, cb in enumerate(model.pq.codebooks)
+        ])
+        return tables.astype(np.float32), (queries @ model.mean).astype(np.float32)
     
-    k = int(np.searchsorted(cumsum_var, target_variance) + 1)
-    k = min(max(k, 1), d)
+    def _scan(self, tables: np.ndarray, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Table sums for rows [start, stop): shape (n_queries, rows)."""
+        codes = self.codes[start:stop]
+        scores = np.zeros((tables.shape[1], len(codes)), dtype=np.float32)
+        for b in range(tables.shape[0]):
+            scores += np.take(tables[b], codes[:, b], axis=1)
+        return scores
     
-    # Project data
-    components = eigenvectors[:, :k].astype(np.float32)
-    transformed = centered @ components
+    def search(self, queries: np.ndarray, top_k: int = 10, 
+               nprobe: int = IVF_NPROBE) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best top_k rows per query.
+        
+        Args:
+            queries: One query (d,) or a batch (n_queries, d) in the original space
+            top_k: Results per query (clipped to the row count)
+            nprobe: IVF lists scanned per query (IVF models only)
+            
+        Returns:
+            (ids, scores), each (n_queries, top_k) - or (top_k,) for one
+            query - ordered best first; ids are int64 row indices. IVF
+            searches whose probed lists hold fewer than top_k rows pad
+            with id -1 and the worst possible score.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        single = queries.ndim == 1
+        queries = np.atleast_2d(queries)
+        if queries.shape[1] != self.model.d:
+            raise ValueError(f"Expected queries of {self.model.d} dims, got shape {queries.shape}")
+        
+        top_k = min(top_k, self.n)
+        if self.lists is not None:
+            ids, scores = self._search_ivf(queries, top_k, nprobe)
+        elif self.packed is not None:
+            ids, scores = self._search_fastscan(queries, top_k)
+        else:
+            ids, scores = self._search_flat(queries, top_k)
+        
+        if self.metric == 'cosine':
+            scores /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        if single:
+            return ids[0], scores[0]
+        return ids, scores
     
-    return transformed.astype(np.float32), components, mean, k
-
-
-def _apply_quantization(
-    data: np.ndarray, 
-    quant_bits: int, 
-    per_component: bool
-) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
-    """Apply scalar quantization to data."""
-    n_levels = 2 ** quant_bits
+    def _search_flat(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exhaustive scan of every row, tile by tile."""
+        n = self.n
+        n_queries = len(queries)
+        tables, offset = self.lookup_tables(queries)
+        sign = 1.0 if self.metric == 'l2' else -1.0  # Rank by ascending cost
+        
+        best_cost = np.full((n_queries, 0), np.inf, dtype=np.float32)
+        best_ids = np.zeros((n_queries, 0), dtype=np.int64)
+        rows = max(top_k, self.memory_budget // (3 * 4 * n_queries))
+        
+        for start in range(0, n, rows):
+            scores = self._scan(tables, start, start + rows)
+            scores += offset[:, np.newaxis]
+            if self.norms is not None:
+                scores /= self.norms[start:start + rows]
+            
+            # Merge this tile's candidates with the running best
+            cost = np.hstack([best_cost, sign * scores])
+            ids = np.hstack([
+                best_ids, np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+            ])
+            if cost.shape[1] > top_k:
+                keep = np.argpartition(cost, top_k - 1, axis=1)[:, :top_k]
+                cost = np.take_along_axis(cost, keep, axis=1)
+                ids = np.take_along_axis(ids, keep, axis=1)
+            best_cost, best_ids = cost, ids
+        
+        order = np.argsort(best_cost, axis=1, kind='stable')
+        ids = np.take_along_axis(best_ids, order, axis=1)
+        scores = sign * np.take_along_axis(best_cost, order, axis=1)
+        return ids, scores
     
-    # Compute min/max
-    if per_component:
-        mins = data.min(axis=0, keepdims=True)
-        maxs = data.max(axis=0, keepdims=True)
-    else:
-        mins = np.array([[data.min()]])
-        maxs = np.array([[data.max()]])
+    def _search_fastscan(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exhaustive scan of packed 4-bit codes with quantized pair tables.
+        
+        Each block's 16-entry cost table is quantized to 0-255 (per-block
+        bias, one scale per query) and adjacent blocks are fused into a
+        256-entry uint16 table indexed directly by the packed byte, so a
+        row costs pq_blocks / 2 small-integer gathers. The approximate sums
+        shortlist FASTSCAN_RERANK · top_k rows per tile, which are rescored
+        exactly with the float tables before the running top-k merge.
+        """
+        n = self.n
+        n_queries = len(queries)
+        n_blocks = self.model.pq.n_blocks
+        tables, offset = self.lookup_tables(queries)
+        sign = 1.0 if self.metric == 'l2' else -1.0
+        
+        # Quantized cost tables (lower is better), padded to whole block pairs
+        costs = sign * tables
+        bias = costs.min(axis=2, keepdims=True)
+        scale = np.maximum((costs - bias).max(axis=(0, 2)), 1e-12) / 255
+        quantized = np.round((costs - bias) / scale[np.newaxis, :, np.newaxis]).astype(np.uint16)
+        if n_blocks % 2:
+            quantized = np.concatenate([quantized, np.zeros_like(quantized[:1])])
+        byte = np.arange(256)
+        pair_tables = quantized[0::2][:, :, byte & 0x0F] + quantized[1::2][:, :, byte >> 4]
+        acc_dtype = np.uint16 if 510 * len(pair_tables) < 1 << 16 else np.uint32
+        bias_sum = bias.sum(axis=0)[:, 0]
+        
+        best_cost = np.full((n_queries, 0), np.inf, dtype=np.float32)
+        best_ids = np.zeros((n_queries, 0), dtype=np.int64)
+        shortlist = min(n, FASTSCAN_RERANK * top_k)
+        rows = max(shortlist, self.memory_budget // (3 * 4 * n_queries))
+        
+        for start in range(0, n, rows):
+            packed = self.packed[start:start + rows]
+            acc = np.zeros((n_queries, len(packed)), dtype=acc_dtype)
+            for p in range(len(pair_tables)):
+                acc += np.take(pair_tables[p], packed[:, p], axis=1)
+            
+            # Approximate scores in the same units as the exact ones
+            approx = sign * (acc * scale[:, np.newaxis] + bias_sum[:, np.newaxis]) + offset[:, np.newaxis]
+            if self.norms is not None:
+                approx /= self.norms[start:start + rows]
+            approx_cost = sign * approx
+            if approx_cost.shape[1] > shortlist:
+                candidates = np.argpartition(approx_cost, shortlist - 1, axis=1)[:, :shortlist]
+            else:
+                candidates = np.broadcast_to(np.arange(approx_cost.shape[1]), approx_cost.shape)
+            
+            # Exact rescoring of the shortlist with the float tables
+            codes = _unpack_nibbles(packed[candidates.reshape(-1)], n_blocks)
+            codes = codes.reshape(n_queries, candidates.shape[1], n_blocks)
+            query_index = np.arange(n_queries)[:, np.newaxis]
+            scores = offset[:, np.newaxis] + sum(
+                tables[b][query_index, codes[:, :, b]] for b in range(n_blocks)
+            )
+            ids = candidates + start
+            if self.norms is not None:
+                scores = scores / self.norms[ids]
+            
+            cost = np.hstack([best_cost, sign * scores])
+            ids = np.hstack([best_ids, ids])
+            if cost.shape[1] > top_k:
+                keep = np.argpartition(cost, top_k - 1, axis=1)[:, :top_k]
+                cost = np.take_along_axis(cost, keep, axis=1)
+                ids = np.take_along_axis(ids, keep, axis=1)
+            best_cost, best_ids = cost, ids
+        
+        order = np.argsort(best_cost, axis=1, kind='stable')
+        ids = np.take_along_axis(best_ids, order, axis=1)
+        scores = sign * np.take_along_axis(best_cost, order, axis=1)
+        return ids, scores
     
-    # Compute scale
-    ranges = maxs - mins
-    ranges = np.where(ranges < 1e-8, 1.0, ranges)
+    def _search_ivf(self, queries: np.ndarray, top_k: int, 
+                    nprobe: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Scan only the nprobe inverted lists nearest each query."""
+        model = self.model
+        codebooks = model.pq.codebooks
+        nprobe = max(1, min(nprobe, len(self.coarse)))
+        sign = 1.0 if self.metric == 'l2' else -1.0
+        
+        # Query terms shared by all lists, and the coarse ranking
+        if self.metric == 'l2':
+            centered = queries - model.mean
+            projected = centered @ model.components
+            offset = np.maximum(
+                np.einsum('ij,ij->i', centered, centered) - np.einsum('ij,ij->i', projected, projected), 0
+            )
+            projected = self._pad(projected)
+            coarse_cost = -2 * (projected @ self.coarse.T) + \
+                np.einsum('ij,ij->i', self.coarse, self.coarse)
+            cb_norms = [np.einsum('ij,ij->i', cb, cb) for cb in codebooks]
+        else:
+            projected = self._pad(queries @ model.components)
+            offset = queries @ model.mean
+            coarse_cost = -(projected @ self.coarse.T)
+        probes = np.argpartition(coarse_cost, nprobe - 1, axis=1)[:, :nprobe]
+        
+        ids = np.full((len(queries), top_k), -1, dtype=np.int64)
+        scores = np.full((len(queries), top_k), sign * np.inf, dtype=np.float32)
+        
+        for qi, probe in enumerate(probes):
+            starts = self.list_offsets[probe]
+            sizes = self.list_offsets[probe + 1] - starts
+            rows = self.order[_expand_spans(starts, sizes)]
+            if len(rows) == 0:
+                continue
+            codes = self.codes[rows]
+            member = np.repeat(np.arange(nprobe), sizes)  # Probe slot of each row
+            
+            if self.metric == 'l2':
+                # ||q' - c_l - x_r||²: one (nprobe, pq_centroids) table per block
+                residual = projected[qi] - self.coarse[probe]
+                row_scores = np.full(len(rows), offset[qi], dtype=np.float32)
+                for b, cb in enumerate(codebooks):
+                    r = residual[:, self._block(b)]
+                    table = np.einsum('ij,ij->i', r, r)[:, np.newaxis] - 2 * (r @ cb.T) + cb_norms[b]
+                    row_scores += table[member, codes[:, b]]
+            else:
+                # q·mean + q'·c_l + Σ_b q'_b·c: tables are shared by all lists
+                row_scores = offset[qi] + (self.coarse[probe] @ projected[qi])[member]
+                for b, cb in enumerate(codebooks):
+                    row_scores += (cb @ projected[qi, self._block(b)])[codes[:, b]]
+                if self.norms is not None:
+                    row_scores /= self.norms[rows]
+            
+            cost = sign * row_scores
+            k = min(top_k, len(rows))
+            keep = np.argpartition(cost, k - 1)[:k] if len(rows) > k else np.arange(k)
+            keep = keep[np.argsort(cost[keep], kind='stable')]
+            ids[qi, :k] = rows[keep]
+            scores[qi, :k] = row_scores[keep]
+        
+        return ids, scores
+
+
+def search(
+    data: bytes, 
+    queries: np.ndarray, 
+    top_k: int = 10, 
+    metric: str = 'l2', 
+    model: Optional[PhiModel] = None, 
+    workers: Optional[int] = None,
+    nprobe: int = IVF_NPROBE
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Top-k rows of a PQ embeddings archive for each query, scored on the codes.
     
-    # Quantize
-    normalized = (data - mins) / ranges
-    quantized_float = normalized * (n_levels - 1)
+    Builds a PQSearcher for one call; keep the searcher to serve repeated
+    queries without re-reading the archive. Archives with appended segments
+    are searched per model and the results merged; ids are archive rows.
     
-    # Cast to appropriate dtype
-    if quant_bits <= 8:
-        quantized = np.round(quantized_float).astype(np.uint8)
-    elif quant_bits <= 16:
-        quantized = np.round(quantized_float).astype(np.uint16)
-    else:
-        quantized = np.round(quantized_float).astype(np.uint32)
+    Example:
+        >>> compressed = compress(vectors, preset="phi-pq-balanced")
+        >>> ids, scores = search(compressed, query, top_k=5, metric='cosine')
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    single = queries.ndim == 1
     
-    scales = ranges / (n_levels - 1)
-    zeros = mins
+    ids, scores = [], []
+    for group_model, codes, rows in _group_segments(read_embedding_segments(data, model, workers)):
+        searcher = PQSearcher(group_model, codes, metric)
+        group_ids, group_scores = searcher.search(np.atleast_2d(queries), top_k, nprobe)
+        ids.append(np.where(group_ids >= 0, rows[group_ids], -1))
+        scores.append(group_scores)
     
-    return quantized, scales.astype(np.float32), zeros.astype(np.float32)
-
-
-def _dequantize(
-    quantized: np.ndarray, 
-    scales: np.ndarray, 
-    zeros: np.ndarray
-) -> np.ndarray:
-    """Reverse quantization."""
-    return quantized.astype(np.float32) * scales + zeros
-
-
-def _reverse_pca(
-    transformed: np.ndarray, 
-    components: np.ndarray, 
-    mean: np.ndarray
-) -> np.ndarray:
-    """Reverse PCA projection."""
-    reconstructed = transformed @ components.T
-    return reconstructed + mean
+    ids, scores = np.hstack(ids), np.hstack(scores)
+    order = np.argsort(scores if metric == 'l2' else -scores, axis=1, kind='stable')[:, :top_k]
+    ids = np.take_along_axis(ids, order, axis=1)
+    scores = np.take_along_axis(scores, order, axis=1)
+    if single:
+        return ids[0], scores[0]
+    return ids, scores
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1058,6 +4820,29 @@ PRESETS = {
         "description": "Phase-2: Aggressive PQ - 15-25× @ 0.96+ cosine"
     },
     
+    "phi-pq-ivf": {
+        "target_variance": 0.95,
+        "quant_bits": 10,
+        "per_component": True,
+        "use_pq": True,
+        "pq_blocks": 8,
+        "pq_centroids": 256,
+        "ivf_lists": 1024,
+        "use_residual": False,
+        "description": "Phase-2: IVF + PQ of list residuals - sub-linear search()"
+    },
+    
+    "phi-pq-fastscan": {
+        "target_variance": 0.95,
+        "quant_bits": 10,
+        "per_component": True,
+        "use_pq": True,
+        "pq_blocks": 16,
+        "pq_centroids": 16,
+        "use_residual": False,
+        "description": "Phase-2: 4-bit PQ, 16 blocks packed in 8 bytes - fast-scan search()"
+    },
+    
     # Specialized Presets
     "phi-global": {
         "target_variance": 0.95,
@@ -1068,6 +4853,47 @@ PRESETS = {
         "description": "Text-optimized - 13-24× lossless"
     },
     
+    "phi-global-parallel": {
+        "target_variance": 0.95,
+        "quant_bits": 12,
+        "per_component": True,
+        "use_pq": False,
+        "use_residual": False,
+        "block_size": 1 << 20,
+        "description": "Text, independent 1 MB blocks - parallel + random access"
+    },
+    
+    "phi-global-long": {
+        "target_variance": 0.95,
+        "quant_bits": 12,
+        "per_component": True,
+        "use_pq": False,
+        "use_residual": False,
+        "long_window": LONG_RANGE_WINDOW,
+        "description": "Text, 8 MB long-range matching - large logs"
+    },
+    
+    "phi-global-fast": {
+        "target_variance": 0.95,
+        "quant_bits": 12,
+        "per_component": True,
+        "use_pq": False,
+        "use_residual": False,
+        "level": 1,
+        "description": "Text, level 1 greedy/shallow search - hot ingest"
+    },
+    
+    "phi-global-archive": {
+        "target_variance": 0.95,
+        "quant_bits": 12,
+        "per_component": True,
+        "use_pq": False,
+        "use_residual": False,
+        "level": 9,
+        "entropy": "archival",
+        "description": "Text, level 9 exhaustive search + lzma/bz2 entropy - cold archival"
+    },
+    
     "phi-live": {
         "target_variance": 0.94,
         "quant_bits": 12,
@@ -1095,15 +4921,23 @@ def detect_data_type(data: Any, filename: str = "") -> str:
     """
     Automatically detect data type for optimal codec selection.
     
-    Returns: 'text', 'embeddings', 'timeseries', or 'numeric'
+    Returns: 'text', 'jsonl', 'tokens', 'embeddings', 'timeseries', or 'numeric'
     """
+    # Token-ID streams (1-D, or 2-D batches of sequences) are stored losslessly
+    if isinstance(data, np.ndarray) and _looks_like_tokens(data):
+        return 'tokens'
+    
     # Check filename extension
     if filename:
         fname_lower = filename.lower()
         
+        jsonl_exts = {'.jsonl', '.ndjson'}
+        if any(fname_lower.endswith(ext) for ext in jsonl_exts):
+            return 'jsonl'
+        
         text_exts = {'.txt', '.md', '.json', '.log', '.xml'}
         if any(fname_lower.endswith(ext) for ext in text_exts):
-            return 'text'
+            return 'jsonl' if _looks_like_jsonl(data) else 'text'
         
         ts_indicators = ['timeseries', 'sensor', 'signal', 'iot', 'stream']
         if any(ind in fname_lower for ind in ts_indicators):
@@ -1116,7 +4950,7 @@ def detect_data_type(data: Any, filename: str = "") -> str:
             text = data.decode('utf-8')
             printable = sum(1 for c in text if c.isprintable() or c in '\n\r\t')
             if printable / len(text) > 0.9:
-                return 'text'
+                return 'jsonl' if _looks_like_jsonl(data) else 'text'
         except:
             pass
         return 'numeric'
@@ -1149,7 +4983,14 @@ def detect_data_type(data: Any, filename: str = "") -> str:
 def compress(
     data: Union[bytes, str, np.ndarray], 
     preset: str = "phi-balanced", 
-    filename: str = ""
+    filename: str = "",
+    workers: Optional[int] = None,
+    dictionary: Optional['PhiDictionary'] = None,
+    level: Optional[int] = None,
+    entropy: Optional[str] = None,
+    model: Optional['PhiModel'] = None,
+    seed: Union[None, int, np.random.Generator] = None,
+    time_budget: Optional[float] = None
 ) -> bytes:
     """
     Universal compression with automatic codec selection.
@@ -1164,6 +5005,28 @@ def compress(
         data: Input data (bytes, str, or numpy array)
         preset: Preset name (default: "phi-balanced")
         filename: Optional filename for auto-detection hints
+        workers: Process pool size for block-mode text presets and
+                 thread count of JSON-lines columns and the chunked entropy
+                 stage (default: all cores; small inputs run serially)
+        dictionary: Trained PhiDictionary for small text records
+        level: Text speed level 1-9, 1 fastest, 9 exhaustive
+               (default: the preset's level, else 6)
+        entropy: Final-stage backend: 'auto' (default), 'archival' (prefer
+                 lzma/bz2) or a name from ENTROPY_BACKENDS; used by every
+                 mode, including block, dictionary, JSON-lines and binary
+        model: Fitted PhiModel for embeddings; the payload stores codes and
+               the model_id only (preset embedding settings are ignored)
+        seed: Seed or np.random.Generator for PQ training; a fixed seed
+              gives byte-identical output (default: fresh entropy)
+        time_budget: Seconds for an embeddings call (deadline-aware mode):
+                     the model fit takes the cheaper paths that finish in
+                     time (sampled-row PCA, fewer training rows, fewer
+                     k-means iterations) and lists them in the payload
+                     metadata under 'time_budget'. If even the cheapest
+                     plan cannot finish (encoding alone is too slow), that
+                     record has deadline_met=False and estimated_seconds,
+                     and an overrun emits a RuntimeWarning. Only for
+                     embeddings without model= (ValueError otherwise)
         
     Returns:
         Compressed bytes in PHI format
@@ -1179,171 +5042,116 @@ def compress(
         >>> 
         >>> # Embeddings (Phase-2, high compression)
         >>> compressed = compress(embeddings, preset="phi-pq-balanced")
+        >>> 
+        >>> # Many batches against one trained model
+        >>> model = PhiModel("phi-pq-balanced").fit(embeddings)
+        >>> compressed = compress(batch, model=model)
     """
-    start_time = time.time()
+    start_time = time.perf_counter()  # Same clock as _FitBudget deadlines
     
     # Auto-detect data type
     data_type = detect_data_type(data, filename)
     config = resolve_preset(preset)
+    extra_flags = 0
+    
+    if level is None:
+        level = config.get('level', DEFAULT_LEVEL)
+    if level not in SYMBOLIC_LEVELS:
+        raise ValueError(f"level must be 1-9, got {level}")
+    entropy_level = 9
+    entropy = entropy or config.get('entropy', 'auto')
+    if entropy not in ENTROPY_BACKENDS and entropy not in ('auto', 'archival'):
+        raise ValueError(f"Unknown entropy backend: {entropy}")
+    if time_budget is not None and (
+        model is not None or not isinstance(data, np.ndarray) 
+        or data_type in ('text', 'jsonl', 'tokens', 'timeseries')
+    ):
+        raise ValueError("time_budget only applies to embeddings fit by this call (no model=)")
+    sections = None  # Numeric payload sections, each entropy-modeled separately
+    
+    # BINARY BYTES (not text): shuffle filter or store, never the LZ77 path
+    if isinstance(data, bytes) and data_type not in ('text', 'jsonl'):
+        payload = BinaryCodec(level, entropy).compress(data, workers)
+        mode = MODE_BINARY
+        shape = (len(data),)
+        dtype_code = 0
     
     # TEXT COMPRESSION
-    if data_type == 'text' or isinstance(data, bytes):
+    elif data_type in ('text', 'jsonl') or isinstance(data, str):
         if isinstance(data, str):
             data = data.encode('utf-8')
         
-        codec = SymbolicCodec()
-        payload = codec.compress(data)
+        block_size = config.get('block_size')
+        entropy_level = SYMBOLIC_LEVELS[level]['entropy_level']
+        
+        # JSON-lines: columnar when the records re-serialize exactly
+        columnar = None
+        if data_type == 'jsonl' and dictionary is None and not block_size:
+            columnar = JsonLinesCodec(level, entropy).compress(data, workers)
+        
+        # Trained dictionary: payload references the dictionary by ID
+        if dictionary is not None:
+            payload = struct.pack('<I', dictionary.dict_id) + \
+                dictionary.compress_record(data, level, entropy)
+            mode = MODE_SYMBOLIC_DICT
+            extra_flags = FLAG_SPLIT_STREAMS
+        
+        # Columnar JSON-lines: columns are entropy-coded individually
+        elif columnar is not None:
+            payload = columnar
+            mode = MODE_JSONL
         
-        mode = MODE_SYMBOLIC
+        # Independent blocks: no outer entropy pass so blocks stay addressable
+        elif block_size:
+            payload = _encode_text_blocks(data, block_size, workers, level, entropy)
+            mode = MODE_SYMBOLIC_BLOCKS
+            extra_flags = FLAG_SPLIT_STREAMS
+        else:
+            long_window = config.get('long_window', 0)
+            codec = SymbolicCodec(
+                split_streams=True, long_window=long_window, level=level, entropy=entropy
+            )
+            payload = codec.compress(data)
+            
+            mode = MODE_SYMBOLIC
+            extra_flags = FLAG_SPLIT_STREAMS
         shape = (len(data),)
         dtype_code = 0
     
+    # TOKEN-ID COMPRESSION (lossless integers)
+    elif data_type == 'tokens' and model is None:
+        payload = TokenCodec().compress(data)
+        mode = MODE_TOKENS
+        shape = data.shape
+        dtype_code = 2
+    
     # NUMERIC COMPRESSION
     elif isinstance(data, np.ndarray):
         
+        # TRAINED MODEL: payload references the model by content hash
+        if model is not None:
+            sections = _embedding_sections(model, model.encode(data), inline=False)
+            payload = b''.join(section for section, _ in sections)
+            mode = MODE_EMBEDDINGS_MODEL
+        
         # TIMESERIES
-        if data_type == 'timeseries':
+        elif data_type == 'timeseries':
             payload = _encode_dod_rle(data.astype(np.float32))
+            sections = [(payload, 1)]
             mode = MODE_TS_DOD_RLE
         
-        # EMBEDDINGS (Phase-1 OR Phase-2)
+        # EMBEDDINGS (Phase-1 OR Phase-2): fit a model on this batch and
+        # inline its parameters
         else:
-            target_var = config.get('target_variance', 0.95)
-            use_pq = config.get('use_pq', False)
-            use_residual = config.get('use_residual', False)
-            
-            # Step 1: PCA reduction
-            if target_var < 0.9999:
-                transformed, components, mean, k = _apply_pca_reduction(
-                    data.astype(np.float32), 
-                    target_var
-                )
-            else:
-                transformed = data.astype(np.float32)
-                components = np.eye(data.shape[1], dtype=np.float32)
-                mean = np.zeros(data.shape[1], dtype=np.float32)
-                k = data.shape[1]
-            
-            # PHASE-2: Block Product Quantization
-            if use_pq:
-                pq_blocks = config.get('pq_blocks', 8)
-                pq_centroids = config.get('pq_centroids', 256)
-                
-                pq = BlockProductQuantizer(
-                    n_blocks=pq_blocks, 
-                    n_centroids=pq_centroids
-                )
-                pq.fit(transformed)
-                
-                # Encode with PQ
-                pq_codes = pq.encode(transformed)
-                
-                # Reconstruct for residual calculation
-                pq_reconstructed = pq.decode(pq_codes, k)
-                
-                # Optional Residual Pass
-                if use_residual:
-                    residual = transformed - pq_reconstructed
-                    
-                    # PCA on residual
-                    residual_var = config.get('residual_variance', 0.95)
-                    residual_mean = residual.mean(axis=0).astype(np.float32)
-                    residual_centered = residual - residual_mean
-                    
-                    residual_cov = (residual_centered.T @ residual_centered) / len(residual)
-                    residual_eigenvalues, residual_eigenvectors = np.linalg.eigh(residual_cov)
-                    idx = np.argsort(residual_eigenvalues)[::-1]
-                    residual_eigenvalues = residual_eigenvalues[idx]
-                    residual_eigenvectors = residual_eigenvectors[:, idx]
-                    
-                    cumsum_var = np.cumsum(
-                        residual_eigenvalues / (residual_eigenvalues.sum() + 1e-10)
-                    )
-                    residual_k = int(np.searchsorted(cumsum_var, residual_var) + 1)
-                    residual_k = min(max(residual_k, 1), k)
-                    
-                    residual_components = residual_eigenvectors[:, :residual_k].astype(np.float32)
-                    residual_transformed = residual_centered @ residual_components
-                    
-                    # Quantize residual
-                    residual_bits = config.get('residual_bits', 8)
-                    residual_quantized, residual_scales, residual_zeros = \
-                        _apply_quantization(residual_transformed, residual_bits, True)
-                else:
-                    residual_quantized = None
-                    residual_components = None
-                    residual_scales = None
-                    residual_zeros = None
-                    residual_mean = None
-                
-                # Serialize PQ metadata
-                payload = bytearray()
-                
-                meta = {
-                    'has_pq': True,
-                    'components': base64.b64encode(components.tobytes()).decode('ascii'),
-                    'mean': base64.b64encode(mean.tobytes()).decode('ascii'),
-                    'k': k,
-                    'd': data.shape[1],
-                    'pq_blocks': pq_blocks,
-                    'pq_centroids': pq_centroids,
-                    'pq_block_size': pq.block_size,
-                    'pq_codebooks': [
-                        base64.b64encode(cb.tobytes()).decode('ascii') 
-                        for cb in pq.codebooks
-                    ],
-                    'has_residual': use_residual
-                }
-                
-                if use_residual and residual_quantized is not None:
-                    meta['residual_k'] = residual_k
-                    meta['residual_components'] = \
-                        base64.b64encode(residual_components.tobytes()).decode('ascii')
-                    meta['residual_mean'] = \
-                        base64.b64encode(residual_mean.tobytes()).decode('ascii')
-                    meta['residual_scales'] = \
-                        base64.b64encode(residual_scales.tobytes()).decode('ascii')
-                    meta['residual_zeros'] = \
-                        base64.b64encode(residual_zeros.tobytes()).decode('ascii')
-                    meta['residual_bits'] = residual_bits
-                
-                meta_json = json.dumps(meta).encode('utf-8')
-                payload.extend(struct.pack('<I', len(meta_json)))
-                payload.extend(meta_json)
-                payload.extend(pq_codes.tobytes())
-                
-                if use_residual and residual_quantized is not None:
-                    payload.extend(residual_quantized.tobytes())
-            
-            # PHASE-1: Standard Quantization
+            model = PhiModel(config, workers)
+            if time_budget is None:
+                model._fit(data, seed, hold_out=False)
             else:
-                quant_bits = config.get('quant_bits', 12)
-                per_component = config.get('per_component', True)
-                
-                quantized, scales, zeros = _apply_quantization(
-                    transformed, quant_bits, per_component
-                )
-                
-                # Serialize Phase-1 metadata
-                payload = bytearray()
-                
-                meta = {
-                    'has_pq': False,
-                    'components': base64.b64encode(components.tobytes()).decode('ascii'),
-                    'mean': base64.b64encode(mean.tobytes()).decode('ascii'),
-                    'scales': base64.b64encode(scales.tobytes()).decode('ascii'),
-                    'zeros': base64.b64encode(zeros.tobytes()).decode('ascii'),
-                    'quant_bits': quant_bits,
-                    'per_component': per_component,
-                    'k': k,
-                    'd': data.shape[1]
-                }
-                
-                meta_json = json.dumps(meta).encode('utf-8')
-                payload.extend(struct.pack('<I', len(meta_json)))
-                payload.extend(meta_json)
-                payload.extend(quantized.tobytes())
-            
+                budget = _FitBudget(time_budget, len(data), entropy)
+                budget.deadline -= time.perf_counter() - start_time  # Detection counts too
+                model._fit(data, seed, budget=budget, hold_out=False)
+            sections = _embedding_sections(model, model.encode(data), inline=True)
+            payload = b''.join(section for section, _ in sections)
             mode = MODE_EMBEDDINGS
         
         shape = data.shape
@@ -1352,11 +5160,41 @@ def compress(
     else:
         raise ValueError(f"Unsupported data type: {type(data)}")
     
+    result = _pack_container(
+        mode, shape, dtype_code, payload, sections, extra_flags, entropy_level, entropy, workers
+    )
+    if time_budget is not None:
+        budget.warn_if_over("compress()")
+    return result
+
+
+def _pack_container(
+    mode: int, 
+    shape: Tuple[int, ...], 
+    dtype_code: int, 
+    payload: bytes, 
+    sections: Optional[List[Tuple[bytes, int]]] = None, 
+    extra_flags: int = 0, 
+    entropy_level: int = 9, 
+    entropy: str = 'auto', 
+    workers: Optional[int] = None
+) -> bytes:
+    """Entropy-code a payload (per section if given) and prepend the PHI header."""
     # FINAL PACKAGING
-    compressed_payload = fse_compress(bytes(payload))
+    # Block, dictionary, JSON-lines and binary codecs already entropy-code
+    # their streams with `entropy` at the requested level; an outer pass
+    # would only re-frame them and lose per-block/per-column access
+    if mode in (MODE_SYMBOLIC_BLOCKS, MODE_SYMBOLIC_DICT, MODE_JSONL, MODE_BINARY):
+        compressed_payload = bytes(payload)
+        flags = extra_flags
+    elif sections is not None:
+        compressed_payload = fse_compress_sections(sections, entropy_level, entropy, workers)
+        flags = FLAG_ENTROPY_FSE | ENTROPY_SECTIONS | extra_flags
+    else:
+        compressed_payload = fse_compress_chunked(bytes(payload), entropy_level, entropy, workers)
+        flags = FLAG_ENTROPY_FSE | entropy_backend_id(compressed_payload) | extra_flags
     
     # Build header
-    flags = FLAG_ENTROPY_FSE
     header = struct.pack(
         '<HHBBBB', 
         MAGIC, FORMAT_VERSION, mode, flags, len(shape), dtype_code
@@ -1375,7 +5213,12 @@ def compress(
     return result
 
 
-def decompress(data: bytes) -> Union[bytes, np.ndarray]:
+def decompress(
+    data: bytes, 
+    workers: Optional[int] = None, 
+    dictionary: Optional['PhiDictionary'] = None,
+    model: Optional['PhiModel'] = None
+) -> Union[bytes, np.ndarray]:
     """
     Universal decompression.
     
@@ -1383,6 +5226,10 @@ def decompress(data: bytes) -> Union[bytes, np.ndarray]:
     
     Args:
         data: Compressed bytes in PHI format
+        workers: Process pool size for block-mode text and thread count of
+                 the chunked entropy stage (default: all cores)
+        dictionary: PhiDictionary the data was compressed with, if any
+        model: PhiModel the data was compressed with, if any
         
     Returns:
         Decompressed data (bytes for text, ndarray for numeric)
@@ -1404,6 +5251,25 @@ def decompress(data: bytes) -> Union[bytes, np.ndarray]:
     if magic != MAGIC:
         raise ValueError(f"Invalid magic: {hex(magic)}")
     
+    if mode == MODE_DEDUP_MANIFEST:
+        raise ValueError("Chunk manifest: rebuild with PhiChunkStore.get()")
+    
+    # EMBEDDINGS (one container, or a base archive plus appended segments)
+    if mode in (MODE_EMBEDDINGS, MODE_EMBEDDINGS_MODEL):
+        decoded = [
+            segment_model.decode(codes) 
+            for segment_model, codes in read_embedding_segments(data, model, workers)
+        ]
+        return decoded[0] if len(decoded) == 1 else np.vstack(decoded)
+    
+    # STREAMED TEXT (PhiCompressor output)
+    if mode == MODE_SYMBOLIC_STREAM:
+        decompressor = PhiDecompressor()
+        result = decompressor.decompress(data)
+        if not decompressor.eof:
+            raise ValueError("Truncated PHI text stream")
+        return result
+    
     # Parse shape
     shape = []
     for _ in range(ndim):
@@ -1419,163 +5285,48 @@ def decompress(data: bytes) -> Union[bytes, np.ndarray]:
     
     # Decompress entropy coding
     if flags & FLAG_ENTROPY_FSE:
-        payload = fse_decompress(compressed_payload)
+        payload = fse_decompress(compressed_payload, workers)
     else:
         payload = compressed_payload
     
     # TEXT DECOMPRESSION
     if mode == MODE_SYMBOLIC:
-        codec = SymbolicCodec()
+        codec = SymbolicCodec(split_streams=bool(flags & FLAG_SPLIT_STREAMS))
         result = codec.decompress(payload)
         return result
     
+    # BLOCK-MODE TEXT DECOMPRESSION
+    elif mode == MODE_SYMBOLIC_BLOCKS:
+        return _decode_text_blocks(payload, workers=workers)
+    
+    # BINARY DECOMPRESSION
+    elif mode == MODE_BINARY:
+        return BinaryCodec().decompress(payload, shape[0], workers)
+    
+    # COLUMNAR JSON-LINES DECOMPRESSION
+    elif mode == MODE_JSONL:
+        return JsonLinesCodec().decompress(payload, workers)
+    
+    # TRAINED-DICTIONARY TEXT DECOMPRESSION
+    elif mode == MODE_SYMBOLIC_DICT:
+        dict_id, = struct.unpack('<I', payload[:4])
+        if dictionary is None:
+            raise ValueError(f"Data requires dictionary {dict_id:08x}")
+        if dictionary.dict_id != dict_id:
+            raise ValueError(
+                f"Dictionary mismatch: need {dict_id:08x}, got {dictionary.dict_id:08x}"
+            )
+        return dictionary.decompress_record(payload[4:])
+    
+    # TOKEN-ID DECOMPRESSION
+    elif mode == MODE_TOKENS:
+        return TokenCodec().decompress(payload).reshape(shape)
+    
     # TIMESERIES DECOMPRESSION
     elif mode == MODE_TS_DOD_RLE:
         result = _decode_dod_rle(payload)
         return result
     
-    # EMBEDDINGS DECOMPRESSION (Phase-1 or Phase-2)
-    elif mode == MODE_EMBEDDINGS:
-        offset_p = 0
-        
-        # Parse metadata
-        meta_size, = struct.unpack('<I', payload[offset_p:offset_p+4])
-        offset_p += 4
-        
-        meta_json = payload[offset_p:offset_p+meta_size]
-        meta = json.loads(meta_json.decode('utf-8'))
-        offset_p += meta_size
-        
-        k = meta['k']
-        d = meta['d']
-        n = shape[0]
-        has_pq = meta.get('has_pq', False)
-        
-        # Decode base64 arrays
-        components = np.frombuffer(
-            base64.b64decode(meta['components']), 
-            dtype=np.float32
-        ).reshape(d, k)
-        mean = np.frombuffer(base64.b64decode(meta['mean']), dtype=np.float32)
-        
-        # Phase-2: PQ Decompression
-        if has_pq:
-            pq_blocks = meta['pq_blocks']
-            pq_centroids = meta['pq_centroids']
-            pq_block_size = meta['pq_block_size']
-            
-            # Reconstruct codebooks
-            codebooks = []
-            for cb_b64 in meta['pq_codebooks']:
-                cb_data = base64.b64decode(cb_b64)
-                cb = np.frombuffer(cb_data, dtype=np.float32).reshape(
-                    pq_centroids, pq_block_size
-                )
-                codebooks.append(cb)
-            
-            # Read PQ codes
-            code_dtype = np.uint8 if pq_centroids <= 256 else np.uint16
-            codes_size = n * pq_blocks * code_dtype().itemsize
-            codes_data = payload[offset_p:offset_p+codes_size]
-            codes = np.frombuffer(codes_data, dtype=code_dtype).reshape(n, pq_blocks)
-            offset_p += codes_size
-            
-            # Decode PQ
-            pq = BlockProductQuantizer(n_blocks=pq_blocks, n_centroids=pq_centroids)
-            pq.codebooks = codebooks
-            pq.block_size = pq_block_size
-            
-            transformed = pq.decode(codes, k)
-            
-            # Handle residual if present
-            has_residual = meta.get('has_residual', False)
-            if has_residual:
-                residual_k = meta['residual_k']
-                residual_bits = meta['residual_bits']
-                
-                residual_components = np.frombuffer(
-                    base64.b64decode(meta['residual_components']), 
-                    dtype=np.float32
-                ).reshape(k, residual_k)
-                
-                residual_mean = np.frombuffer(
-                    base64.b64decode(meta['residual_mean']), 
-                    dtype=np.float32
-                )
-                
-                residual_scales = np.frombuffer(
-                    base64.b64decode(meta['residual_scales']), 
-                    dtype=np.float32
-                ).reshape(1, residual_k)
-                
-                residual_zeros = np.frombuffer(
-                    base64.b64decode(meta['residual_zeros']), 
-                    dtype=np.float32
-                ).reshape(1, residual_k)
-                
-                # Read residual quantized data
-                if residual_bits <= 8:
-                    res_dtype = np.uint8
-                elif residual_bits <= 16:
-                    res_dtype = np.uint16
-                else:
-                    res_dtype = np.uint32
-                
-                residual_quantized = np.frombuffer(
-                    payload[offset_p:], 
-                    dtype=res_dtype
-                ).reshape(n, residual_k)
-                
-                # Dequantize and reverse PCA
-                residual_dequant = _dequantize(
-                    residual_quantized, residual_scales, residual_zeros
-                )
-                residual_reconstructed = residual_dequant @ residual_components.T + residual_mean
-                
-                # Add residual to PQ reconstruction
-                transformed = transformed + residual_reconstructed
-        
-        # Phase-1: Standard Quantization
-        else:
-            quant_bits = meta['quant_bits']
-            per_component = meta['per_component']
-            
-            if quant_bits <= 8:
-                dtype = np.uint8
-            elif quant_bits <= 16:
-                dtype = np.uint16
-            else:
-                dtype = np.uint32
-            
-            quantized_data = payload[offset_p:]
-            quantized = np.frombuffer(quantized_data, dtype=dtype).reshape(n, k)
-            
-            if per_component:
-                scales = np.frombuffer(
-                    base64.b64decode(meta['scales']), 
-                    dtype=np.float32
-                ).reshape(1, k)
-                zeros = np.frombuffer(
-                    base64.b64decode(meta['zeros']), 
-                    dtype=np.float32
-                ).reshape(1, k)
-            else:
-                scales = np.frombuffer(
-                    base64.b64decode(meta['scales']), 
-                    dtype=np.float32
-                ).reshape(1, 1)
-                zeros = np.frombuffer(
-                    base64.b64decode(meta['zeros']), 
-                    dtype=np.float32
-                ).reshape(1, 1)
-            
-            transformed = _dequantize(quantized, scales, zeros)
-        
-        # Reverse PCA (both Phase-1 and Phase-2)
-        result = _reverse_pca(transformed, components, mean)
-        
-        return result
-    
     else:
         raise ValueError(f"Unknown mode: {mode}")
 
@@ -1598,8 +5349,7 @@ def test_quick():
     print(f"✅ Text: {ratio:.1f}× {'PASS' if match and ratio > 5 else 'FAIL'}")
     
     # Test 2: Embeddings
-    np.random.seed(42)
-    data = np.random.randn(100, 128).astype(np.float32)
+    data = np.random.default_rng(42).standard_normal((100, 128)).astype(np.float32)
     compressed = compress(data, preset="phi-balanced")
     restored = decompress(compressed)
     ratio = data.nbytes / len(compressed)
@@ -1613,6 +5363,52 @@ def test_quick():
     print("✅ Engine ready for use!\n")
 
 
+def benchmark_levels(
+    data: bytes, 
+    levels: Optional[List[int]] = None, 
+    filename: str = ""
+) -> List[Dict[str, float]]:
+    """
+    Measure ratio and throughput of each text speed level on data.
+    
+    Returns one row per level: level, ratio, compress_mbps, decompress_mbps.
+    """
+    rows = []
+    for level in levels or sorted(SYMBOLIC_LEVELS):
+        t0 = time.perf_counter()
+        compressed = compress(data, filename=filename, level=level)
+        t1 = time.perf_counter()
+        restored = decompress(compressed)
+        t2 = time.perf_counter()
+        
+        if restored != data:
+            raise RuntimeError(f"Level {level} round trip failed")
+        
+        mb = len(data) / 1e6
+        rows.append({
+            'level': level,
+            'ratio': len(data) / len(compressed),
+            'compress_mbps': mb / max(t1 - t0, 1e-9),
+            'decompress_mbps': mb / max(t2 - t1, 1e-9),
+        })
+    return rows
+
+
+def bench(path: str = ""):
+    """Print the level benchmark table for a file (default: this module's source)."""
+    path = path or __file__
+    with open(path, 'rb') as f:
+        data = f.read()
+    
+    print(f"\n⏱️  PHI Engine v{VERSION} - Level Benchmark ({os.path.basename(path)}, {len(data):,} bytes)")
+    print("="*60)
+    print(f"{'level':>5} {'ratio':>8} {'compress MB/s':>15} {'decompress MB/s':>17}")
+    for row in benchmark_levels(data, filename=path):
+        print(f"{row['level']:>5} {row['ratio']:>7.2f}× {row['compress_mbps']:>15.2f} "
+              f"{row['decompress_mbps']:>17.2f}")
+    print("="*60 + "\n")
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # MAIN ENTRY POINT
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -1622,11 +5418,14 @@ if __name__ == "__main__":
     
     if len(sys.argv) > 1 and sys.argv[1] == "test":
         test_quick()
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench":
+        bench(sys.argv[2] if len(sys.argv) > 2 else "")
     else:
         print(f"\n✅ PHI Engine v{VERSION} - Master Distribution")
         print(f"📦 Presets: {', '.join(PRESETS.keys())}")
         print(f"📚 Usage: from phi_engine_master import compress, decompress")
-        print(f"🧪 Test:  python phi_engine_master.py test\n")
+        print(f"🧪 Test:  python phi_engine_master.py test")
+        print(f"⏱️  Bench: python phi_engine_master.py bench [file]\n")
 else:
     # When imported, just show version
     print(f"✅ PHI Engine v{VERSION} loaded - Master Distribution")
@@ -0,0 +1,29 @@
+"""Shared fixtures; puts the flat phi_engine_master module on sys.path."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = os.path.join(ROOT, 'tests', 'data')
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def text():
+    """Repetitive English-like text with some variation, ~20 KB."""
+    rng = np.random.default_rng(7)
+    words = [b'phi', b'golden', b'ratio', b'spiral', b'compression', b'window',
+             b'match', b'literal', b'entropy', b'the', b'of', b'and']
+    picks = rng.integers(0, len(words), 3500)
+    return b' '.join(words[i] for i in picks) + b'\n'
+
+
+@pytest.fixture
+def embeddings():
+    """Low-rank float32 vectors plus noise, like real embeddings."""
+    rng = np.random.default_rng(11)
+    basis = rng.standard_normal((12, 48))
+    return (rng.standard_normal((600, 12)) @ basis
+            + 0.05 * rng.standard_normal((600, 48))).astype(np.float32)
@@ -0,0 +1,76 @@
+"""Interleaved rANS coder and per-section entropy models."""
+import os
+
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import ans_decode, ans_encode, fse_compress_sections, fse_decompress
+
+from conftest import DATA
+
+
+def _skewed(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.choice(256, n, p=np.r_[[0.5, 0.25], np.full(254, 0.25 / 254)]).astype(np.uint8).tobytes()
+
+
+@pytest.mark.parametrize('data', [
+    b'', b'\x00', b'\xff', b'a' * 100000, bytes(range(256)), bytes(range(256)) * 40,
+    b'ab' * 3, b'\x00\x01' * 70000,
+], ids=['empty', 'zero', 'ff', 'one-symbol', 'all-symbols', 'all-symbols-x40',
+        'tiny', 'two-symbols'])
+def test_roundtrip_edge_cases(data):
+    assert ans_decode(ans_encode(data)) == data
+
+
+@pytest.mark.parametrize('n', [1, 1023, 1024, 1025, phi.ANS_MIN_SIZE - 1, phi.ANS_MIN_SIZE,
+                               phi.ANS_MIN_SIZE + 1, phi.ANS_MAX_LANES * phi.ANS_SYMBOLS_PER_LANE + 3])
+def test_roundtrip_lane_boundaries(n):
+    data = _skewed(n, seed=n)
+    assert ans_decode(ans_encode(data)) == data
+
+
+def test_reaches_entropy_bound():
+    data = _skewed(200000)
+    bound = phi._order0_entropy_bytes(data)
+    assert len(ans_encode(data)) < 1.02 * bound + 1024
+
+
+def test_rare_symbols_keep_nonzero_frequency():
+    data = b'\x00' * 500000 + b'\x01'
+    freq = phi._ans_normalize(np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256))
+    assert freq.sum() == 1 << phi.ANS_PROB_BITS and freq[1] >= 1 and freq[2] == 0
+    assert ans_decode(ans_encode(data)) == data
+
+
+def test_fse_frame_roundtrip():
+    data = _skewed(50000)
+    frame = phi.fse_compress(data, backend='ans')
+    assert phi.entropy_backend_id(frame) == phi.ENTROPY_ANS
+    assert fse_decompress(frame) == data
+
+
+def test_auto_selects_ans_only_when_large():
+    assert phi.choose_entropy_backend(_skewed(100000)) == 'ans'
+    assert phi.choose_entropy_backend(_skewed(phi.ANS_MIN_SIZE - 1)) == 'zlib'
+
+
+def test_sections_keep_separate_models():
+    codes = np.random.default_rng(1).integers(0, 16, 20000, dtype=np.uint8).tobytes()
+    coeffs = np.random.default_rng(2).normal(0, 40, 20000).astype('<i2').tobytes()
+    frame = fse_compress_sections([(codes, 1), (coeffs, 2), (b'', 1)])
+    assert fse_decompress(frame) == codes + coeffs
+    assert phi._decode_sections(frame[4:], count=1) == codes
+    assert len(frame) < len(phi.fse_compress(codes + coeffs))
+    assert fse_decompress(fse_compress_sections([])) == b''
+
+
+@pytest.mark.parametrize('name', ['embeddings', 'timeseries'])
+def test_decodes_baseline_numeric_containers(name):
+    """Numeric containers from the baseline release (single zlib frame) still decode."""
+    with open(os.path.join(DATA, f'baseline_{name}.phi'), 'rb') as f:
+        compressed = f.read()
+    expected = np.load(os.path.join(DATA, f'baseline_{name}_decoded.npy'))
+    restored = phi.decompress(compressed)
+    assert restored.dtype == expected.dtype and np.array_equal(restored, expected)
@@ -0,0 +1,120 @@
+"""Incremental append to embeddings archives with warm-start refit."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import PhiModel, append, read_embedding_segments, search
+
+
+BASIS = np.random.default_rng(11).standard_normal((12, 48))
+
+
+def _rows(rng, n, shift=0.0):
+    """Rows from one fixed low-rank distribution; shift moves them within its subspace."""
+    return ((rng.standard_normal((n, 12)) + shift) @ BASIS
+            + 0.05 * rng.standard_normal((n, 48))).astype(np.float32)
+
+
+@pytest.fixture
+def draw():
+    rng = np.random.default_rng(1)
+    return lambda n, shift=0.0: _rows(rng, n, shift)
+
+
+@pytest.fixture(scope='module')
+def archive():
+    # Enough rows that in-sample fit error is close to held-out error
+    return phi.compress(_rows(np.random.default_rng(0), 3000), preset='phi-pq-balanced', seed=0)
+
+
+def test_in_distribution_rows_do_not_refit(archive, draw):
+    rows = draw(300)
+    model = phi.read_embedding_codes(archive)[0]
+    assert model.drift(rows) < phi.APPEND_DRIFT_THRESHOLD
+    
+    segment = append(archive, rows, seed=1)
+    assert segment[4] == phi.MODE_EMBEDDINGS_MODEL
+    assert len(segment) < len(archive) / 5
+    
+    grown = archive + segment
+    restored = phi.decompress(grown)
+    assert restored.shape == (3300, 48)
+    assert np.array_equal(restored[:3000], phi.decompress(archive))
+    assert np.array_equal(restored[3000:], model.decode(model.encode(rows)))
+    assert [m.model_id for m, _ in read_embedding_segments(grown)] == [model.model_id] * 2
+
+
+def test_shifted_rows_refit(archive, draw):
+    rows = draw(300, shift=3.0)
+    old = phi.read_embedding_codes(archive)[0]
+    assert old.drift(rows) > phi.APPEND_DRIFT_THRESHOLD
+    
+    segment = append(archive, rows, seed=1)
+    assert segment[4] == phi.MODE_EMBEDDINGS
+    grown = archive + segment
+    (first, _), (refit, codes) = read_embedding_segments(grown)
+    assert first.model_id == old.model_id != refit.model_id
+    
+    restored = phi.decompress(grown)
+    assert np.array_equal(restored[:3000], phi.decompress(archive))
+    assert np.mean((restored[3000:] - rows) ** 2) < \
+        np.mean((old.decode(old.encode(rows)) - rows) ** 2) / 4
+    
+    # The refit model still fits the archive's distribution (mixed history sample)
+    held = draw(300)
+    assert refit.reconstruction_error(held) < 1.25 * old.reconstruction_error(held)
+    
+    # Later appends reference the refit model, not the archive's first one
+    later = append(grown, draw(50, shift=3.0), drift_threshold=np.inf)
+    assert later[4] == phi.MODE_EMBEDDINGS_MODEL
+    assert read_embedding_segments(grown + later)[-1][0].model_id == refit.model_id
+    assert phi.decompress(grown + later).shape == (3350, 48)
+
+
+def test_threshold_controls_refit(archive, draw):
+    assert append(archive, draw(100, shift=3.0), drift_threshold=np.inf)[4] == phi.MODE_EMBEDDINGS_MODEL
+    assert append(archive, draw(100), drift_threshold=0.0, seed=2)[4] == phi.MODE_EMBEDDINGS
+
+
+def test_seeded_refit_is_reproducible(archive, draw):
+    rows = draw(200, shift=3.0)
+    assert append(archive, rows, seed=4) == append(archive, rows, seed=4)
+    assert append(archive, rows, seed=4, workers=1) == append(archive, rows, seed=4, workers=3)
+
+
+def test_search_spans_segments(archive, draw):
+    rows = draw(200)
+    grown = archive + append(archive, rows, seed=1)
+    grown += append(grown, draw(200, shift=3.0), seed=1)
+    
+    queries = np.vstack([rows[:3], draw(3)])
+    ids, _ = search(grown, queries, top_k=5)
+    restored = phi.decompress(grown)
+    exact = np.argsort(((queries[:, None] - restored[None]) ** 2).sum(axis=2), axis=1)[:, :5]
+    assert np.array_equal(ids, exact)
+
+
+def test_model_referenced_archive(draw):
+    model = PhiModel('phi-balanced').fit(draw(3000), rng=0)
+    base = phi.compress(draw(500), model=model)
+    with pytest.raises(ValueError):
+        append(base, draw(10))
+    segment = append(base, draw(10), model=model)
+    assert segment[4] == phi.MODE_EMBEDDINGS_MODEL
+    assert phi.decompress(base + segment, model=model).shape == (510, 48)
+
+
+def test_compress_trains_on_every_row():
+    # A held-out outlier would fall outside the scalar ranges and be clipped
+    rows = _rows(np.random.default_rng(4), 1000)
+    rows[123] *= 6
+    for seed in range(20):
+        restored = phi.decompress(phi.compress(rows, preset='phi-balanced', seed=seed))
+        assert np.abs(restored[123] - rows[123]).max() < 0.1 * np.abs(rows[123]).max()
+
+
+def test_standalone_fit_scores_held_out_rows(draw):
+    sample = draw(3000)
+    held_out = PhiModel('phi-pq-balanced').fit(sample, rng=0)
+    in_sample = phi.read_embedding_codes(phi.compress(sample, preset='phi-pq-balanced', seed=0))[0]
+    assert held_out.meta['fit_error'] > in_sample.meta['fit_error']
@@ -0,0 +1,71 @@
+"""Binary fast path: width sniffing, byte/bit shuffle and store mode."""
+import struct
+
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import BinaryCodec
+
+
+def _int_dump():
+    """Raw little-endian int32 counter readings."""
+    steps = np.random.default_rng(2).integers(0, 40, 20000)
+    return (100000 + np.cumsum(steps)).astype('<i4').tobytes()
+
+
+@pytest.mark.parametrize('filter_id', [phi._FILTER_NONE, phi._FILTER_BYTE_SHUFFLE,
+                                       phi._FILTER_BIT_SHUFFLE])
+@pytest.mark.parametrize('width', [2, 4, 8])
+@pytest.mark.parametrize('size', [0, 5, 64, 1001])
+def test_shuffle_inverse(filter_id, width, size):
+    data = np.random.default_rng(size).integers(0, 256, size, dtype=np.uint8).tobytes()
+    shuffled = phi._shuffle(data, filter_id, width)
+    assert len(shuffled) >= len(data)
+    assert phi._unshuffle(shuffled, filter_id, width, size) == data
+
+
+def test_sniffs_element_width():
+    filter_id, width = BinaryCodec().sniff(_int_dump())
+    assert filter_id in (phi._FILTER_BYTE_SHUFFLE, phi._FILTER_BIT_SHUFFLE) and width == 4
+
+
+@pytest.mark.parametrize('entropy', ['zlib', 'ans', 'bz2'])
+def test_roundtrip_and_gain(entropy):
+    data = _int_dump()
+    compressed = phi.compress(data, entropy=entropy)
+    assert compressed[4] == phi.MODE_BINARY
+    assert phi.decompress(compressed) == data
+    assert len(compressed) < 0.8 * len(data)
+
+
+def test_random_bytes_are_stored():
+    data = np.random.default_rng(0).integers(0, 256, 50000, dtype=np.uint8).tobytes()
+    payload = BinaryCodec().compress(data)
+    assert payload[0] == phi._FILTER_STORE and payload[2:] == data
+    assert phi.decompress(phi.compress(data)) == data
+
+
+def test_level_and_entropy_are_used():
+    data = _int_dump()
+    for level in (1, 9):
+        codec = BinaryCodec(level=level, entropy='store')
+        assert codec.entropy_level == phi.SYMBOLIC_LEVELS[level]['entropy_level']
+        payload = codec.compress(data)
+        # store never shrinks the body, so the whole input is stored raw
+        assert payload[0] == phi._FILTER_STORE
+    payload = BinaryCodec(entropy='lzma').compress(data)
+    assert phi.entropy_backend_id(payload[2:]) == phi.ENTROPY_LZMA
+
+
+def test_workers_do_not_change_output():
+    data = _int_dump()
+    assert BinaryCodec().compress(data, workers=4) == BinaryCodec().compress(data, workers=1)
+
+
+def test_decodes_unchunked_payload():
+    """Payloads written before the chunked entropy stage (plain fse_compress frames)."""
+    data = _int_dump()
+    shuffled = phi._shuffle(data, phi._FILTER_BYTE_SHUFFLE, 4)
+    legacy = struct.pack('<BB', phi._FILTER_BYTE_SHUFFLE, 4) + phi.fse_compress(shuffled)
+    assert BinaryCodec().decompress(legacy, len(data)) == data
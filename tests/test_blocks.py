@@ -0,0 +1,58 @@
+"""Independent-block text mode, block index and decompress_range."""
+import multiprocessing
+
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import decompress_range
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """phi-global-parallel with 4 KB blocks, so test inputs span many blocks."""
+    preset = dict(phi.PRESETS['phi-global-parallel'], block_size=4096)
+    monkeypatch.setitem(phi.PRESETS, 'phi-global-parallel', preset)
+
+
+@pytest.mark.parametrize('workers', [None, 1, 2])
+def test_roundtrip(text, small_blocks, workers):
+    compressed = phi.compress(text, preset='phi-global-parallel', workers=workers)
+    assert compressed[4] == phi.MODE_SYMBOLIC_BLOCKS
+    assert phi.decompress(compressed, workers=workers) == text
+
+
+def test_output_independent_of_workers(text, small_blocks):
+    serial = phi.compress(text, preset='phi-global-parallel', workers=1)
+    assert phi.compress(text, preset='phi-global-parallel', workers=2) == serial
+    assert phi.compress(text, preset='phi-global-parallel') == serial
+
+
+@pytest.mark.parametrize('start,stop', [
+    (0, 10), (4090, 4100), (4096, 8192), (5000, 17000), (0, 10 ** 9), (19000, 19000)
+])
+def test_decompress_range(text, small_blocks, start, stop):
+    compressed = phi.compress(text, preset='phi-global-parallel')
+    assert decompress_range(compressed, start, stop) == text[start:stop]
+
+
+def test_decompress_range_other_modes(text):
+    compressed = phi.compress(text, preset='phi-global')
+    assert decompress_range(compressed, 100, 200) == text[100:200]
+
+
+def test_single_block_and_empty(small_blocks):
+    for data in (b'', b'short text'):
+        compressed = phi.compress(data, preset='phi-global-parallel')
+        assert phi.decompress(compressed) == data
+
+
+def test_block_index_locates_blocks(text, small_blocks):
+    payload = phi._encode_text_blocks(text, 4096, workers=1)
+    assert phi._decode_text_blocks(payload, 8192, 12288) == text[8192:12288]
+    assert phi._decode_text_blocks(payload) == text
+
+
+def test_worker_processes_do_not_outlive_the_call(text, small_blocks):
+    compressed = phi.compress(text, preset='phi-global-parallel', workers=2)
+    assert phi.decompress(compressed, workers=2) == text
+    assert multiprocessing.active_children() == []
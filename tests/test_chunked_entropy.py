@@ -0,0 +1,48 @@
+"""Chunked entropy stage coded on a thread pool."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import fse_compress, fse_compress_chunked, fse_decompress
+
+
+@pytest.fixture
+def mixed():
+    """Compressible text followed by incompressible bytes (chunks pick different backends)."""
+    random = np.random.default_rng(0).integers(0, 256, 30000, dtype=np.uint8).tobytes()
+    return b'the golden ratio of chunked frames ' * 1000 + random
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4096, 10000, 35000])
+@pytest.mark.parametrize('backend', ['auto', 'zlib', 'ans', 'store'])
+def test_roundtrip(mixed, chunk_size, backend):
+    data = mixed[:500] if chunk_size == 1 else mixed
+    frame = fse_compress_chunked(data, backend=backend, chunk_size=chunk_size)
+    assert frame[4] == phi.ENTROPY_CHUNKED
+    assert fse_decompress(frame) == data
+    assert fse_decompress(frame, workers=1) == data
+
+
+def test_small_data_is_a_plain_frame(mixed):
+    assert fse_compress_chunked(mixed[:1000], chunk_size=4096) == fse_compress(mixed[:1000])
+    assert fse_compress_chunked(b'', chunk_size=4096) == fse_compress(b'')
+
+
+@pytest.mark.parametrize('workers', [None, 1, 2, 8])
+def test_output_independent_of_workers(mixed, workers):
+    serial = fse_compress_chunked(mixed, chunk_size=8192, workers=1)
+    assert fse_compress_chunked(mixed, chunk_size=8192, workers=workers) == serial
+
+
+def test_chunks_pick_their_own_backend(mixed):
+    frame = fse_compress_chunked(mixed, backend='auto', chunk_size=35000)
+    # '<IBII' raw length, ENTROPY_CHUNKED, chunk_size, n_chunks, then the size table
+    n_chunks = int(np.frombuffer(frame, dtype='<u4', count=1, offset=9)[0])
+    sizes = np.frombuffer(frame, dtype='<u4', count=n_chunks, offset=13)
+    start = 13 + 4 * n_chunks
+    backends = []
+    for size in sizes.tolist():
+        backends.append(phi.entropy_backend_id(frame[start:start + size]))
+        start += size
+    assert backends[0] == phi.ENTROPY_ZLIB and backends[-1] == phi.ENTROPY_STORE
+
@@ -0,0 +1,64 @@
+"""Content-defined chunking and the deduplicating PhiChunkStore."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import PhiChunkStore, _cdc_boundaries
+
+
+@pytest.fixture
+def document():
+    return np.random.default_rng(9).integers(97, 123, 60000, dtype=np.uint8).tobytes()
+
+
+def _chunks(data, **sizes):
+    ends = _cdc_boundaries(data, **sizes)
+    return [data[a:b] for a, b in zip([0] + ends[:-1], ends)]
+
+
+def test_boundaries_respect_sizes(document):
+    ends = _cdc_boundaries(document, avg_size=2048, min_size=512, max_size=8192)
+    assert ends[-1] == len(document)
+    sizes = np.diff([0] + ends)
+    assert (sizes[:-1] > 512).all() and (sizes <= 8192).all()
+
+
+def test_boundaries_small_and_empty():
+    assert _cdc_boundaries(b'') == []
+    assert _cdc_boundaries(b'abc') == [3]
+
+
+def test_boundaries_resynchronize_after_edit(document):
+    edited = document[:1000] + b'INSERTED' + document[1000:]
+    original = set(_chunks(document, avg_size=2048, min_size=512, max_size=8192))
+    shifted = _chunks(edited, avg_size=2048, min_size=512, max_size=8192)
+    assert sum(chunk in original for chunk in shifted) >= len(shifted) - 2
+
+
+def test_put_get_roundtrip_and_dedup(document):
+    store = PhiChunkStore(avg_size=2048, min_size=512, max_size=8192)
+    documents = [document, document[:30000] + b'edit' + document[30000:], document, b'', 'tiny str']
+    manifests = [store.put(doc) for doc in documents]
+    
+    for doc, manifest in zip(documents, manifests):
+        expected = doc.encode('utf-8') if isinstance(doc, str) else doc
+        assert store.get(manifest) == expected
+    assert manifests[0] == manifests[2]
+    assert store.unique_bytes < 0.6 * store.total_bytes
+
+
+def test_store_serialization(document):
+    store = PhiChunkStore(avg_size=2048, min_size=512, max_size=8192)
+    manifest = store.put(document)
+    loaded = PhiChunkStore.from_bytes(store.to_bytes())
+    assert (loaded.avg_size, loaded.min_size, loaded.max_size) == (2048, 512, 8192)
+    assert loaded.get(manifest) == document
+
+
+def test_missing_chunk_and_plain_decompress(document):
+    manifest = PhiChunkStore().put(document)
+    assert manifest[4] == phi.MODE_DEDUP_MANIFEST
+    with pytest.raises(ValueError):
+        PhiChunkStore().get(manifest)
+    with pytest.raises(ValueError):
+        phi.decompress(manifest)
@@ -0,0 +1,66 @@
+"""Reentrant, thread-safe training with explicit RNG state."""
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import BlockProductQuantizer, PhiModel
+
+PQ_PRESETS = ['phi-pq-balanced', 'phi-pq-quality', 'phi-pq-ivf', 'phi-pq-fastscan']
+
+
+@pytest.mark.parametrize('preset', PQ_PRESETS)
+def test_seed_reproduces_bytes(embeddings, preset):
+    first = phi.compress(embeddings, preset=preset, seed=9)
+    assert phi.compress(embeddings, preset=preset, seed=9) == first
+    assert phi.compress(embeddings, preset=preset, seed=np.random.default_rng(9)) == first
+
+
+@pytest.mark.parametrize('workers', [None, 1, 4])
+def test_seed_reproduces_bytes_with_workers(embeddings, workers):
+    serial = phi.compress(embeddings, preset='phi-pq-quality', seed=9, workers=1)
+    assert phi.compress(embeddings, preset='phi-pq-quality', seed=9, workers=workers) == serial
+
+
+def test_unseeded_fits_differ(embeddings):
+    a = PhiModel('phi-pq-balanced').fit(embeddings)
+    b = PhiModel('phi-pq-balanced').fit(embeddings)
+    assert a.model_id != b.model_id
+
+
+def test_global_random_state_untouched(embeddings):
+    np.random.seed(123)
+    state = np.random.get_state()
+    phi.compress(embeddings, preset='phi-pq-ivf', seed=1)
+    PhiModel('phi-pq-balanced').fit(embeddings)
+    BlockProductQuantizer(n_blocks=2, n_centroids=16, init='kmeans||').fit(embeddings, rng=1)
+    after = np.random.get_state()
+    assert state[0] == after[0] and np.array_equal(state[1], after[1]) and state[2:] == after[2:]
+
+
+def test_concurrent_fits_match_serial(embeddings):
+    sample = embeddings[:300]
+    seeds = [1, 2, 1, 2]
+    serial = [PhiModel('phi-pq-balanced', workers=1).fit(sample, rng=s).model_id for s in seeds]
+    
+    def fit(seed):
+        return PhiModel('phi-pq-balanced', workers=2).fit(sample, rng=seed).model_id
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        assert list(pool.map(fit, seeds)) == serial
+
+
+def test_shared_generator_advances(embeddings):
+    rng = np.random.default_rng(0)
+    a = PhiModel('phi-pq-balanced').fit(embeddings, rng=rng)
+    b = PhiModel('phi-pq-balanced').fit(embeddings, rng=rng)
+    assert a.model_id != b.model_id
+    
+    rng = np.random.default_rng(0)
+    assert PhiModel('phi-pq-balanced').fit(embeddings, rng=rng).model_id == a.model_id
+
+
+def test_kmeans_without_rng_is_still_valid(embeddings):
+    pq = BlockProductQuantizer(n_blocks=2, n_centroids=16)
+    centroids, labels = pq._kmeans_block(embeddings[:, :24], 16)
+    assert centroids.shape == (16, 24) and labels.max() < 16
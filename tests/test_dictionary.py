@@ -0,0 +1,84 @@
+"""Trained shared dictionaries for small text records."""
+import json
+
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import PhiDictionary, train_dictionary
+
+
+@pytest.fixture
+def records():
+    rng = np.random.default_rng(2)
+    levels = ['INFO', 'WARN', 'ERROR']
+    return [
+        json.dumps({
+            'timestamp': f'2024-01-{1 + i % 28:02d}T12:{i % 60:02d}:00Z',
+            'level': levels[int(rng.integers(3))],
+            'service': 'phi-ingest',
+            'message': f'processed batch {int(rng.integers(10 ** 6))} for tenant acme',
+        }).encode('utf-8')
+        for i in range(400)
+    ]
+
+
+def test_records_roundtrip_and_shrink(records):
+    dictionary = train_dictionary(records[:300], size=4096)
+    assert 0 < len(dictionary.content) <= 4096
+    
+    for record in records[300:320]:
+        with_dict = phi.compress(record, preset='phi-global', dictionary=dictionary)
+        assert with_dict[4] == phi.MODE_SYMBOLIC_DICT
+        assert phi.decompress(with_dict, dictionary=dictionary) == record
+        assert len(with_dict) < len(phi.compress(record, preset='phi-global'))
+
+
+@pytest.mark.parametrize('level,entropy', [(1, 'zlib'), (6, 'bz2'), (9, 'lzma'), (3, 'store')])
+def test_level_and_entropy_are_honoured(records, level, entropy):
+    dictionary = train_dictionary(records[:300], size=4096)
+    record = records[350]
+    compressed = phi.compress(record, preset='phi-global', dictionary=dictionary,
+                              level=level, entropy=entropy)
+    assert phi.decompress(compressed, dictionary=dictionary) == record
+    
+    # header, shape, payload size, dict_id and the '<II' codec header precede the frame
+    frame = compressed[8 + 4 + 4 + 4 + 8:]
+    assert phi.entropy_backend_id(frame) == phi.ENTROPY_BACKENDS[entropy][0]
+
+
+def test_serialization_roundtrip(records):
+    dictionary = train_dictionary(records[:300], size=4096)
+    loaded = PhiDictionary.from_bytes(dictionary.to_bytes())
+    assert loaded.dict_id == dictionary.dict_id
+    
+    compressed = phi.compress(records[399], preset='phi-global', dictionary=dictionary)
+    assert phi.decompress(compressed, dictionary=loaded) == records[399]
+
+
+def test_corrupt_serialization_rejected(records):
+    blob = bytearray(train_dictionary(records[:300], size=4096).to_bytes())
+    blob[-1] ^= 0xFF
+    with pytest.raises(ValueError):
+        PhiDictionary.from_bytes(bytes(blob))
+
+
+def test_missing_or_wrong_dictionary(records):
+    dictionary = train_dictionary(records[:300], size=4096)
+    compressed = phi.compress(records[0], preset='phi-global', dictionary=dictionary)
+    with pytest.raises(ValueError):
+        phi.decompress(compressed)
+    with pytest.raises(ValueError):
+        phi.decompress(compressed, dictionary=PhiDictionary(b'other content'))
+
+
+def test_small_corpus_and_empty_record(records):
+    dictionary = train_dictionary(records[:2], size=16384)
+    assert dictionary.content == b''.join(records[:2])
+    for record in (b'', records[5]):
+        compressed = phi.compress(record, preset='phi-global', dictionary=dictionary)
+        assert phi.decompress(compressed, dictionary=dictionary) == record
+
+
+def test_training_is_deterministic(records):
+    assert train_dictionary(records, size=2048).content == train_dictionary(records, size=2048).content
@@ -0,0 +1,89 @@
+"""Pluggable entropy backends, automatic selection and store bypass."""
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import (ENTROPY_BACKENDS, choose_entropy_backend, fse_compress,
+                               fse_decompress, register_entropy_backend)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """A private copy of the backend registry, restored after the test."""
+    monkeypatch.setattr(phi, 'ENTROPY_BACKENDS', dict(ENTROPY_BACKENDS))
+    return phi.ENTROPY_BACKENDS
+
+
+@pytest.mark.parametrize('backend', sorted(ENTROPY_BACKENDS) + ['auto', 'archival'])
+@pytest.mark.parametrize('data', [b'', b'x', b'hello world ' * 2000])
+def test_backend_roundtrip(backend, data):
+    assert fse_decompress(fse_compress(data, backend=backend)) == data
+
+
+def test_legacy_zlib_frame_has_no_tag(text):
+    legacy = struct.pack('<I', len(text)) + zlib.compress(text, 9)
+    assert fse_decompress(legacy) == text
+    assert fse_compress(text, backend='zlib') == legacy
+    assert phi.entropy_backend_id(legacy) == phi.ENTROPY_ZLIB
+
+
+def test_store_frame():
+    data = b'abc' * 10
+    frame = fse_compress(data, backend='store')
+    assert frame == struct.pack('<IB', len(data), phi.ENTROPY_STORE) + data
+
+
+def test_auto_selection(text):
+    random = np.random.default_rng(0).integers(0, 256, 50000, dtype=np.uint8).tobytes()
+    assert choose_entropy_backend(random) == 'store'
+    assert choose_entropy_backend(b'') == 'store'
+    assert choose_entropy_backend(text) == 'zlib'
+    assert choose_entropy_backend(text, archival=True) in ('lzma', 'bz2')
+    assert phi.entropy_backend_id(fse_compress(random, backend='auto')) == phi.ENTROPY_STORE
+
+
+@pytest.mark.parametrize('entropy', sorted(ENTROPY_BACKENDS) + ['auto', 'archival'])
+def test_compress_entropy_option(text, embeddings, entropy):
+    assert phi.decompress(phi.compress(text, preset='phi-global', entropy=entropy)) == text
+    compressed = phi.compress(embeddings, preset='phi-max', entropy=entropy)
+    assert phi.decompress(compressed).shape == embeddings.shape
+
+
+def test_unknown_backend(text):
+    with pytest.raises(ValueError):
+        phi.compress(text, preset='phi-global', entropy='zstd')
+    with pytest.raises(KeyError):
+        fse_compress(text, backend='zstd')
+    with pytest.raises(ValueError):
+        fse_decompress(struct.pack('<IB', 3, 7) + b'abc')
+
+
+def test_register_custom_backend(registry, text):
+    register_entropy_backend('xor', 7, lambda data, level: bytes(b ^ 0x55 for b in data),
+                             lambda data: bytes(b ^ 0x55 for b in data))
+    frame = fse_compress(text[:1000], backend='xor')
+    assert phi.entropy_backend_id(frame) == 7
+    assert fse_decompress(frame) == text[:1000]
+    assert phi.decompress(phi.compress(text, preset='phi-global', entropy='xor')) == text
+
+
+@pytest.mark.parametrize('name,backend_id', [
+    ('zlib', 7), ('other', phi.ENTROPY_LZMA),                         # taken
+    ('auto', 7), ('archival', 7),                                     # reserved
+    ('other', phi.ENTROPY_SECTIONS), ('other', phi.ENTROPY_CHUNKED),  # framing
+    ('other', 8), ('other', -1),                                      # out of range
+])
+def test_register_rejects_conflicts(registry, name, backend_id):
+    before = dict(registry)
+    with pytest.raises(ValueError):
+        register_entropy_backend(name, backend_id, None, None)
+    assert registry == before
+
+
+def test_register_twice_rejected(registry):
+    register_entropy_backend('custom', 7, lambda d, l: d, lambda d: d)
+    with pytest.raises(ValueError):
+        register_entropy_backend('custom', 7, lambda d, l: d, lambda d: d)
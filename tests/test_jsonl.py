@@ -0,0 +1,96 @@
+"""Columnar JSON-lines mode and single-column reads."""
+import json
+
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import JsonLinesCodec, read_jsonl_column
+
+
+def _records(n=300):
+    rng = np.random.default_rng(6)
+    records = []
+    for i in range(n):
+        record = {
+            'id': 1000 + i,
+            'ts': 1700000000 + 15 * i,
+            'level': ['INFO', 'WARN', 'ERROR'][int(rng.integers(3))],
+            'score': float(rng.random()),
+            'msg': f'user {int(rng.integers(100))} did thing {i}',
+            'tags': ['a', 'b'][:int(rng.integers(3))],
+            'ünï': 'çødé',
+        }
+        if i % 7 == 0:
+            record['extra'] = None
+        records.append(record)
+    return records
+
+
+def _jsonl(records, separators=(', ', ': '), ensure_ascii=True, trailing=True):
+    lines = [json.dumps(r, separators=separators, ensure_ascii=ensure_ascii) for r in records]
+    return ('\n'.join(lines) + ('\n' if trailing else '')).encode('utf-8')
+
+
+@pytest.mark.parametrize('separators,ensure_ascii,trailing', [
+    ((', ', ': '), True, True), ((',', ':'), True, False), ((',', ':'), False, True)
+])
+def test_roundtrip_styles(separators, ensure_ascii, trailing):
+    data = _jsonl(_records(), separators, ensure_ascii, trailing)
+    compressed = phi.compress(data, filename='events.jsonl')
+    assert compressed[4] == phi.MODE_JSONL
+    assert phi.decompress(compressed) == data
+
+
+@pytest.mark.parametrize('workers', [None, 1, 3])
+def test_output_independent_of_workers(workers):
+    data = _jsonl(_records())
+    serial = phi.compress(data, filename='events.jsonl', workers=1)
+    compressed = phi.compress(data, filename='events.jsonl', workers=workers)
+    assert compressed == serial
+    assert phi.decompress(compressed, workers=workers) == data
+
+
+def test_read_single_column():
+    records = _records()
+    compressed = phi.compress(_jsonl(records), filename='events.jsonl')
+    assert read_jsonl_column(compressed, 'ts') == [r['ts'] for r in records]
+    assert read_jsonl_column(compressed, 'score') == [r['score'] for r in records]
+    assert read_jsonl_column(compressed, 'level') == [r['level'] for r in records]
+    assert read_jsonl_column(compressed, 'extra') == [None] * len(range(0, 300, 7))
+    with pytest.raises(KeyError):
+        read_jsonl_column(compressed, 'missing')
+    with pytest.raises(ValueError):
+        read_jsonl_column(phi.compress(b'plain text ' * 50, preset='phi-global'), 'ts')
+
+
+@pytest.mark.parametrize('entropy', ['zlib', 'store', 'lzma'])
+def test_entropy_backend_reaches_columns(entropy):
+    data = _jsonl(_records())
+    payload = JsonLinesCodec(entropy=entropy).compress(data)
+    meta, offsets, base = JsonLinesCodec._parse(payload)
+    c = meta['keys'].index('ts') + 1
+    column = payload[base + int(offsets[c]):base + int(offsets[c + 1])]
+    # '<BI' column header and the int column's '<B' delta order precede the frame
+    assert phi.entropy_backend_id(column[6:]) == phi.ENTROPY_BACKENDS[entropy][0]
+    assert JsonLinesCodec().decompress(payload) == data
+
+
+def test_falls_back_to_text():
+    records = _records(40)
+    # Non-canonical spacing cannot be re-serialized exactly
+    odd = b'\n'.join(json.dumps(r).replace(': ', ':  ').encode('utf-8') for r in records)
+    few = _jsonl(records[:5])
+    not_objects = b'\n'.join([b'[1, 2]'] * 40)
+    for data in (odd, few, not_objects):
+        assert JsonLinesCodec().compress(data) is None
+        compressed = phi.compress(data, filename='events.jsonl')
+        assert compressed[4] != phi.MODE_JSONL
+        assert phi.decompress(compressed) == data
+
+
+def test_int_column_orders():
+    for values in (np.arange(0, 5000, 3), np.array([5, -3, 2 ** 62, -2 ** 63]),
+                   np.cumsum(np.cumsum(np.ones(100, dtype=np.int64)))):
+        body = phi._encode_int_column(values.astype(np.int64))
+        assert np.array_equal(phi._decode_int_column(body, len(values)), values)
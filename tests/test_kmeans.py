@@ -0,0 +1,124 @@
+"""Sampled and mini-batch k-means training of PQ codebooks."""
+import numpy as np
+import pytest
+
+from phi_engine_master import BlockProductQuantizer, _nearest_centroids
+
+
+@pytest.fixture
+def clusters():
+    """2000 points around 20 well-separated centres."""
+    rng = np.random.default_rng(12)
+    centres = 10 * rng.standard_normal((20, 8))
+    return (centres[rng.integers(0, 20, 2000)] + rng.standard_normal((2000, 8))).astype(np.float32)
+
+
+def _inertia(data, centroids):
+    return float(_nearest_centroids(data, centroids)[1].sum())
+
+
+def test_lloyd_labels_match_centroids(clusters):
+    pq = BlockProductQuantizer(n_blocks=1, n_centroids=20)
+    centroids, labels = pq._kmeans_block(clusters, 20, np.random.default_rng(0))
+    assert centroids.shape == (20, 8) and centroids.dtype == np.float32
+    assert labels.dtype == np.uint16
+    assert np.array_equal(labels, _nearest_centroids(clusters, centroids)[0])
+
+
+def test_no_iterations_assigns_seeded_centroids(clusters):
+    for batch_size in (None, 256):
+        pq = BlockProductQuantizer(n_blocks=1, n_centroids=20, max_iter=0, batch_size=batch_size)
+        centroids, labels = pq._kmeans_block(clusters, 20, np.random.default_rng(0))
+        assert labels.shape == (2000,)
+        assert np.array_equal(labels, _nearest_centroids(clusters, centroids)[0])
+    
+    pq = BlockProductQuantizer(n_blocks=2, n_centroids=20, max_iter=0)
+    pq.fit(clusters, rng=0)
+    assert pq.encode(clusters).shape == (2000, 2)
+
+
+def test_minibatch_close_to_lloyd(clusters):
+    rng = np.random.default_rng(1)
+    lloyd = BlockProductQuantizer(n_blocks=1, n_centroids=20)._kmeans_block(clusters, 20, rng)[0]
+    rng = np.random.default_rng(1)
+    minibatch = BlockProductQuantizer(n_blocks=1, n_centroids=20, batch_size=256) \
+        ._kmeans_block(clusters, 20, rng)[0]
+    assert _inertia(clusters, minibatch) < 1.25 * _inertia(clusters, lloyd)
+
+
+def test_sampled_training_close_to_full(clusters):
+    full = BlockProductQuantizer(n_blocks=2, n_centroids=20, train_size=None)
+    full.fit(clusters, rng=0)
+    sampled = BlockProductQuantizer(n_blocks=2, n_centroids=20, train_size=400)
+    sampled.fit(clusters, rng=0)
+    
+    def error(pq):
+        return float(((pq.decode(pq.encode(clusters), 8) - clusters) ** 2).sum())
+    assert error(sampled) < 1.25 * error(full)
+
+
+def test_more_centroids_than_rows():
+    data = np.random.default_rng(0).standard_normal((5, 4)).astype(np.float32)
+    pq = BlockProductQuantizer(n_blocks=1, n_centroids=8)
+    centroids, labels = pq._kmeans_block(data, 8, np.random.default_rng(0))
+    assert np.array_equal(centroids[:5], data) and not centroids[5:].any()
+    assert labels.tolist() == [0, 1, 2, 3, 4]
+
+
+def test_warm_start_with_few_rows(clusters):
+    pq = BlockProductQuantizer(n_blocks=1, n_centroids=20)
+    start = pq._kmeans_block(clusters, 20, np.random.default_rng(0))[0]
+    centroids, labels = pq._kmeans_block(clusters[:5], 20, np.random.default_rng(0), start)
+    assert centroids.shape == (20, 8) and labels.shape == (5,)
+    moved = np.flatnonzero(np.any(centroids != start, axis=1))
+    assert set(moved.tolist()) <= set(labels.tolist())
+
+
+@pytest.mark.parametrize('batch_size', [None, 300])
+def test_seeded_training_is_reproducible(clusters, batch_size):
+    fits = []
+    for _ in range(2):
+        pq = BlockProductQuantizer(n_blocks=2, n_centroids=20, train_size=800, batch_size=batch_size)
+        pq.fit(clusters, rng=7)
+        fits.append(pq.codebooks)
+    assert all(np.array_equal(a, b) for a, b in zip(*fits))
+
+
+@pytest.mark.parametrize('init', ['kmeans++', 'kmeans||'])
+def test_init_picks_distinct_data_rows(clusters, init):
+    pq = BlockProductQuantizer(n_blocks=1, n_centroids=20, init=init)
+    rng = np.random.default_rng(0)
+    if init == 'kmeans||':
+        centroids = pq._phi_init_parallel(clusters, 20, rng)
+    else:
+        centroids = pq._phi_init_centroids(clusters, 20, rng)
+    rows = {row.tobytes() for row in clusters}
+    assert centroids.shape == (20, 8)
+    assert all(c.tobytes() in rows for c in centroids)
+    assert len({c.tobytes() for c in centroids}) == 20
+
+
+def test_init_sample_weight_excludes_zero_weight_rows(clusters):
+    weight = np.zeros(len(clusters))
+    weight[:100] = 1
+    pq = BlockProductQuantizer(n_blocks=1, n_centroids=10)
+    centroids = pq._phi_init_centroids(clusters, 10, np.random.default_rng(0), sample_weight=weight)
+    allowed = {row.tobytes() for row in clusters[:100]}
+    assert all(c.tobytes() in allowed for c in centroids[1:])
+
+
+def test_kmeans_parallel_fit(clusters):
+    pq = BlockProductQuantizer(n_blocks=2, n_centroids=20, init='kmeans||')
+    pq.fit(clusters, rng=0)
+    error = float(((pq.decode(pq.encode(clusters), 8) - clusters) ** 2).mean())
+    plain = BlockProductQuantizer(n_blocks=2, n_centroids=20)
+    plain.fit(clusters, rng=0)
+    assert error < 1.25 * float(((plain.decode(plain.encode(clusters), 8) - clusters) ** 2).mean())
+
+
+def test_init_edge_cases():
+    pq = BlockProductQuantizer(n_blocks=1)
+    assert pq._phi_init_centroids(np.zeros((0, 3), dtype=np.float32), 4,
+                                  np.random.default_rng(0)).shape == (4, 3)
+    same = np.ones((50, 3), dtype=np.float32)  # zero distances everywhere
+    assert np.array_equal(pq._phi_init_centroids(same, 4, np.random.default_rng(0)), np.ones((4, 3)))
@@ -0,0 +1,47 @@
+"""Speed-tiered compression levels of the symbolic path."""
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import SYMBOLIC_LEVELS
+
+
+@pytest.mark.parametrize('level', sorted(SYMBOLIC_LEVELS))
+def test_every_level_roundtrips(text, level):
+    compressed = phi.compress(text, preset='phi-global', level=level)
+    assert phi.decompress(compressed) == text
+
+
+def test_higher_levels_compress_better(text):
+    sizes = {level: len(phi.compress(text, preset='phi-global', level=level)) for level in (1, 6, 9)}
+    assert sizes[9] <= sizes[6] < sizes[1]
+
+
+def test_default_level_is_six(text):
+    assert phi.DEFAULT_LEVEL == 6
+    assert phi.compress(text, preset='phi-global') == phi.compress(text, preset='phi-global', level=6)
+
+
+@pytest.mark.parametrize('preset,level', [('phi-global-fast', 1), ('phi-global-archive', 9)])
+def test_presets_select_levels(text, preset, level):
+    compressed = phi.compress(text, preset=preset)
+    assert phi.decompress(compressed) == text
+    assert compressed == phi.compress(text, preset='phi-global', level=level,
+                                      entropy=phi.PRESETS[preset].get('entropy'))
+
+
+def test_explicit_level_overrides_preset(text):
+    assert phi.compress(text, preset='phi-global-fast', level=6) == \
+        phi.compress(text, preset='phi-global', level=6)
+
+
+@pytest.mark.parametrize('level', [0, 10, -1])
+def test_invalid_level(text, level):
+    with pytest.raises(ValueError):
+        phi.compress(text, preset='phi-global', level=level)
+
+
+def test_benchmark_levels(text):
+    rows = phi.benchmark_levels(text[:4000], levels=[1, 9])
+    assert [row['level'] for row in rows] == [1, 9]
+    for row in rows:
+        assert row['ratio'] > 1 and row['compress_mbps'] > 0 and row['decompress_mbps'] > 0
@@ -0,0 +1,58 @@
+"""Long-range matching with varint offsets beyond 64 KB."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import LongRangeMatchFinder, SymbolicCodec
+
+
+@pytest.fixture(scope='module')
+def distant_repeat():
+    """A 24 KB block repeated after 80 KB of other data (offset > 0xFFFF)."""
+    rng = np.random.default_rng(4)
+    block = rng.integers(0, 256, 24000, dtype=np.uint8).tobytes()
+    filler = rng.integers(0, 256, 80000, dtype=np.uint8).tobytes()
+    return block + filler + block
+
+
+def test_finder_locates_distant_block(distant_repeat):
+    matches = LongRangeMatchFinder(min_length=64).find_all(distant_repeat)
+    assert matches
+    position, offset, length = max(matches, key=lambda m: m[2])
+    assert offset == 104000 and length > 23000
+    assert distant_repeat[position:position + length] == \
+        distant_repeat[position - offset:position - offset + length]
+
+
+def test_finder_respects_window_and_start(distant_repeat):
+    assert LongRangeMatchFinder(window_size=50000).find_all(distant_repeat) == []
+    assert all(m[0] >= 110000 for m in LongRangeMatchFinder().find_all(distant_repeat, start=110000))
+    assert LongRangeMatchFinder().find_all(b'short') == []
+
+
+def test_codec_roundtrip_and_gain(distant_repeat):
+    long_codec = SymbolicCodec(long_window=phi.LONG_RANGE_WINDOW)
+    compressed = long_codec.compress(distant_repeat)
+    assert long_codec.decompress(compressed) == distant_repeat
+    assert len(compressed) < len(SymbolicCodec().compress(distant_repeat)) - 20000
+
+
+def test_preset_roundtrip(distant_repeat):
+    compressed = phi.compress(distant_repeat, preset='phi-global-long')
+    assert phi.decompress(compressed) == distant_repeat
+
+
+def test_long_match_streams_roundtrip():
+    opcodes = [(0, 0x41), (0, 0x42), (1, 2, 300), (1, 2, 70000)]
+    serialized, count = SymbolicCodec._pack_streams(opcodes)
+    kinds = SymbolicCodec._unpack_streams(serialized, count)[0]
+    assert list(kinds) == [0, 3, 3]
+    streams = SymbolicCodec._unpack_streams(serialized, count)
+    assert phi.FractalDictionary().decode_streams(*streams) == b'AB' * 35151
+
+
+def test_varint_roundtrip():
+    values = [0, 1, 127, 128, 65535, 65536, 1 << 23, (1 << 32) - 1]
+    decoded, end = phi._varint_decode(phi._varint_encode(values), len(values))
+    assert decoded.tolist() == values
+    assert end == len(phi._varint_encode(values))
@@ -0,0 +1,82 @@
+"""Hash-chain match finder behind FractalDictionary.encode."""
+import numpy as np
+import pytest
+
+from phi_engine_master import PHI, FractalDictionary, HashChainMatchFinder
+
+
+@pytest.mark.parametrize('max_chain', [1, 8, 64, None])
+def test_encode_decode_roundtrip(text, max_chain):
+    dictionary = FractalDictionary(max_chain=max_chain)
+    opcodes = dictionary.encode(text)
+    assert dictionary.decode(opcodes) == text
+
+
+def test_roundtrip_edge_inputs():
+    dictionary = FractalDictionary()
+    for data in (b'', b'a', b'ab', b'aaaa' * 300, bytes(range(256)) * 4):
+        assert dictionary.decode(dictionary.encode(data)) == data
+
+
+def test_random_bytes_roundtrip():
+    data = np.random.default_rng(0).integers(0, 256, 5000, dtype=np.uint8).tobytes()
+    dictionary = FractalDictionary()
+    assert dictionary.decode(dictionary.encode(data)) == data
+
+
+def test_deeper_chains_do_not_emit_more_opcodes(text):
+    shallow = FractalDictionary(max_chain=1).encode(text)
+    exhaustive = FractalDictionary(max_chain=None).encode(text)
+    assert len(exhaustive) <= len(shallow)
+
+
+def test_matches_stay_inside_window(text):
+    dictionary = FractalDictionary(window_size=1024)
+    for op in dictionary.encode(text):
+        if op[0] == 1:
+            assert 0 < op[1] <= 1024
+
+
+def test_history_primes_window(text):
+    dictionary = FractalDictionary()
+    history, data = text[:8000], text[8000:]
+    opcodes = dictionary.encode(history + data, start=len(history))
+    assert dictionary.decode(opcodes, history=history) == data
+    assert len(opcodes) < len(dictionary.encode(data))
+
+
+def test_primed_finder_matches_unprimed_and_is_not_modified(text):
+    dictionary = FractalDictionary()
+    history, data = text[:8000], text[8000:12000]
+    primed = dictionary.prime(history)
+    chains = (dict(primed.head), list(primed.prev))
+    
+    expected = dictionary.encode(history + data, start=len(history))
+    assert dictionary.encode(history + data, start=len(history), primed=primed) == expected
+    assert (primed.head, primed.prev) == chains
+
+
+def test_finder_links_positions_in_order():
+    finder = HashChainMatchFinder(min_match=3)
+    data = b'abcabcabc'
+    for position in range(len(data) - 2):
+        finder.insert(data, position)
+    assert finder.next_position == len(data) - 2
+    assert finder.head[b'abc'] == 6
+    assert finder.prev[6] == 3 and finder.prev[3] == 0 and finder.prev[0] == -1
+
+
+def test_longest_matches_still_break_ties_by_phi():
+    # Every earlier copy matches at max_length: the offset nearest the
+    # golden ratio point of the window wins, not the nearest copy
+    finder = HashChainMatchFinder(min_match=3, max_length=8, max_chain=None)
+    data = b''.join(b'pattern!' + bytes([separator]) for separator in range(20)) + b'pattern!'
+    position = len(data) - 8
+    for j in range(position):
+        finder.insert(data, j)
+    match = finder.find(data, position, len(data))
+    offsets = [position - j for j in range(0, position, 9)]
+    target = int(position / PHI)
+    assert match.length == 8
+    assert match.offset == min(offsets, key=lambda offset: abs(offset - target))
+    assert match.offset != 9
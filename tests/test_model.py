@@ -0,0 +1,86 @@
+"""Reusable PhiModel: fit once, encode many batches."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import PhiModel
+
+PRESETS = ['phi-balanced', 'phi-max', 'phi-pq-balanced', 'phi-pq-quality',
+           'phi-pq-ivf', 'phi-pq-fastscan']
+
+
+def _cosine(a, b):
+    return float(np.mean(np.sum(a * b, 1) / np.linalg.norm(a, axis=1) / np.linalg.norm(b, axis=1)))
+
+
+@pytest.mark.parametrize('preset', PRESETS)
+def test_model_matches_inline_compress(embeddings, preset):
+    model = PhiModel(preset).fit(embeddings, rng=3)
+    compressed = phi.compress(embeddings, preset=preset, seed=3)
+    restored = phi.decompress(compressed)
+    
+    assert np.array_equal(restored, model.decode(model.encode(embeddings)))
+    assert phi.read_embedding_codes(compressed)[0].model_id == model.model_id
+    assert _cosine(restored, embeddings) > 0.95
+
+
+@pytest.mark.parametrize('preset', PRESETS)
+def test_model_referenced_payloads(embeddings, preset):
+    model = PhiModel(preset).fit(embeddings, rng=0)
+    batch = embeddings[:100]
+    compressed = phi.compress(batch, model=model)
+    
+    assert compressed[4] == phi.MODE_EMBEDDINGS_MODEL
+    assert len(compressed) < len(phi.compress(batch, preset=preset, seed=0))
+    assert np.array_equal(phi.decompress(compressed, model=model), model.decode(model.encode(batch)))
+
+
+def test_save_load_roundtrip(embeddings, tmp_path):
+    model = PhiModel('phi-pq-quality').fit(embeddings, rng=1)
+    path = str(tmp_path / 'vectors.phimodel')
+    model.save(path)
+    loaded = PhiModel.load(path)
+    
+    assert loaded.model_id == model.model_id
+    assert np.array_equal(loaded.encode(embeddings), model.encode(embeddings))
+    compressed = phi.compress(embeddings[:50], model=model)
+    assert np.array_equal(phi.decompress(compressed, model=loaded),
+                          phi.decompress(compressed, model=model))
+
+
+def test_model_id_tracks_parameters(embeddings):
+    a = PhiModel('phi-pq-balanced').fit(embeddings, rng=1)
+    b = PhiModel('phi-pq-balanced').fit(embeddings, rng=1)
+    c = PhiModel('phi-pq-balanced').fit(embeddings, rng=2)
+    assert len(a.model_id) == PhiModel.DIGEST_SIZE
+    assert a.model_id == b.model_id != c.model_id
+    
+    blob = bytearray(a.to_bytes())
+    blob[4] ^= 0xFF
+    with pytest.raises(ValueError):
+        PhiModel.from_bytes(bytes(blob))
+
+
+def test_missing_or_wrong_model(embeddings):
+    model = PhiModel('phi-balanced').fit(embeddings, rng=0)
+    other = PhiModel('phi-max').fit(embeddings, rng=0)
+    compressed = phi.compress(embeddings[:20], model=model)
+    with pytest.raises(ValueError):
+        phi.decompress(compressed)
+    with pytest.raises(ValueError):
+        phi.decompress(compressed, model=other)
+
+
+def test_unfitted_and_wrong_shape(embeddings):
+    with pytest.raises(ValueError):
+        PhiModel('phi-balanced').encode(embeddings)
+    model = PhiModel('phi-balanced').fit(embeddings, rng=0)
+    with pytest.raises(ValueError):
+        model.encode(embeddings[:, :10])
+
+
+def test_out_of_range_rows_clip(embeddings):
+    model = PhiModel('phi-balanced').fit(embeddings, rng=0)
+    codes = model.encode(100 * embeddings[:10])
+    assert np.isfinite(model.decode(codes)).all()
+    assert codes.max() <= (1 << model.quant_bits) - 1
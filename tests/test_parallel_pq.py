@@ -0,0 +1,47 @@
+"""Concurrent per-block codebook training and encoding."""
+import os
+from contextlib import nullcontext
+
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import BlockProductQuantizer
+
+
+def _fit(data, **options):
+    pq = BlockProductQuantizer(n_blocks=6, n_centroids=16, **options)
+    pq.fit(data, rng=42)
+    return pq.codebooks, pq.encode(data)
+
+
+@pytest.mark.parametrize('options', [
+    {'workers': None}, {'workers': 4}, {'workers': 6, 'pool': 'process'},
+    {'workers': 3, 'batch_size': 128}, {'workers': 4, 'init': 'kmeans||'},
+], ids=['unset', 'threads', 'processes', 'minibatch', 'kmeans-parallel'])
+def test_seeded_fit_independent_of_workers(embeddings, options):
+    serial = _fit(embeddings, **dict(options, workers=1, pool='thread'))
+    pooled = _fit(embeddings, **options)
+    assert all(np.array_equal(a, b) for a, b in zip(serial[0], pooled[0]))
+    assert np.array_equal(serial[1], pooled[1])
+
+
+@pytest.mark.parametrize('workers', [None, 1, 4])
+def test_compress_bytes_independent_of_workers(embeddings, workers):
+    serial = phi.compress(embeddings, preset='phi-pq-balanced', seed=5, workers=1)
+    assert phi.compress(embeddings, preset='phi-pq-balanced', seed=5, workers=workers) == serial
+
+
+def test_block_workers():
+    assert BlockProductQuantizer(workers=16)._block_workers(3) == 3
+    assert BlockProductQuantizer(workers=2)._block_workers(8) == 2
+    assert BlockProductQuantizer(workers=0)._block_workers(8) == 1
+    unset = BlockProductQuantizer()
+    assert unset._block_workers(phi.PARALLEL_MIN_ITEMS - 1) == 1
+    assert unset._block_workers(64) == min(os.cpu_count() or 1, phi.PQ_MAX_BLOCK_WORKERS)
+
+
+def test_blas_limit():
+    assert isinstance(phi._blas_limit(1), nullcontext)
+    with phi._blas_limit(4):
+        assert np.array_equal(np.eye(3) @ np.ones(3), np.ones(3))
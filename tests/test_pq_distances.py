@@ -0,0 +1,63 @@
+"""Memory-bounded GEMM distances in BlockProductQuantizer."""
+import numpy as np
+import pytest
+
+from phi_engine_master import BlockProductQuantizer, _nearest_centroids
+
+
+def _brute_force(data, centroids):
+    diff = data[:, None, :].astype(np.float64) - centroids[None, :, :].astype(np.float64)
+    return (diff ** 2).sum(axis=2)
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(5)
+    return rng.standard_normal((1000, 16)).astype(np.float32), \
+        rng.standard_normal((37, 16)).astype(np.float32)
+
+
+@pytest.mark.parametrize('memory_budget', [1, 4096, 1 << 20, 1 << 30])
+def test_matches_brute_force(points, memory_budget):
+    data, centroids = points
+    labels, distances = _nearest_centroids(data, centroids, memory_budget)
+    exact = _brute_force(data, centroids)
+    
+    assert labels.shape == (1000,) and distances.dtype == np.float32
+    # The chosen centroid is a nearest one (ties within float32 rounding)
+    chosen = exact[np.arange(1000), labels]
+    assert np.allclose(chosen, exact.min(axis=1), rtol=1e-5, atol=1e-4)
+    assert np.allclose(distances, chosen, rtol=1e-4, atol=1e-3)
+    assert (labels == exact.argmin(axis=1)).mean() > 0.99
+
+
+def test_budget_does_not_change_result(points):
+    data, centroids = points
+    small = _nearest_centroids(data, centroids, 4096)
+    large = _nearest_centroids(data, centroids, 1 << 30)
+    assert np.array_equal(small[0], large[0])
+    assert np.allclose(small[1], large[1], rtol=1e-5, atol=1e-5)
+
+
+def test_edge_shapes():
+    centroids = np.ones((4, 3), dtype=np.float32)
+    labels, distances = _nearest_centroids(np.zeros((0, 3), dtype=np.float32), centroids)
+    assert labels.shape == (0,) and distances.shape == (0,)
+    
+    data = np.array([[1, 1, 1], [0, 0, 0]], dtype=np.float64)
+    labels, distances = _nearest_centroids(data, centroids[:1])
+    assert labels.tolist() == [0, 0]
+    assert np.allclose(distances, [0, 3]) and (distances >= 0).all()
+
+
+def test_encode_picks_nearest_codeword(embeddings):
+    pq = BlockProductQuantizer(n_blocks=4, n_centroids=16, memory_budget=8192)
+    pq.fit(embeddings, rng=0)
+    codes = pq.encode(embeddings)
+    
+    for b in range(4):
+        block = embeddings[:, b * pq.block_size:(b + 1) * pq.block_size]
+        exact = _brute_force(block, pq.codebooks[b])
+        chosen = exact[np.arange(len(block)), codes[:, b]]
+        assert np.allclose(chosen, exact.min(axis=1), rtol=1e-5, atol=1e-4)
+
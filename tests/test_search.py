@@ -0,0 +1,160 @@
+"""Asymmetric-distance top-k search directly on PQ codes."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import PQSearcher, PhiModel, search
+
+
+@pytest.fixture
+def queries(embeddings):
+    rng = np.random.default_rng(21)
+    return embeddings[rng.integers(0, len(embeddings), 6)] + \
+        rng.standard_normal((6, embeddings.shape[1])).astype(np.float32)
+
+
+def _brute_force(reconstructed, queries, top_k, metric):
+    """Exact top-k over the decoded rows, best first."""
+    if metric == 'l2':
+        scores = ((queries[:, None, :].astype(np.float64) - reconstructed[None]) ** 2).sum(axis=2)
+        order = np.argsort(scores, axis=1, kind='stable')
+    else:
+        scores = queries.astype(np.float64) @ reconstructed.T.astype(np.float64)
+        if metric == 'cosine':
+            scores /= np.linalg.norm(reconstructed, axis=1) * \
+                np.linalg.norm(queries, axis=1)[:, None]
+        order = np.argsort(-scores, axis=1, kind='stable')
+    ids = order[:, :top_k]
+    return ids, np.take_along_axis(scores, ids, axis=1)
+
+
+def _check(compressed, queries, metric, top_k=10, **options):
+    ids, scores = search(compressed, queries, top_k=top_k, metric=metric, **options)
+    expected_ids, expected_scores = _brute_force(phi.decompress(compressed), queries, top_k, metric)
+    assert ids.dtype == np.int64 and ids.shape == scores.shape == (len(queries), top_k)
+    assert np.array_equal(ids, expected_ids)
+    assert np.allclose(scores, expected_scores, rtol=1e-4, atol=1e-3)
+
+
+@pytest.mark.parametrize('metric', phi.SEARCH_METRICS)
+@pytest.mark.parametrize('preset', ['phi-pq-balanced', 'phi-pq-aggressive'])
+def test_matches_brute_force(embeddings, queries, preset, metric):
+    _check(phi.compress(embeddings, preset=preset, seed=0), queries, metric)
+
+
+def test_single_query_and_top_k_clipping(embeddings, queries):
+    compressed = phi.compress(embeddings[:30], preset='phi-pq-balanced', seed=0)
+    ids, scores = search(compressed, queries[0], top_k=100)
+    assert ids.shape == scores.shape == (30,)
+    assert sorted(ids.tolist()) == list(range(30))
+    assert (np.diff(scores) >= 0).all()
+
+
+def test_searcher_reuse(embeddings, queries):
+    compressed = phi.compress(embeddings, preset='phi-pq-balanced', seed=0)
+    searcher = PQSearcher.from_archive(compressed, metric='ip')
+    for _ in range(2):
+        ids, scores = searcher.search(queries, top_k=5)
+        assert np.array_equal(ids, search(compressed, queries, top_k=5, metric='ip')[0])
+    
+    # Small memory budgets tile the scan without changing results
+    model, codes = phi.read_embedding_codes(compressed)
+    tiled = PQSearcher(model, codes, 'ip', memory_budget=1024).search(queries, top_k=5)
+    assert np.array_equal(tiled[0], ids)
+
+
+def test_model_referenced_archive(embeddings, queries):
+    model = PhiModel('phi-pq-balanced').fit(embeddings, rng=0)
+    compressed = phi.compress(embeddings, model=model)
+    ids, _ = search(compressed, queries, top_k=5, model=model)
+    assert np.array_equal(ids, _brute_force(phi.decompress(compressed, model=model), queries, 5, 'l2')[0])
+
+
+def test_rejects_bad_input(embeddings, queries):
+    with pytest.raises(ValueError):
+        search(phi.compress(embeddings, preset='phi-balanced'), queries)
+    with pytest.raises(ValueError):
+        search(phi.compress(embeddings, preset='phi-pq-balanced', seed=0), queries, metric='hamming')
+
+
+@pytest.mark.parametrize('metric', phi.SEARCH_METRICS)
+def test_ivf_all_lists_matches_brute_force(embeddings, queries, metric):
+    compressed = phi.compress(embeddings, preset='phi-pq-ivf', seed=0)
+    _check(compressed, queries, metric, nprobe=10 ** 6)
+
+
+def test_ivf_lists(embeddings):
+    model, codes = phi.read_embedding_codes(phi.compress(embeddings, preset='phi-pq-ivf', seed=0))
+    n_lists = len(embeddings) // phi.IVF_MIN_LIST_SIZE
+    assert model.ivf is not None and model.ivf.n_centroids == n_lists
+    lists, pq_codes, _ = model.split_codes(codes)
+    assert lists.max() < n_lists and pq_codes.shape[1] == model.pq.n_blocks
+    
+    # Rows sit in their nearest coarse list
+    coarse = model.ivf.codebooks[0]
+    projected = model.project(embeddings)
+    assert np.array_equal(lists, phi._nearest_centroids(projected, coarse)[0])
+
+
+@pytest.mark.parametrize('metric', phi.SEARCH_METRICS)
+def test_ivf_probes_only_nearest_lists(embeddings, queries, metric):
+    compressed = phi.compress(embeddings, preset='phi-pq-ivf', seed=0)
+    model, codes = phi.read_embedding_codes(compressed)
+    lists = model.split_codes(codes)[0]
+    ids, scores = search(compressed, queries, top_k=10, metric=metric, nprobe=2)
+    exact_ids, exact_scores = _brute_force(phi.decompress(compressed), queries, len(embeddings), metric)
+    
+    for q in range(len(queries)):
+        found = ids[q][ids[q] >= 0]
+        assert len(set(lists[found].tolist())) <= 2
+        # Returned scores are exact for the returned rows
+        exact = dict(zip(exact_ids[q].tolist(), exact_scores[q].tolist()))
+        assert np.allclose(scores[q][:len(found)], [exact[i] for i in found], rtol=1e-4, atol=1e-3)
+        # and they are the best rows of the probed lists
+        probed = np.isin(exact_ids[q], np.flatnonzero(np.isin(lists, lists[found])))
+        assert np.array_equal(found, exact_ids[q][probed][:len(found)])
+
+
+def test_ivf_pads_short_results(embeddings, queries):
+    compressed = phi.compress(embeddings, preset='phi-pq-ivf', seed=0)
+    ids, scores = search(compressed, queries, top_k=len(embeddings), nprobe=1)
+    assert (ids == -1).any(axis=1).all()
+    assert np.isinf(scores[ids == -1]).all()
+    
+    # More probes find at least as many of the true neighbours
+    exact = _brute_force(phi.decompress(compressed), queries, 10, 'l2')[0]
+    recall = [np.mean([len(set(a) & set(b)) for a, b in zip(
+        search(compressed, queries, top_k=10, nprobe=nprobe)[0].tolist(), exact.tolist())])
+        for nprobe in (1, 4, 10 ** 6)]
+    assert recall[0] <= recall[1] <= recall[2] == 10
+
+
+@pytest.mark.parametrize('n_blocks', [1, 7, 16])
+def test_nibble_packing(n_blocks):
+    codes = np.random.default_rng(n_blocks).integers(0, 16, (50, n_blocks)).astype(np.uint8)
+    packed = phi._pack_nibbles(codes)
+    assert packed.shape == (50, (n_blocks + 1) // 2)
+    assert np.array_equal(phi._unpack_nibbles(packed, n_blocks), codes)
+
+
+def test_fastscan_codes_are_packed(embeddings):
+    model, codes = phi.read_embedding_codes(phi.compress(embeddings, preset='phi-pq-fastscan', seed=0))
+    assert model.pq_nibbles and model.pq.n_centroids == phi.PQ_NIBBLE_CENTROIDS
+    assert codes.max() < 16
+    sections = model.code_sections(codes)
+    assert sections[0].shape == (len(embeddings), model.pq.n_blocks // 2)
+    assert np.array_equal(model.read_codes(b''.join(s.tobytes() for s in sections), 0,
+                                           len(embeddings)), codes)
+
+
+@pytest.mark.parametrize('metric', phi.SEARCH_METRICS)
+@pytest.mark.parametrize('top_k', [1, 10, 200])
+def test_fastscan_matches_brute_force(embeddings, queries, metric, top_k):
+    compressed = phi.compress(embeddings, preset='phi-pq-fastscan', seed=0)
+    _check(compressed, queries, metric, top_k=top_k)
+    
+    model, codes = phi.read_embedding_codes(compressed)
+    searcher = PQSearcher(model, codes, metric, memory_budget=4096)  # many small tiles
+    assert searcher.packed is not None
+    assert np.array_equal(searcher.search(queries, top_k)[0],
+                          search(compressed, queries, top_k=top_k, metric=metric)[0])
@@ -0,0 +1,86 @@
+"""Streaming PhiCompressor / PhiDecompressor with a persistent window."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import PhiCompressor, PhiDecompressor
+
+
+def _stream(data, chunk, block_size):
+    compressor = PhiCompressor(block_size=block_size)
+    parts = [compressor.compress(data[i:i + chunk]) for i in range(0, len(data), chunk)]
+    parts.append(compressor.flush())
+    return b''.join(parts)
+
+
+@pytest.mark.parametrize('chunk,block_size', [(1, 4096), (777, 4096), (50000, 1 << 18)])
+def test_roundtrip_any_chunking(text, chunk, block_size):
+    stream = _stream(text, chunk, block_size)
+    assert phi.decompress(stream) == text
+    
+    decompressor = PhiDecompressor()
+    output = b''.join(decompressor.decompress(stream[i:i + 13]) for i in range(0, len(stream), 13))
+    assert output == text
+    assert decompressor.eof and decompressor.unused_data == b''
+
+
+def test_chunking_does_not_change_output(text):
+    assert _stream(text, 1000, 4096) == _stream(text, 4096, 4096) == _stream(text, len(text), 4096)
+
+
+def test_window_carries_across_frames(text):
+    repeated = text[:4096] * 8
+    framed = _stream(repeated, 4096, 4096)
+    independent = sum(len(phi.SymbolicCodec().compress(repeated[i:i + 4096]))
+                      for i in range(0, len(repeated), 4096))
+    assert len(framed) < independent
+
+
+def test_empty_stream():
+    compressor = PhiCompressor()
+    stream = compressor.compress(b'') + compressor.flush()
+    assert phi.decompress(stream) == b''
+
+
+def test_str_input():
+    compressor = PhiCompressor()
+    stream = compressor.compress('héllo wörld ' * 50) + compressor.flush()
+    assert phi.decompress(stream) == ('héllo wörld ' * 50).encode('utf-8')
+
+
+def test_unused_data_after_end(text):
+    decompressor = PhiDecompressor()
+    assert decompressor.decompress(_stream(text, 4096, 4096) + b'trailer') == text
+    assert decompressor.eof
+    assert decompressor.unused_data == b'trailer'
+    assert decompressor.decompress(b'more') == b''
+    assert decompressor.unused_data == b'trailermore'
+
+
+def test_flush_twice_raises():
+    compressor = PhiCompressor()
+    compressor.flush()
+    with pytest.raises(ValueError):
+        compressor.flush()
+    with pytest.raises(ValueError):
+        compressor.compress(b'late')
+
+
+def test_truncated_and_corrupt_streams(text):
+    stream = _stream(text, 4096, 4096)
+    with pytest.raises(ValueError):
+        phi.decompress(stream[:-6])
+    corrupt = bytearray(stream)
+    corrupt[-1] ^= 0xFF
+    with pytest.raises(ValueError):
+        phi.decompress(bytes(corrupt))
+
+
+def test_rejects_other_modes(text):
+    with pytest.raises(ValueError):
+        PhiDecompressor().decompress(phi.compress(text, preset='phi-global'))
+
+
+def test_binary_chunks_roundtrip():
+    data = np.random.default_rng(5).integers(0, 8, 30000, dtype=np.uint8).tobytes()
+    assert phi.decompress(_stream(data, 3000, 8192)) == data
@@ -0,0 +1,67 @@
+"""Split-stream SymbolicCodec layout, bulk decoder and legacy containers."""
+import os
+
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import FractalDictionary, SymbolicCodec
+
+from conftest import DATA
+
+
+def _samples():
+    rng = np.random.default_rng(3)
+    yield b''
+    yield b'x'
+    yield b'ab' * 5000                                   # overlapping matches
+    yield b'\x00' * 70000                                # RLE runs
+    yield rng.integers(0, 256, 70000, dtype=np.uint8).tobytes()  # literal runs > 0xFFFF
+    yield b''.join(rng.choice([b'alpha ', b'beta ', b'gamma\n'], 4000))
+
+
+@pytest.mark.parametrize('split_streams', [True, False])
+def test_roundtrip(split_streams):
+    codec = SymbolicCodec(split_streams=split_streams)
+    for data in _samples():
+        assert codec.decompress(codec.compress(data)) == data
+
+
+def test_bulk_decoder_matches_opcode_decoder():
+    dictionary = FractalDictionary()
+    for data in _samples():
+        opcodes = dictionary.encode(data)
+        serialized, count = SymbolicCodec._pack_streams(opcodes)
+        streams = SymbolicCodec._unpack_streams(serialized, count)
+        assert dictionary.decode_streams(*streams) == dictionary.decode(opcodes) == data
+
+
+def test_split_streams_with_history(text):
+    codec = SymbolicCodec()
+    history, data = text[:6000], text[6000:]
+    compressed = codec.compress(data, history=history)
+    assert codec.decompress(compressed, history=history) == data
+
+
+def test_split_streams_not_larger_than_legacy(text):
+    split = SymbolicCodec(split_streams=True).compress(text)
+    legacy = SymbolicCodec(split_streams=False).compress(text)
+    assert len(split) <= len(legacy)
+
+
+def test_compress_sets_split_flag(text):
+    compressed = phi.compress(text, preset='phi-global')
+    assert compressed[4] == phi.MODE_SYMBOLIC
+    assert compressed[5] & phi.FLAG_SPLIT_STREAMS
+    assert phi.decompress(compressed) == text
+
+
+def test_decodes_baseline_container():
+    """Containers written before split streams (interleaved opcodes) still decode."""
+    with open(os.path.join(DATA, 'baseline_text.phi'), 'rb') as f:
+        compressed = f.read()
+    with open(os.path.join(DATA, 'baseline_text.txt'), 'rb') as f:
+        expected = f.read()
+    assert compressed[4] == phi.MODE_SYMBOLIC
+    assert not compressed[5] & phi.FLAG_SPLIT_STREAMS
+    assert phi.decompress(compressed) == expected
@@ -0,0 +1,75 @@
+"""Deadline-aware embedding fits under compress(time_budget=) and PhiModel.fit."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import PhiModel
+
+
+@pytest.fixture(scope='module')
+def large():
+    # Big enough that an unbudgeted phi-pq-quality fit takes several seconds
+    return np.random.default_rng(0).standard_normal((20000, 64)).astype(np.float32)
+
+
+def _budget_record(archive):
+    return phi.read_embedding_codes(archive)[0].meta['time_budget']
+
+
+@pytest.mark.parametrize('preset', ['phi-pq-balanced', 'phi-pq-ivf'])
+def test_generous_budget_takes_no_fallbacks(embeddings, preset):
+    # k-means may use all the time left, not just its estimate
+    budgeted = phi.compress(embeddings, preset=preset, seed=3, time_budget=60.0)
+    record = _budget_record(budgeted)
+    assert record['seconds'] == 60.0
+    assert record['fallbacks'] == []
+    assert 'deadline_met' not in record
+    # The pilot draws from the seeded stream, so compare quality, not bytes
+    plain = phi.compress(embeddings, preset=preset, seed=3)
+    budgeted_mse = np.mean((phi.decompress(budgeted) - embeddings) ** 2)
+    plain_mse = np.mean((phi.decompress(plain) - embeddings) ** 2)
+    assert budgeted_mse <= 1.1 * plain_mse
+
+
+def test_compress_meets_tight_budget(large):
+    # The record, not wall-clock time, so a loaded runner cannot flake it:
+    # the plan shrank, and a floor that still overruns is reported
+    archive = phi.compress(large, preset='phi-pq-quality', seed=0, time_budget=2.0)
+    record = _budget_record(archive)
+    assert 'fewer-train-rows' in record['fallbacks']
+    assert record['train_rows'] < len(large)
+    assert record.get('deadline_met', True) or record['estimated_seconds'] > 2.0
+    restored = phi.decompress(archive)
+    assert restored.shape == large.shape
+    # Fallbacks trade quality, not correctness: still far better than zeros
+    assert np.mean((restored - large) ** 2) < 0.5 * np.mean(large ** 2)
+
+
+def test_infeasible_budget_reports_estimate(large):
+    with pytest.warns(RuntimeWarning, match='time_budget'):
+        archive = phi.compress(large, preset='phi-pq-quality', seed=0, time_budget=1e-3)
+    record = _budget_record(archive)
+    assert record['deadline_met'] is False
+    assert record['estimated_seconds'] > 1e-3
+    assert 'sampled-pca' in record['fallbacks']
+    assert phi.decompress(archive).shape == large.shape
+
+
+def test_model_fit_budget(large):
+    model = PhiModel('phi-pq-quality').fit(large, rng=0, time_budget=0.5)
+    record = model.meta['time_budget']
+    assert record['seconds'] == 0.5
+    assert record['train_rows'] < len(large)
+    assert model.decode(model.encode(large[:100])).shape == (100, 64)
+
+
+def test_budget_rejected_where_it_does_not_apply(embeddings, text):
+    model = PhiModel('phi-pq-balanced').fit(embeddings, rng=0)
+    with pytest.raises(ValueError, match='time_budget'):
+        phi.compress(embeddings, model=model, time_budget=1.0)
+    with pytest.raises(ValueError, match='time_budget'):
+        phi.compress(text, time_budget=1.0)
+    with pytest.raises(ValueError, match='time_budget'):
+        phi.compress(embeddings, time_budget=0)
+    with pytest.raises(ValueError, match='time_budget'):
+        PhiModel('phi-pq-balanced').fit(embeddings, time_budget=-1.0)
@@ -0,0 +1,79 @@
+"""Lossless TokenCodec for integer token-ID streams."""
+import numpy as np
+import pytest
+
+import phi_engine_master as phi
+from phi_engine_master import TokenCodec, detect_data_type
+
+
+@pytest.fixture
+def tokens():
+    """Token stream with repeated n-grams, like tokenized boilerplate."""
+    rng = np.random.default_rng(8)
+    phrases = [rng.integers(0, 50000, int(rng.integers(5, 40))) for _ in range(30)]
+    return np.concatenate([phrases[int(i)] for i in rng.integers(0, 30, 400)]).astype(np.int32)
+
+
+@pytest.mark.parametrize('dtype', [np.int32, np.int64, np.uint16, np.uint32, '>i4'])
+def test_roundtrip_dtypes(tokens, dtype):
+    data = tokens.astype(dtype)
+    restored = TokenCodec().decompress(TokenCodec().compress(data))
+    assert restored.dtype == np.dtype(dtype)
+    assert np.array_equal(restored, data)
+
+
+def test_repeats_compress_well(tokens):
+    assert len(TokenCodec().compress(tokens)) < tokens.nbytes / 3
+
+
+def test_edge_inputs():
+    codec = TokenCodec()
+    for data in (np.array([], dtype=np.int32), np.array([7], dtype=np.int32),
+                 np.array([5] * 1000, dtype=np.int32), np.arange(-50, 50, dtype=np.int64),
+                 np.tile(np.arange(3, dtype=np.int32), 500)):
+        assert np.array_equal(codec.decompress(codec.compress(data)), data)
+
+
+def test_store_fallback_for_random_ids():
+    data = np.random.default_rng(1).integers(0, 1 << 16, 5000).astype(np.uint16)
+    compressed = TokenCodec().compress(data)
+    assert compressed[12] & 2
+    assert len(compressed) <= data.nbytes + 32
+    assert np.array_equal(TokenCodec().decompress(compressed), data)
+
+
+def test_compress_container_shapes(tokens):
+    batch = tokens[:len(tokens) // 64 * 64].reshape(-1, 64)
+    for data in (tokens, batch):
+        compressed = phi.compress(data)
+        assert compressed[4] == phi.MODE_TOKENS
+        restored = phi.decompress(compressed)
+        assert restored.shape == data.shape and np.array_equal(restored, data)
+
+
+def test_detection():
+    ids = np.random.default_rng(0).integers(0, 32000, (8, 128))
+    assert detect_data_type(ids) == 'tokens'
+    assert detect_data_type(np.arange(100)) == 'tokens'
+    assert detect_data_type(np.zeros((0, 32), dtype=np.int64)) == 'tokens'
+    # Narrow integer tables and out-of-vocabulary values are not token batches
+    assert detect_data_type(np.arange(300).reshape(100, 3)) != 'tokens'
+    assert detect_data_type(np.full((4, 64), phi.TOKEN_MAX_VOCAB)) != 'tokens'
+    assert detect_data_type(np.full((4, 64), -1)) != 'tokens'
+    assert detect_data_type(np.zeros((4, 64), dtype=np.float32)) != 'tokens'
+
+
+def test_overlapping_and_chained_matches_roundtrip():
+    # Periodic runs decode as overlapping matches (offset < length), and
+    # copies of copies span several gather rounds
+    rng = np.random.default_rng(2)
+    pattern = rng.integers(0, 50000, 3)
+    runs = [np.tile(pattern, 50), rng.integers(0, 50000, 20)]
+    for _ in range(30):
+        runs.append(runs[-2][::-1][:int(rng.integers(10, 60))])
+        runs.append(rng.integers(0, 50000, 1))
+    tokens = np.concatenate(runs).astype(np.int64)
+    codec = TokenCodec()
+    compressed = codec.compress(tokens)
+    assert len(compressed) < tokens.nbytes
+    np.testing.assert_array_equal(codec.decompress(compressed), tokens)